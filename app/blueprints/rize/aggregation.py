@@ -0,0 +1,151 @@
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+US_PER_MINUTE = 60 * 1_000_000
+US_PER_HOUR = 60 * US_PER_MINUTE
+US_PER_DAY = 24 * US_PER_HOUR
+
+# Sunday first, like the dashboard charts
+DAY_OF_WEEK_NAMES = ["Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+UNKNOWN_SESSION_TYPE = 'unknown'
+DEFAULT_RIZE_USER_ID = 1  # Rize is a single account; its local days follow this user's timezone timeline
+
+def to_microseconds(values: Sequence) -> np.ndarray:
+    """Convert dates/datetimes to integer microseconds since the epoch."""
+    return np.array(values, dtype='datetime64[us]').astype(np.int64)
+
+def session_pieces(
+    sessions: Sequence[Tuple[datetime, datetime]],
+    date_strings: List[str],
+    offsets_by_date: Dict[str, int]
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Split UTC sessions into (local day, hour) pieces.
+
+    Each session is split into the local days it overlaps and each overlap into
+    the hours it covers, with all arithmetic in integer microseconds. A local day
+    runs from 00:00 to 23:59:59.999999 and an hour from HH:00 to HH:59:59.999999,
+    as in the original hour-by-hour walk. Pieces come out in session/day/hour order.
+
+    Returns:
+        Tuple of arrays: session index, day index (into date_strings), hour and minutes per piece
+    """
+    day_count = len(date_strings)
+    local_day_start = to_microseconds([date.fromisoformat(d_str) for d_str in date_strings])
+    offsets = np.array([offsets_by_date[d_str] for d_str in date_strings], dtype=np.int64) * US_PER_MINUTE
+    day_start_utc = local_day_start - offsets
+    day_end_utc = day_start_utc + US_PER_DAY - 1
+
+    starts = to_microseconds([start for start, _ in sessions])
+    ends = to_microseconds([end for _, end in sessions])
+
+    # Candidate days per session; offsets are at most a day, so this never misses one
+    first_day = local_day_start[0] if day_count else 0
+    min_offset = offsets.min() if day_count else 0
+    max_offset = offsets.max() if day_count else 0
+    day_lo = np.clip((starts - first_day + min_offset - US_PER_DAY) // US_PER_DAY, 0, day_count)
+    day_hi = np.clip((ends - first_day + max_offset) // US_PER_DAY + 1, 0, day_count)
+    day_counts = np.maximum(day_hi - day_lo, 0)
+
+    session_idx = np.repeat(np.arange(len(starts)), day_counts)
+    day_idx = np.repeat(day_lo, day_counts) + np.arange(day_counts.sum()) - np.repeat(np.cumsum(day_counts) - day_counts, day_counts)
+
+    # Overlap of each session with each local day (in UTC), as in the day loop
+    overlap_start = np.maximum(starts[session_idx], day_start_utc[day_idx])
+    overlap_end = np.minimum(ends[session_idx], day_end_utc[day_idx])
+    overlaps = overlap_start < overlap_end
+    day_idx = day_idx[overlaps]
+
+    # Shift to microseconds since the local midnight of that day
+    relative_start = overlap_start[overlaps] - day_start_utc[day_idx]
+    relative_end = overlap_end[overlaps] - day_start_utc[day_idx]
+
+    # Every hour the walk visits: from the start hour through the last hour starting before the end
+    first_hour = relative_start // US_PER_HOUR
+    hour_counts = (relative_end - 1) // US_PER_HOUR - first_hour + 1
+    piece_day = np.repeat(day_idx, hour_counts)
+    piece_hour = np.repeat(first_hour, hour_counts) + np.arange(hour_counts.sum()) - np.repeat(np.cumsum(hour_counts) - hour_counts, hour_counts)
+    hour_start = piece_hour * US_PER_HOUR
+    piece_us = np.minimum(np.repeat(relative_end, hour_counts), hour_start + US_PER_HOUR - 1) - \
+               np.maximum(np.repeat(relative_start, hour_counts), hour_start)
+
+    # Same rounding as timedelta.total_seconds() / 60.0
+    piece_minutes = piece_us / 1e6 / 60.0
+
+    piece_session = np.repeat(session_idx[overlaps], hour_counts)
+
+    return piece_session, piece_day, piece_hour, piece_minutes
+
+def rollup_rows(
+    sessions: Sequence[Tuple[datetime, datetime, Optional[str]]],
+    date_strings: List[str],
+    offsets_by_date: Dict[str, int]
+) -> List[Dict]:
+    """
+    Minutes per (local date, hour, session type) for RizeHourlyRollups.
+
+    Args:
+        sessions: (start_time, end_time, type) triples in UTC
+        date_strings: Consecutive local dates (YYYY-MM-DD) to roll up
+        offsets_by_date: UTC offset in minutes for each date string
+
+    Returns:
+        List[Dict]: One row per cell that any session touches
+    """
+    day_count = len(date_strings)
+    session_types = [session_type or UNKNOWN_SESSION_TYPE for _, _, session_type in sessions]
+    type_names = sorted(set(session_types))
+    type_index = {name: i for i, name in enumerate(type_names)}
+    session_type_idx = np.array([type_index[name] for name in session_types], dtype=np.int64)
+
+    piece_session, piece_day, piece_hour, piece_minutes = session_pieces(
+        [(start, end) for start, end, _ in sessions], date_strings, offsets_by_date
+    )
+
+    cell = (session_type_idx[piece_session] * day_count + piece_day) * 24 + piece_hour
+    cell_count = len(type_names) * day_count * 24
+    cell_minutes = np.bincount(cell, weights=piece_minutes, minlength=cell_count)
+    touched = np.flatnonzero(np.bincount(cell, minlength=cell_count))
+
+    local_dates = [date.fromisoformat(d_str) for d_str in date_strings]
+    return [
+        {
+            'local_date': local_dates[(c // 24) % day_count],
+            'hour': int(c % 24),
+            'session_type': type_names[c // 24 // day_count],
+            'minutes': float(cell_minutes[c])
+        }
+        for c in touched.tolist()
+    ]
+
+def hourly_matrix(
+    rollups: Iterable[Tuple[date, int, float]],
+    date_strings: List[str]
+) -> List[List[float]]:
+    """
+    Arrange (local_date, hour, minutes) rollup rows as one row of 24 hourly minutes per date.
+
+    Returns:
+        List[List[float]]: minutes[i][hour] for date_strings[i]
+    """
+    row_index = {d_str: i for i, d_str in enumerate(date_strings)}
+    minutes = [[0] * 24 for _ in date_strings]
+    for local_date, hour, cell_minutes in rollups:
+        i = row_index.get(local_date.isoformat())
+        if i is not None:
+            minutes[i][hour] += cell_minutes
+    return minutes
+
+def day_of_week_minutes(daily_totals: Iterable[Tuple[date, float]]) -> List[float]:
+    """
+    Sum (local_date, minutes) daily totals by day of the week.
+
+    Returns:
+        List[float]: Minutes per day, in DAY_OF_WEEK_NAMES order
+    """
+    minutes = [0] * len(DAY_OF_WEEK_NAMES)
+    for local_date, day_minutes in daily_totals:
+        minutes[(local_date.weekday() + 1) % 7] += day_minutes  # Python's Monday=0 -> Sunday=0
+    return minutes
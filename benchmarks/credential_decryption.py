@@ -0,0 +1,58 @@
+"""
+Benchmark the per-integration cost of UserIntegrations.get_credentials().
+
+Compares deriving the Fernet key on every call (the old behaviour) with the
+process-wide derived key, with and without the per-run credentials cache.
+
+    python benchmarks/credential_decryption.py --integrations 20
+"""
+import os
+import sys
+import argparse
+import json
+import time
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, '..'))
+sys.path.append(PROJECT_ROOT)
+
+from cryptography.fernet import Fernet
+
+from utils.encryption import EncryptionManager, cached_credentials, derive_fernet_key
+
+BENCHMARK_KEY = 'benchmark-encryption-key'
+
+def uncached_decrypt(encrypted_data: bytes) -> dict:
+    """What every get_credentials() call used to do: derive the key, then decrypt."""
+    fernet = Fernet(derive_fernet_key.__wrapped__(BENCHMARK_KEY))
+    return json.loads(fernet.decrypt(encrypted_data).decode())
+
+def time_per_call(func, tokens, passes: int) -> float:
+    """Average milliseconds per integration over `passes` sync runs."""
+    started = time.perf_counter()
+    for _ in range(passes):
+        for token in tokens:
+            func(token)
+    return (time.perf_counter() - started) * 1000 / (passes * len(tokens))
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument('--integrations', type=int, default=20)
+    arg_parser.add_argument('--passes', type=int, default=3, help='Credential lookups per integration in a run')
+    args = arg_parser.parse_args()
+
+    manager = EncryptionManager(BENCHMARK_KEY)
+    tokens = [manager.encrypt_credentials({'api_key': f"token-{i}"}) for i in range(args.integrations)]
+
+    before = time_per_call(uncached_decrypt, tokens, args.passes)
+    after = time_per_call(lambda token: EncryptionManager(BENCHMARK_KEY).decrypt_credentials(token), tokens, args.passes)
+    with cached_credentials():
+        cached = time_per_call(lambda token: EncryptionManager(BENCHMARK_KEY).decrypt_credentials(token), tokens, args.passes)
+
+    print(f"{args.integrations} integrations x {args.passes} lookups, ms per lookup")
+    print(f"  derive key every call:  {before:8.3f}")
+    print(f"  process-wide key:       {after:8.3f} ({before / after:.0f}x)")
+    print(f"  + credentials cache:    {cached:8.3f} ({before / cached:.0f}x)")
+
+if __name__ == "__main__":
+    main()
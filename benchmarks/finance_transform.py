@@ -0,0 +1,98 @@
+"""
+Benchmark row-by-row finance processing against the column-wise transform.
+
+Runs over a synthetic multi-year Transactions sheet, or over a real one
+exported as JSON rows (header first) with --sheet.
+
+    python benchmarks/finance_transform.py --years 8 --per-day 12
+"""
+import os
+import sys
+import argparse
+import json
+import logging
+import random
+import time
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, '..'))
+sys.path.append(PROJECT_ROOT)
+
+from datetime import date, timedelta
+
+from etl.data_sources.google_sheets.finances import filter_finance_frame, process_finance_rows, process_finance_frame
+
+HEADER = ['Date', 'Description', 'Amount', 'Category', 'Transaction Type', 'Gift Type', 'Person',
+          'Notes', 'Account Name', 'date', 'vacation', 'birthday', 'christmas']
+
+def make_sheet(years: int, per_day: int, rng: random.Random) -> list:
+    """Transactions sheet rows as the Sheets API returns them: strings, with short rows for trailing blanks."""
+    rows = [HEADER]
+    start = date.today() - timedelta(days=365 * years)
+    for day in range(365 * years):
+        current = start + timedelta(days=day)
+        for _ in range(rng.randint(0, 2 * per_day)):
+            row = [
+                f"{current.month}/{current.day}/{current.year}",
+                rng.choice([' Grocery Store', 'Rent', 'Coffee ', 'Gas Station', 'Gift for Mom']),
+                rng.choices([f"{rng.uniform(-500, 500):.2f}", f" {rng.randint(-50, 50)} ", '', 'n/a'],
+                            weights=[880, 100, 18, 2])[0],
+                rng.choice(['Food', ' Housing', 'Fun ', '']),
+                rng.choice(['Expense', 'Income ', 'TRANSFER']),
+                rng.choice(['', ' Birthday', 'christmas']),
+                rng.choice(['', 'Alex ']),
+                rng.choice(['', 'note']),
+                rng.choice(['Checking', ' Credit Card']),
+                rng.choice(['', 'TRUE', '1', 'no', ' y ']),
+                rng.choice(['', 'yes']),
+                rng.choice(['', 'T']),
+                rng.choice(['', 'false'])
+            ]
+            rows.append(row[:rng.choice([3, 9, 13, 13, 13])])
+    return rows
+
+def time_call(func, repeat: int):
+    """Return (best seconds, result) over `repeat` runs."""
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument('--sheet', help='JSON file with the sheet rows, header first')
+    arg_parser.add_argument('--years', type=int, default=8)
+    arg_parser.add_argument('--per-day', type=int, default=12)
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    arg_parser.add_argument('--seed', type=int, default=0)
+    args = arg_parser.parse_args()
+
+    if args.sheet:
+        with open(args.sheet) as f:
+            sheet = json.load(f)
+    else:
+        sheet = make_sheet(args.years, args.per_day, random.Random(args.seed))
+
+    df = filter_finance_frame(sheet, date(1900, 1, 1), date(2100, 1, 1))
+
+    # Unparsable amounts are logged per row by both paths; keep the timings clean
+    logging.disable(logging.ERROR)
+    rows_time, row_records = time_call(lambda: process_finance_rows(df), args.repeat)
+    frame_time, frame_records = time_call(lambda: process_finance_frame(df), args.repeat)
+    logging.disable(logging.NOTSET)
+
+    if row_records != frame_records:
+        mismatch = next((i for i, (a, b) in enumerate(zip(row_records, frame_records)) if a != b),
+                        min(len(row_records), len(frame_records)))
+        raise SystemExit(f"Results differ at record {mismatch} "
+                         f"({len(row_records)} vs {len(frame_records)} records)")
+
+    print(f"{len(sheet) - 1} sheet rows, {len(frame_records)} transactions, best of {args.repeat}")
+    print(f"  row by row: {rows_time * 1000:8.1f} ms")
+    print(f"  columns:    {frame_time * 1000:8.1f} ms ({rows_time / frame_time:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark the per-character hypnogram loop against the NumPy batch version.
+
+    python benchmarks/hypnogram_metrics.py --nights 20000
+"""
+import os
+import sys
+import argparse
+import random
+import time
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, '..'))
+sys.path.append(PROJECT_ROOT)
+
+from datetime import date, datetime, timedelta
+
+from etl.data_sources.oura.sleep_data import calculate_sleep_metrics, calculate_sleep_metrics_batch
+
+def make_session(night: int, rng: random.Random) -> dict:
+    """Build a sleep document with a plausible hypnogram (awake at both ends, short wake-ups in between)."""
+    epochs = rng.randint(60, 120)
+    phases = ['4'] * rng.randint(0, 6)
+    while len(phases) < epochs:
+        phases.extend(rng.choice('1233') * rng.randint(1, 8))
+        if rng.random() < 0.3:
+            phases.extend('4' * rng.randint(1, 4))
+    phases.extend('4' * rng.randint(0, 6))
+    hypnogram = ''.join(phases)
+
+    bedtime_start = datetime(2020, 1, 1, 23, 0) + timedelta(days=night)
+    bedtime_end = bedtime_start + timedelta(minutes=5 * len(hypnogram))
+    return {
+        'day': (date(2020, 1, 2) + timedelta(days=night)).isoformat(),
+        'bedtime_start': bedtime_start.isoformat() + '-07:00',
+        'bedtime_end': bedtime_end.isoformat() + '-07:00',
+        'sleep_phase_5_min': hypnogram
+    }
+
+def time_call(func, repeat: int):
+    """Return (best seconds, result) over `repeat` runs."""
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument('--nights', type=int, default=20000)
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    arg_parser.add_argument('--seed', type=int, default=0)
+    args = arg_parser.parse_args()
+
+    rng = random.Random(args.seed)
+    sessions = [make_session(night, rng) for night in range(args.nights)]
+
+    loop_time, loop_metrics = time_call(lambda: [calculate_sleep_metrics(session) for session in sessions], args.repeat)
+    batch_time, batch_metrics = time_call(lambda: calculate_sleep_metrics_batch(sessions), args.repeat)
+
+    if loop_metrics != batch_metrics:
+        mismatch = next(i for i, (a, b) in enumerate(zip(loop_metrics, batch_metrics)) if a != b)
+        raise SystemExit(f"Results differ for night {mismatch}: {loop_metrics[mismatch]} != {batch_metrics[mismatch]}")
+
+    print(f"{args.nights} nights, best of {args.repeat}")
+    print(f"  loop:  {loop_time * 1000:8.1f} ms")
+    print(f"  batch: {batch_time * 1000:8.1f} ms ({loop_time / batch_time:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark process_oura_data against the columnar normalizer on Oura sleep documents.
+
+    python benchmarks/oura_normalize.py --sessions 20000
+"""
+import os
+import sys
+import argparse
+import random
+import time
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, '..'))
+sys.path.append(PROJECT_ROOT)
+
+from datetime import date, datetime, timedelta
+
+from etl.data_sources.oura.sleep_data import process_oura_data
+from etl.data_sources.oura.normalize import normalize_oura_data
+
+def make_document(day: date, bedtime_start: datetime, epochs: int, offset: str, rng: random.Random) -> dict:
+    """Build a sleep document shaped like an Oura v2 /sleep response item."""
+    hypnogram = ''.join(rng.choice('12334') for _ in range(epochs))
+    bedtime_end = bedtime_start + timedelta(minutes=5 * epochs)
+    total_sleep_duration = sum(phase != '4' for phase in hypnogram) * 300
+    return {
+        'id': f"{day.isoformat()}-{bedtime_start.hour}",
+        'day': day.isoformat(),
+        'bedtime_start': bedtime_start.isoformat(timespec='milliseconds') + offset,
+        'bedtime_end': bedtime_end.isoformat(timespec='milliseconds') + offset,
+        'total_sleep_duration': total_sleep_duration,
+        'time_in_bed': epochs * 300,
+        'awake_time': epochs * 300 - total_sleep_duration,
+        'deep_sleep_duration': hypnogram.count('1') * 300,
+        'light_sleep_duration': hypnogram.count('2') * 300,
+        'rem_sleep_duration': hypnogram.count('3') * 300,
+        'restless_periods': rng.randint(50, 400),
+        'average_heart_rate': round(rng.uniform(45, 70), 3),
+        'average_hrv': rng.randint(20, 90),
+        'latency': rng.choice([None, rng.randint(0, 3000)]),
+        'sleep_phase_5_min': hypnogram
+    }
+
+def make_documents(sessions: int, seed: int) -> list:
+    """One night per day plus occasional naps and split nights, ordered by day like the API."""
+    rng = random.Random(seed)
+    documents = []
+    day = date(2019, 1, 1)
+    while len(documents) < sessions:
+        offset = rng.choice(['-07:00', '-04:00', '+01:00'])
+        night = datetime.combine(day - timedelta(days=1), datetime.min.time()) + timedelta(hours=rng.choice([21, 22, 23, 24, 25]))
+        documents.append(make_document(day, night, rng.randint(70, 110), offset, rng))
+        if rng.random() < 0.2:
+            nap = datetime.combine(day, datetime.min.time()) + timedelta(hours=rng.randint(12, 17))
+            documents.append(make_document(day, nap, rng.randint(4, 20), offset, rng))
+        if rng.random() < 0.05:
+            late = night + timedelta(hours=9)
+            documents.append(make_document(day, late, rng.randint(30, 60), offset, rng))
+        day += timedelta(days=1)
+    return documents[:sessions]
+
+def time_call(func, repeat: int):
+    """Return (best seconds, result) over `repeat` runs."""
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument('--sessions', type=int, default=20000)
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    arg_parser.add_argument('--seed', type=int, default=0)
+    args = arg_parser.parse_args()
+
+    documents = make_documents(args.sessions, args.seed)
+
+    current_time, current = time_call(lambda: process_oura_data(documents, 1), args.repeat)
+    columnar_time, columnar = time_call(lambda: normalize_oura_data(documents, 1), args.repeat)
+
+    if repr(current) != repr(columnar):
+        raise SystemExit("Columnar output differs from process_oura_data")
+
+    print(f"{args.sessions} sessions ({len(current[0])} nights, {len(current[1])} naps), best of {args.repeat}")
+    print(f"  process_oura_data:   {current_time * 1000:8.1f} ms")
+    print(f"  normalize_oura_data: {columnar_time * 1000:8.1f} ms ({current_time / columnar_time:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Benchmark the Rize dashboard aggregation against the original hour-by-hour walk.
+
+    python benchmarks/rize_aggregation.py --days 730
+"""
+import os
+import sys
+import argparse
+import random
+import time as timer
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, '..'))
+sys.path.append(PROJECT_ROOT)
+
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from app.blueprints.rize.aggregation import session_pieces, DAY_OF_WEEK_NAMES
+
+def reference_aggregate(sessions, date_strings, offsets_by_date):
+    """The aggregation loop load_rize_dashboard used before the hourly rollups."""
+    results = {d_str: {h: 0 for h in range(24)} for d_str in date_strings}
+    hour_of_day_totals = {h: 0 for h in range(24)}
+    day_of_week_totals = {day: 0 for day in DAY_OF_WEEK_NAMES}
+
+    for start_utc, end_utc in sessions:
+        for d_str in date_strings:
+            offset_minutes = offsets_by_date[d_str]
+            d = datetime.strptime(d_str, "%Y-%m-%d").date()
+
+            day_start_utc = datetime.combine(d, time.min) - timedelta(minutes=offset_minutes)
+            day_end_utc = datetime.combine(d, time.max) - timedelta(minutes=offset_minutes)
+
+            overlap_start_utc = max(start_utc, day_start_utc)
+            overlap_end_utc = min(end_utc, day_end_utc)
+
+            if overlap_start_utc < overlap_end_utc:
+                current = overlap_start_utc + timedelta(minutes=offset_minutes)
+                overlap_end_local = overlap_end_utc + timedelta(minutes=offset_minutes)
+                while current < overlap_end_local:
+                    hour_bucket = current.hour
+                    end_of_hour = current.replace(minute=59, second=59, microsecond=999999)
+                    hour_end = min(end_of_hour, overlap_end_local)
+                    diff_minutes = (hour_end - current).total_seconds() / 60.0
+                    results[d_str][hour_bucket] += diff_minutes
+                    hour_of_day_totals[hour_bucket] += diff_minutes
+                    current = hour_end + timedelta(microseconds=1)
+
+    for d_str, hours_dict in results.items():
+        d = datetime.strptime(d_str, "%Y-%m-%d").date()
+        day_of_week_totals[DAY_OF_WEEK_NAMES[(d.weekday() + 1) % 7]] += sum(hours_dict.values())
+
+    return results, hour_of_day_totals, day_of_week_totals
+
+def aggregate_sessions(
+    sessions: Sequence[Tuple[datetime, datetime]],
+    date_strings: List[str],
+    offsets_by_date: Dict[str, int]
+) -> Tuple[Dict[str, Dict[int, float]], Dict[int, float], Dict[str, float]]:
+    """
+    Project UTC sessions onto a local day x hour grid in one vectorized pass.
+
+    The dashboard now reads RizeHourlyRollups instead; this keeps the
+    vectorized grid around so session_pieces() can be checked against the walk.
+
+    Pieces from session_pieces() are summed in the same session/day/hour order
+    as the original walk, so the totals are identical.
+
+    Args:
+        sessions: (start_time, end_time) pairs in UTC
+        date_strings: Consecutive local dates (YYYY-MM-DD) to aggregate
+        offsets_by_date: UTC offset in minutes for each date string
+
+    Returns:
+        Tuple of results[date_str][hour], hour_of_day_totals[hour] and
+        day_of_week_totals[day_name], all in minutes
+    """
+    day_count = len(date_strings)
+    _, piece_day, piece_hour, piece_minutes = session_pieces(sessions, date_strings, offsets_by_date)
+
+    cell = piece_day * 24 + piece_hour
+    cell_minutes = np.bincount(cell, weights=piece_minutes, minlength=day_count * 24).tolist()
+    cell_touched = np.bincount(cell, minlength=day_count * 24).tolist()
+    hour_minutes = np.bincount(piece_hour, weights=piece_minutes, minlength=24).tolist()
+    hour_touched = np.bincount(piece_hour, minlength=24).tolist()
+
+    # Untouched cells stay integer zeros, like the dicts the walk starts from
+    results = {
+        d_str: {h: cell_minutes[i * 24 + h] if cell_touched[i * 24 + h] else 0 for h in range(24)}
+        for i, d_str in enumerate(date_strings)
+    }
+    hour_of_day_totals = {h: hour_minutes[h] if hour_touched[h] else 0 for h in range(24)}
+
+    return results, hour_of_day_totals, day_of_week_totals_for(results)
+
+def day_of_week_totals_for(results: Dict[str, Dict[int, float]]) -> Dict[str, float]:
+    """Sum each day's minutes into its day of the week."""
+    day_of_week_totals = {day: 0 for day in DAY_OF_WEEK_NAMES}
+    for d_str, hours_dict in results.items():
+        day_index = (date.fromisoformat(d_str).weekday() + 1) % 7  # Python's Monday=0 -> Sunday=0
+        day_of_week_totals[DAY_OF_WEEK_NAMES[day_index]] += sum(hours_dict.values())
+    return day_of_week_totals
+
+def make_sessions(start: date, days: int, per_day: int, rng: random.Random):
+    """Work sessions in UTC, including ones on exact hour boundaries and ones spanning midnight."""
+    sessions = []
+    for day in range(days):
+        base = datetime.combine(start + timedelta(days=day), time.min)
+        for _ in range(per_day):
+            session_start = base + timedelta(minutes=rng.randint(0, 24 * 60), microseconds=rng.choice([0, 0, rng.randint(0, 999999)]))
+            session_end = session_start + timedelta(minutes=rng.choice([15, 25, 60, 90, 240, 600]), seconds=rng.randint(0, 59))
+            sessions.append((session_start, session_end))
+    return sessions
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument('--days', type=int, default=730)
+    arg_parser.add_argument('--sessions-per-day', type=int, default=8)
+    arg_parser.add_argument('--seed', type=int, default=0)
+    args = arg_parser.parse_args()
+
+    rng = random.Random(args.seed)
+    start = date(2022, 1, 1)
+    date_strings = [(start + timedelta(days=i)).isoformat() for i in range(args.days)]
+    offsets_by_date = {d_str: rng.choice([-420, -420, -480, 60]) for d_str in date_strings}
+    sessions = make_sessions(start - timedelta(days=1), args.days + 2, args.sessions_per_day, rng)
+
+    started = timer.perf_counter()
+    reference = reference_aggregate(sessions, date_strings, offsets_by_date)
+    reference_time = timer.perf_counter() - started
+
+    started = timer.perf_counter()
+    aggregated = aggregate_sessions(sessions, date_strings, offsets_by_date)
+    aggregated_time = timer.perf_counter() - started
+
+    if repr(reference) != repr(aggregated):
+        raise SystemExit("aggregate_sessions output differs from the original loop")
+
+    print(f"{args.days} days, {len(sessions)} sessions")
+    print(f"  hour-by-hour loop: {reference_time * 1000:10.1f} ms")
+    print(f"  aggregate_sessions: {aggregated_time * 1000:9.1f} ms ({reference_time / aggregated_time:.0f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark per-record Rize session processing against the batch transform.
+
+    python benchmarks/rize_session_transform.py --sessions 100000
+"""
+import os
+import sys
+import argparse
+import random
+import time
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, '..'))
+sys.path.append(PROJECT_ROOT)
+
+from datetime import datetime, timedelta, timezone
+
+from etl.bulk_upsert import normalize_value
+from etl.data_sources.rize.rize import process_session_record, process_session_records
+
+SESSION_TYPES = ['focus', 'meeting', 'break']
+OFFSETS = [timezone(timedelta(hours=-7)), timezone(timedelta(hours=-8)), timezone.utc]
+
+def make_sessions(count: int, rng: random.Random) -> list:
+    """Sessions as the Rize API returns them, with mixed offsets and fractional seconds."""
+    sessions = []
+    current = datetime(2022, 1, 1, 14, 0, tzinfo=timezone.utc)
+    for i in range(count):
+        current += timedelta(minutes=rng.randint(1, 60), seconds=rng.randint(0, 59))
+        duration = timedelta(minutes=rng.randint(1, 180), seconds=rng.randint(0, 59), microseconds=rng.choice([0, 500000]))
+        start = current.astimezone(rng.choice(OFFSETS))
+        end = (current + duration).astimezone(rng.choice(OFFSETS))
+        sessions.append({
+            'id': f'session-{i}',
+            'title': rng.choice(['Deep work', 'Standup', None]),
+            'description': rng.choice(['', None, 'Notes']),
+            'type': rng.choice(SESSION_TYPES),
+            'source': rng.choice(['app', 'calendar']),
+            'startTime': start.isoformat(),
+            'endTime': end.isoformat(),
+            'createdAt': start.astimezone(OFFSETS[0]).isoformat()
+        })
+        current += duration
+    return sessions
+
+def loaded_values(records: list) -> list:
+    """The values bulk_upsert would write for each record."""
+    return [{name: normalize_value(value) for name, value in record.items()} for record in records]
+
+def time_call(func, repeat: int):
+    """Return (best seconds, result) over `repeat` runs."""
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument('--sessions', type=int, default=100000)
+    arg_parser.add_argument('--repeat', type=int, default=1)  # the per-record loop takes minutes at 100k
+    arg_parser.add_argument('--seed', type=int, default=0)
+    args = arg_parser.parse_args()
+
+    sessions = make_sessions(args.sessions, random.Random(args.seed))
+
+    loop_time, loop_records = time_call(lambda: [process_session_record(record) for record in sessions], args.repeat)
+    batch_time, batch_records = time_call(lambda: process_session_records(sessions), args.repeat)
+
+    expected, actual = loaded_values(loop_records), loaded_values(batch_records)
+    if expected != actual:
+        mismatch = next(i for i, (a, b) in enumerate(zip(expected, actual)) if a != b)
+        raise SystemExit(f"Results differ for session {mismatch}: {expected[mismatch]} != {actual[mismatch]}")
+
+    print(f"{args.sessions} sessions, best of {args.repeat}")
+    print(f"  per record: {loop_time * 1000:8.1f} ms")
+    print(f"  batch:      {batch_time * 1000:8.1f} ms ({loop_time / batch_time:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -16,4 +16,18 @@ class Config:
         f"{os.getenv('DB_PORT', '3306')}/"
         f"{os.getenv('DB_NAME')}"
     )
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # ETL
+    ETL_MAX_WORKERS = int(os.getenv('ETL_MAX_WORKERS', '4'))
+    OURA_SYNC_WORKERS = int(os.getenv('OURA_SYNC_WORKERS', '4'))
+    ETL_UPSERT_CHUNK_SIZE = int(os.getenv('ETL_UPSERT_CHUNK_SIZE', '1000'))
+    OURA_BATCH_SIZE = int(os.getenv('OURA_BATCH_SIZE', '500'))
+    OURA_BACKFILL_WINDOW_DAYS = int(os.getenv('OURA_BACKFILL_WINDOW_DAYS', '30'))
+    OURA_BACKFILL_WORKERS = int(os.getenv('OURA_BACKFILL_WORKERS', '3'))
+    RIZE_WINDOW_DAYS = int(os.getenv('RIZE_WINDOW_DAYS', '31'))  # longest session range fetched in one query
+    RIZE_FETCH_WORKERS = int(os.getenv('RIZE_FETCH_WORKERS', '4'))
+    RIZE_USER_ID = int(os.getenv('RIZE_USER_ID', '1'))  # user whose timezone timeline buckets Rize sessions into local days
+    TIMEZONE_TIMELINE_TTL = int(os.getenv('TIMEZONE_TIMELINE_TTL', '300'))  # seconds a cached timezone timeline is reused
+    PAYLOAD_STORE_DIR = os.getenv('PAYLOAD_STORE_DIR')  # defaults to data/payloads
+    CREDENTIALS_CACHE_TTL = int(os.getenv('CREDENTIALS_CACHE_TTL', '300'))  # seconds decrypted credentials are reused within a sync run
@@ -133,6 +133,8 @@ class SleepData(db.Model):
     restless_periods = db.Column(db.Integer, nullable=False)
     average_heart_rate = db.Column(db.Float, nullable=True)
     average_hrv = db.Column(db.Float, nullable=True)
+    hypnogram = db.Column(db.LargeBinary, nullable=True)  # sleep_phase_5_min packed 2 bits per epoch, see oura.hypnogram
+    fingerprint = db.Column(db.String(32), nullable=True)  # md5 of the loaded values, see etl.bulk_upsert
     
     # Relationships
     user = db.relationship("Users", back_populates="sleep_data")
@@ -164,6 +166,8 @@ class NapData(db.Model):
     restless_periods = db.Column(db.Integer, nullable=False)
     average_heart_rate = db.Column(db.Float, nullable=True)
     average_hrv = db.Column(db.Float, nullable=True)
+    hypnogram = db.Column(db.LargeBinary, nullable=True)  # sleep_phase_5_min packed 2 bits per epoch, see oura.hypnogram
+    fingerprint = db.Column(db.String(32), nullable=True)  # md5 of the loaded values, see etl.bulk_upsert
     
     # Relationships
     user = db.relationship("Users", back_populates="nap_data")
@@ -173,6 +177,133 @@ class NapData(db.Model):
         db.UniqueConstraint('user_id', 'date', 'bedtime_start', name='uix_user_date_bedtime'),
     )
 
+class OuraDailyReadiness(db.Model):
+    __tablename__ = 'oura_daily_readiness'
+    
+    readiness_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    score = db.Column(db.Integer, nullable=True)
+    temperature_deviation = db.Column(db.Float, nullable=True)
+    temperature_trend_deviation = db.Column(db.Float, nullable=True)
+    activity_balance = db.Column(db.Integer, nullable=True)
+    body_temperature = db.Column(db.Integer, nullable=True)
+    hrv_balance = db.Column(db.Integer, nullable=True)
+    previous_day_activity = db.Column(db.Integer, nullable=True)
+    previous_night = db.Column(db.Integer, nullable=True)
+    recovery_index = db.Column(db.Integer, nullable=True)
+    resting_heart_rate = db.Column(db.Integer, nullable=True)
+    sleep_balance = db.Column(db.Integer, nullable=True)
+    fingerprint = db.Column(db.String(32), nullable=True)  # md5 of the loaded values, see etl.bulk_upsert
+    
+    # Constraints and Indexes
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'date', name='uix_readiness_user_date'),
+    )
+
+class OuraDailyActivity(db.Model):
+    __tablename__ = 'oura_daily_activity'
+    
+    activity_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    score = db.Column(db.Integer, nullable=True)
+    steps = db.Column(db.Integer, nullable=True)
+    active_calories = db.Column(db.Integer, nullable=True)
+    total_calories = db.Column(db.Integer, nullable=True)
+    equivalent_walking_distance = db.Column(db.Integer, nullable=True)
+    high_activity_time = db.Column(db.Integer, nullable=True)
+    medium_activity_time = db.Column(db.Integer, nullable=True)
+    low_activity_time = db.Column(db.Integer, nullable=True)
+    sedentary_time = db.Column(db.Integer, nullable=True)
+    resting_time = db.Column(db.Integer, nullable=True)
+    non_wear_time = db.Column(db.Integer, nullable=True)
+    inactivity_alerts = db.Column(db.Integer, nullable=True)
+    average_met_minutes = db.Column(db.Float, nullable=True)
+    fingerprint = db.Column(db.String(32), nullable=True)  # md5 of the loaded values, see etl.bulk_upsert
+    
+    # Constraints and Indexes
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'date', name='uix_activity_user_date'),
+    )
+
+class OuraDailySpo2(db.Model):
+    __tablename__ = 'oura_daily_spo2'
+    
+    spo2_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    spo2_average = db.Column(db.Float, nullable=True)
+    breathing_disturbance_index = db.Column(db.Integer, nullable=True)
+    fingerprint = db.Column(db.String(32), nullable=True)  # md5 of the loaded values, see etl.bulk_upsert
+    
+    # Constraints and Indexes
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'date', name='uix_spo2_user_date'),
+    )
+
+class OuraWorkouts(db.Model):
+    __tablename__ = 'oura_workouts'
+    
+    workout_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    oura_id = db.Column(db.String(100), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    activity = db.Column(db.String(50), nullable=True)
+    intensity = db.Column(db.String(20), nullable=True)
+    label = db.Column(db.String(255), nullable=True)
+    source = db.Column(db.String(50), nullable=True)
+    calories = db.Column(db.Float, nullable=True)
+    distance = db.Column(db.Float, nullable=True)
+    start_time = db.Column(db.DateTime, nullable=False)
+    end_time = db.Column(db.DateTime, nullable=False)
+    timezone_offset = db.Column(db.SmallInteger, nullable=False)
+    fingerprint = db.Column(db.String(32), nullable=True)  # md5 of the loaded values, see etl.bulk_upsert
+    
+    # Constraints and Indexes
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'oura_id', name='uix_workout_user_oura_id'),
+        Index('idx_oura_workouts_user_date', 'user_id', 'date'),
+    )
+
+class OuraSessions(db.Model):
+    __tablename__ = 'oura_sessions'
+    
+    session_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    oura_id = db.Column(db.String(100), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    type = db.Column(db.String(50), nullable=True)
+    mood = db.Column(db.String(20), nullable=True)
+    start_time = db.Column(db.DateTime, nullable=False)
+    end_time = db.Column(db.DateTime, nullable=False)
+    timezone_offset = db.Column(db.SmallInteger, nullable=False)
+    fingerprint = db.Column(db.String(32), nullable=True)  # md5 of the loaded values, see etl.bulk_upsert
+    
+    # Constraints and Indexes
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'oura_id', name='uix_session_user_oura_id'),
+        Index('idx_oura_sessions_user_date', 'user_id', 'date'),
+    )
+
+class OuraTags(db.Model):
+    __tablename__ = 'oura_tags'
+    
+    tag_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    oura_id = db.Column(db.String(100), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    text = db.Column(db.String(1000), nullable=True)
+    tags = db.Column(db.String(1000), nullable=True)  # Comma-separated
+    timestamp = db.Column(db.DateTime, nullable=True)
+    fingerprint = db.Column(db.String(32), nullable=True)  # md5 of the loaded values, see etl.bulk_upsert
+    
+    # Constraints and Indexes
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'oura_id', name='uix_tag_user_oura_id'),
+        Index('idx_oura_tags_user_date', 'user_id', 'date'),
+    )
+
 class RizeSessions(db.Model):
     __tablename__ = 'rize_sessions'
     
@@ -185,6 +316,7 @@ class RizeSessions(db.Model):
     end_time = db.Column(db.DateTime, nullable=False)
     date = db.Column(db.Date, nullable=False)
     duration_minutes = db.Column(db.Integer, nullable=False)
+    fingerprint = db.Column(db.String(32), nullable=True)  # md5 of the loaded values, see etl.bulk_upsert
     created_at = db.Column(db.DateTime, nullable=False)
     updated_at = db.Column(db.DateTime, server_default=func.now(), onupdate=func.now())
     
@@ -213,6 +345,7 @@ class RizeSummaries(db.Model):
     daily_tracked_time_average = db.Column(db.Integer, nullable=False)
     daily_focus_time_average = db.Column(db.Integer, nullable=False)
     daily_work_hours_average = db.Column(db.Integer, nullable=False)
+    fingerprint = db.Column(db.String(32), nullable=True)  # md5 of the loaded values, see etl.bulk_upsert
     created_at = db.Column(db.DateTime, server_default=func.now())
     updated_at = db.Column(db.DateTime, server_default=func.now(), onupdate=func.now())
     
@@ -223,6 +356,20 @@ class RizeSummaries(db.Model):
         Index('idx_rize_summaries_date_wday', 'date', 'wday'),
     )
 
+class RizeHourlyRollups(db.Model):
+    __tablename__ = 'rize_hourly_rollups'
+    
+    local_date = db.Column(db.Date, primary_key=True)
+    hour = db.Column(db.SmallInteger, primary_key=True)
+    session_type = db.Column(db.String(50), primary_key=True)  # RizeSessions.type, 'unknown' when missing
+    minutes = db.Column(db.Float(precision=53), nullable=False)
+    updated_at = db.Column(db.DateTime, server_default=func.now(), onupdate=func.now())
+    
+    # Indexes
+    __table_args__ = (
+        Index('idx_rize_hourly_rollups_date_hour', 'local_date', 'hour'),
+    )
+
 class Finances(db.Model):
     __tablename__ = 'finances'
     
@@ -258,9 +405,59 @@ class Vitals(db.Model):
     weight = db.Column(db.Float, nullable=True)
     nap_minutes = db.Column(db.Integer, nullable=True)
     drinks = db.Column(db.Integer, nullable=True)
+    fingerprint = db.Column(db.String(32), nullable=True)  # md5 of the loaded values, see etl.bulk_upsert
     created_at = db.Column(db.DateTime, server_default=func.now())
     updated_at = db.Column(db.DateTime, server_default=func.now(), onupdate=func.now())
 
+class BackfillWindows(db.Model):
+    __tablename__ = 'backfill_windows'
+    
+    window_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)
+    source = db.Column(db.String(50), nullable=False)
+    window_start = db.Column(db.Date, nullable=False)
+    window_end = db.Column(db.Date, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    completed_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    # Constraints and Indexes
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'source', 'window_start', name='uix_backfill_window'),
+        Index('idx_backfill_windows_user_source_status', 'user_id', 'source', 'status'),
+    )
+
+class SyncWatermarks(db.Model):
+    __tablename__ = 'sync_watermarks'
+    
+    watermark_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    source = db.Column(db.String(50), nullable=False)
+    user_id = db.Column(db.Integer, nullable=False, default=0)  # 0 for sources that aren't per-user
+    last_synced_at = db.Column(db.DateTime, nullable=True)
+    last_covered_date = db.Column(db.Date, nullable=True)
+    cursor = db.Column(db.Text, nullable=True)
+    updated_at = db.Column(db.DateTime, server_default=func.now(), onupdate=func.now())
+    
+    # Constraints and Indexes
+    __table_args__ = (
+        db.UniqueConstraint('source', 'user_id', name='uix_sync_watermark_source_user'),
+    )
+
+class TimezoneIntervals(db.Model):
+    __tablename__ = 'timezone_intervals'
+    
+    interval_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)
+    start_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date, nullable=False)  # last night in the run; the offset holds until the next interval
+    offset_minutes = db.Column(db.SmallInteger, nullable=False)
+    updated_at = db.Column(db.DateTime, server_default=func.now(), onupdate=func.now())
+    
+    # Constraints and Indexes
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'start_date', name='uix_timezone_interval_user_start'),
+    )
+
 class DailyLogs(db.Model):
     __tablename__ = 'daily_logs'
     
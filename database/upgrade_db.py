@@ -0,0 +1,52 @@
+import os
+import sys
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, '..'))
+sys.path.append(PROJECT_ROOT)
+
+from sqlalchemy import inspect, text
+
+from app import create_app
+from app.extensions import db
+from database.models import SleepData, NapData, RizeSessions, RizeSummaries, Vitals
+
+# Columns added to tables that existing databases already have.
+# db.create_all() only creates missing tables, so these need an ALTER TABLE.
+ADDED_COLUMNS = [
+    (SleepData, 'fingerprint'),
+    (NapData, 'fingerprint'),
+    (RizeSessions, 'fingerprint'),
+    (RizeSummaries, 'fingerprint'),
+    (Vitals, 'fingerprint'),
+    (SleepData, 'hypnogram'),
+    (NapData, 'hypnogram'),
+]
+
+def upgrade_database(app):
+    """Create any missing tables, then add the columns in ADDED_COLUMNS where they are missing."""
+    with app.app_context():
+        db.create_all()
+
+        inspector = inspect(db.engine)
+        preparer = db.engine.dialect.identifier_preparer
+        added = []
+        for model, column_name in ADDED_COLUMNS:
+            table = model.__table__
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            if column_name in existing:
+                continue
+
+            column = table.columns[column_name]
+            column_type = column.type.compile(dialect=db.engine.dialect)
+            db.session.execute(text(
+                f"ALTER TABLE {preparer.quote(table.name)} ADD COLUMN {preparer.quote(column.name)} {column_type} NULL"
+            ))
+            added.append(f"{table.name}.{column.name}")
+
+        db.session.commit()
+        print(f"Database upgraded: added {', '.join(added)}" if added else "Database already up to date.")
+
+if __name__ == "__main__":
+    app = create_app()
+    upgrade_database(app)
@@ -0,0 +1,116 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy import func
+
+from app.extensions import db
+from database.models import BackfillWindows
+from utils.logging_config import setup_logging
+
+logger = setup_logging()
+
+def plan_windows(start_date: date, end_date: date, window_days: int) -> List[Tuple[date, date]]:
+    """
+    Split a date range into consecutive windows of at most window_days days.
+
+    Returns:
+        List[Tuple[date, date]]: Inclusive (window_start, window_end) pairs
+    """
+    windows = []
+    window_start = start_date
+    while window_start <= end_date:
+        window_end = min(window_start + timedelta(days=window_days - 1), end_date)
+        windows.append((window_start, window_end))
+        window_start = window_end + timedelta(days=1)
+    return windows
+
+def create_backfill(user_id: int, source: str, start_date: date, end_date: date, window_days: int) -> int:
+    """
+    Record a backfill plan as pending windows so it can be resumed if interrupted.
+
+    Rows left over from an earlier plan are replaced. These are completed windows
+    whose plan was never removed because the run stopped just before that.
+
+    Returns:
+        int: Number of windows planned
+    """
+    BackfillWindows.query.filter_by(user_id=user_id, source=source).delete(synchronize_session=False)
+
+    windows = plan_windows(start_date, end_date, window_days)
+    for window_start, window_end in windows:
+        db.session.add(BackfillWindows(
+            user_id=user_id,
+            source=source,
+            window_start=window_start,
+            window_end=window_end,
+            status='pending'
+        ))
+    db.session.commit()
+
+    logger.info(f"Planned {len(windows)} {source} backfill windows for user {user_id}: {start_date} to {end_date}")
+    return len(windows)
+
+def has_pending_windows(user_id: int, source: str) -> bool:
+    """Check whether a user has an unfinished backfill for a source."""
+    return db.session.query(
+        BackfillWindows.query.filter_by(user_id=user_id, source=source, status='pending').exists()
+    ).scalar()
+
+def get_backfill_end(user_id: int, source: str) -> Optional[date]:
+    """Get the last date covered by a user's backfill plan, if one exists."""
+    return db.session.query(func.max(BackfillWindows.window_end))\
+        .filter_by(user_id=user_id, source=source)\
+        .scalar()
+
+def run_backfill(app, user_id: int, source: str, load_window: Callable[[date, date], object], max_workers: int = 1) -> bool:
+    """
+    Load every pending window of a user's backfill, several at a time.
+
+    Each window runs in its own app context and commits its data together with
+    its checkpoint, so an interrupted backfill resumes from the windows that did
+    not complete. Once every window is done the plan is removed.
+
+    Args:
+        app: Flask app used to create a context per window
+        user_id: User being backfilled
+        source: Source name the windows were planned for
+        load_window: Called with (window_start, window_end) inside the window's app context.
+            It loads the data without committing and returns a summary for the log.
+        max_workers: Number of windows loaded at once
+
+    Returns:
+        bool: True if every window completed
+    """
+    window_ids = [
+        window.window_id for window in BackfillWindows.query
+            .filter_by(user_id=user_id, source=source, status='pending')
+            .order_by(BackfillWindows.window_start)
+            .all()
+    ]
+
+    def run_window(window_id: int) -> bool:
+        with app.app_context():
+            window = db.session.get(BackfillWindows, window_id)
+            try:
+                summary = load_window(window.window_start, window.window_end)
+                window.status = 'complete'
+                window.completed_at = datetime.utcnow()
+                db.session.commit()
+                logger.info(f"Backfilled {source} for user {user_id}: {window.window_start} to {window.window_end} ({summary})")
+                return True
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Failed to backfill {source} for user {user_id}: {window.window_start} to {window.window_end} - {str(e)}")
+                return False
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='backfill') as executor:
+        results = list(executor.map(run_window, window_ids))
+
+    if all(results):
+        BackfillWindows.query.filter_by(user_id=user_id, source=source).delete(synchronize_session=False)
+        db.session.commit()
+    else:
+        logger.warning(f"{source} backfill for user {user_id} incomplete: {results.count(False)} of {len(results)} windows failed")
+
+    return all(results)
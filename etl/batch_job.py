@@ -1,7 +1,8 @@
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import date, timedelta
-from typing import Optional, Dict, Tuple, Callable
+from typing import Optional, Dict, Tuple, Callable, List
 from dotenv import load_dotenv
 
 # Define paths
@@ -12,11 +13,13 @@ sys.path.append(PROJECT_ROOT)
 load_dotenv()
 
 from app import create_app
-from etl.data_sources.oura.sleep_data import update_oura_sleep_data
-from etl.data_sources.rize.rize import update_rize_data
-from etl.data_sources.google_sheets.finances import update_finance_data
-from etl.data_sources.google_sheets.vitals import update_vitals_data
-from database.models import SleepData, RizeSummaries, RizeSessions, Finances, Vitals
+from etl.data_sources.oura.sleep_data import update_oura_sleep_data, replay_oura_sleep_data
+from etl.data_sources.oura.usercollections import update_oura_collections, replay_oura_collections
+from etl.data_sources.rize.rize import update_rize_data, replay_rize_data
+from etl.data_sources.google_sheets.finances import replay_finance_data
+from etl.data_sources.google_sheets.vitals import replay_vitals_data
+from etl.data_sources.google_sheets.sheets import SheetsBatch
+from database.models import SleepData, OuraDailyActivity, RizeSummaries, Finances, Vitals
 from utils.logging_config import setup_logging
 from utils.blinkstick import StatusManager
 
@@ -29,79 +32,205 @@ class DataSource:
         update_func: Callable,
         model_class: type,
         date_column: str = 'date',
-        custom_dates: Optional[Tuple[date, date]] = None
+        custom_dates: Optional[Tuple[date, date]] = None,
+        depends_on: Optional[List[str]] = None,
+        replay_func: Optional[Callable] = None
     ):
         self.name = name
         self.update_func = update_func
         self.model_class = model_class
         self.date_column = date_column
         self.custom_dates = custom_dates
+        self.depends_on = depends_on or []
+        self.replay_func = replay_func
 
-def main(global_date_range: Optional[Tuple[date, date]] = None) -> bool:
+def validate_dependencies(data_sources: List[DataSource]):
+    """
+    Make sure every dependency names a known source and that there are no cycles.
+    
+    Raises:
+        ValueError: If a dependency is unknown or the dependency graph has a cycle
+    """
+    sources_by_name = {source.name: source for source in data_sources}
+    
+    for source in data_sources:
+        for dependency in source.depends_on:
+            if dependency not in sources_by_name:
+                raise ValueError(f"{source.name} depends on unknown source '{dependency}'")
+    
+    visited = set()
+    in_progress = set()
+    
+    def visit(name):
+        if name in in_progress:
+            raise ValueError(f"Circular dependency detected involving '{name}'")
+        if name in visited:
+            return
+        in_progress.add(name)
+        for dependency in sources_by_name[name].depends_on:
+            visit(dependency)
+        in_progress.remove(name)
+        visited.add(name)
+    
+    for source in data_sources:
+        visit(source.name)
+
+def run_source(app, source: DataSource, global_date_range: Optional[Tuple[date, date]] = None, replay: bool = False):
+    """
+    Run a single data source in its own app context.
+    
+    Each worker thread pushes a fresh app context, so Flask-SQLAlchemy hands it its
+    own scoped session which is removed again when the context is torn down.
+    In replay mode the source's replay_func rebuilds it from stored payloads instead.
+    """
+    if replay and source.replay_func is None:
+        raise ValueError(f"{source.name} does not support replay")
+    
+    with app.app_context():
+        dates_to_use = source.custom_dates or global_date_range or (None, None)
+        start_date, end_date = dates_to_use
+        
+        if start_date and end_date:
+            logger.debug(f"Processing {source.name} with custom date range: {start_date} to {end_date}")
+        else:
+            logger.debug(f"Processing {source.name} using most recent data")
+        
+        if replay:
+            source.replay_func(start_date, end_date)
+        else:
+            source.update_func(start_date, end_date)
+
+def run_sources(
+    app,
+    data_sources: List[DataSource],
+    status_manager: StatusManager,
+    global_date_range: Optional[Tuple[date, date]] = None,
+    max_workers: int = 1,
+    replay: bool = False
+) -> Dict[str, bool]:
+    """
+    Run data sources on a bounded worker pool, respecting their dependencies.
+    
+    A source is submitted as soon as all of its dependencies have succeeded. If a
+    dependency fails, the dependent source is skipped and counted as failed.
+    
+    Args:
+        app: Flask app used to create a context per worker
+        data_sources: Sources to run
+        status_manager: Status indicator to report progress to
+        global_date_range: Optional tuple of (start_date, end_date) to apply to all sources
+        max_workers: Maximum number of sources running at once (1 runs them in order)
+        replay: Rebuild sources from stored payloads instead of calling the providers
+    
+    Returns:
+        Dict[str, bool]: Success flag per source name
+    """
+    validate_dependencies(data_sources)
+    
+    results: Dict[str, bool] = {}
+    pending = list(data_sources)
+    running = {}
+    
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='etl') as executor:
+        while pending or running:
+            for source in list(pending):
+                if any(results.get(dependency) is False for dependency in source.depends_on):
+                    pending.remove(source)
+                    results[source.name] = False
+                    logger.error(f"Skipping {source.name} update: a dependency failed")
+                elif all(results.get(dependency) for dependency in source.depends_on):
+                    pending.remove(source)
+                    status_manager.start_process(source.name)
+                    future = executor.submit(run_source, app, source, global_date_range, replay)
+                    running[future] = source
+            
+            if not running:
+                continue
+            
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                source = running.pop(future)
+                try:
+                    future.result()
+                    results[source.name] = True
+                    status_manager.end_process(success=True, process_name=source.name)
+                except Exception as e:
+                    results[source.name] = False
+                    logger.error(f"Error occurred in {source.name} update: {str(e)}")
+                    status_manager.end_process(success=False, process_name=source.name)
+    
+    return results
+
+def main(
+    global_date_range: Optional[Tuple[date, date]] = None,
+    max_workers: Optional[int] = None,
+    replay: bool = False
+) -> bool:
     """
     Run data updates for all sources.
     
     Args:
         global_date_range: Optional tuple of (start_date, end_date) to apply to all sources
+        max_workers: Optional number of sources to run concurrently.
+            Defaults to ETL_MAX_WORKERS; pass 1 to run sources one after another.
+        replay: Rebuild every table from the raw payload store with no network calls
     
     Returns:
         bool: True if all updates succeeded, False if any failed
     """
     app = create_app()
     status_manager = StatusManager()  # Initialize once
-    success = True
+    
+    if max_workers is None:
+        max_workers = app.config.get('ETL_MAX_WORKERS', 1)
+
+    # Finances and vitals share one batched Google Sheets fetch per run
+    sheets_batch = SheetsBatch()
 
     # Define data sources with their configurations
     data_sources = [
         DataSource(
             name="Oura Sleep",
             update_func=update_oura_sleep_data,
+            replay_func=replay_oura_sleep_data,
             model_class=SleepData,
             date_column='date',
         ),
+        DataSource(
+            name="Oura Collections",
+            update_func=update_oura_collections,
+            replay_func=replay_oura_collections,
+            model_class=OuraDailyActivity,
+            date_column='date',
+        ),
         DataSource(
             name="Rize Summaries and Sessions",
             update_func=update_rize_data,
+            replay_func=replay_rize_data,
             model_class=RizeSummaries,
             date_column='date',
+            depends_on=["Oura Sleep"],  # rollups are bucketed with the timezone timeline Oura Sleep rebuilds
         ),
         DataSource(
             name="Finances",
-            update_func=update_finance_data,
+            update_func=sheets_batch.update_finances,
+            replay_func=replay_finance_data,
             model_class=Finances,
             date_column='transaction_date',
         ),
         DataSource(
             name="Vitals",
-            update_func=update_vitals_data,
+            update_func=sheets_batch.update_vitals,
+            replay_func=replay_vitals_data,
             model_class=Vitals,
             date_column='date',
         )
     ]
 
-    with app.app_context():
-        for source in data_sources:
-            try:
-                status_manager.start_process(source.name)
-                
-                dates_to_use = source.custom_dates or global_date_range or (None, None)
-                start_date, end_date = dates_to_use
-                
-                if start_date and end_date:
-                    logger.debug(f"Processing {source.name} with custom date range: {start_date} to {end_date}")
-                else:
-                    logger.debug(f"Processing {source.name} using most recent data")
-                
-                source.update_func(start_date, end_date)
-                status_manager.end_process(success=True)
-                
-            except Exception as e:
-                success = False
-                logger.error(f"Error occurred in {source.name} update: {str(e)}")
-                status_manager.end_process(success=False)
-                
+    results = run_sources(app, data_sources, status_manager, global_date_range, max_workers, replay)
+    
     status_manager.cleanup()
-    return success
+    return all(results.values())
 
 if __name__ == "__main__":
     try:
@@ -113,7 +242,10 @@ if __name__ == "__main__":
         # start_date = date(2024, 1, 1)
         # end_date = date(2025, 1, 1)
 
-        success = main((start_date, end_date))
+        # Set to True to rebuild the tables from stored raw payloads without any network calls
+        replay = False
+
+        success = main((start_date, end_date), replay=replay)
         
         if success:
             print("All data updates completed successfully.")
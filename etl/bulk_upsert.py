@@ -0,0 +1,211 @@
+import hashlib
+import json
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Dict, List, Optional, Sequence, Tuple, Type
+
+from flask import current_app
+from sqlalchemy import UniqueConstraint, select, tuple_
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.extensions import db
+
+DEFAULT_CHUNK_SIZE = 1000
+FINGERPRINT_COLUMN = 'fingerprint'
+
+@dataclass
+class UpsertResult:
+    """Row counts produced by bulk_upsert()."""
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.inserted + self.updated + self.unchanged
+
+    def __add__(self, other: 'UpsertResult') -> 'UpsertResult':
+        return UpsertResult(
+            inserted=self.inserted + other.inserted,
+            updated=self.updated + other.updated,
+            unchanged=self.unchanged + other.unchanged
+        )
+
+    def __str__(self) -> str:
+        return f"{self.inserted} inserted, {self.updated} updated, {self.unchanged} skipped as unchanged"
+
+def get_natural_key(model_class: Type) -> List[str]:
+    """
+    Get the natural key columns of a model.
+
+    Uses the model's unique constraint (e.g. uix_user_date) if it has one,
+    otherwise falls back to the primary key (e.g. session_id).
+    """
+    table = model_class.__table__
+    unique_constraints = sorted(
+        (c for c in table.constraints if isinstance(c, UniqueConstraint)),
+        key=lambda c: c.name or ''
+    )
+    if unique_constraints:
+        return [column.key for column in unique_constraints[0].columns]
+    return [column.key for column in table.primary_key.columns]
+
+def normalize_value(value):
+    """Convert a value to the plain Python type the database hands back for it."""
+    if hasattr(value, 'to_pydatetime'):
+        value = value.to_pydatetime()
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    if isinstance(value, Decimal):
+        return float(value)
+    if hasattr(value, 'item') and not isinstance(value, (bytes, str)):
+        return value.item()  # numpy scalars
+    return value
+
+def compute_fingerprint(row: Dict, columns: Sequence[str]) -> str:
+    """
+    Compute a stable content fingerprint of a normalized record.
+
+    Args:
+        row: Record with values already passed through normalize_value()
+        columns: Columns covered by the fingerprint
+
+    Returns:
+        str: MD5 hex digest of the record's values in column-name order
+    """
+    values = [[name, row[name]] for name in sorted(columns)]
+    payload = json.dumps(values, separators=(',', ':'), default=str)
+    return hashlib.md5(payload.encode()).hexdigest()
+
+def _get_insert(dialect_name: str):
+    if dialect_name in ('mysql', 'mariadb'):
+        return mysql_insert
+    if dialect_name == 'postgresql':
+        return postgresql_insert
+    if dialect_name == 'sqlite':
+        return sqlite_insert
+    raise NotImplementedError(f"Bulk upsert is not supported for the {dialect_name} dialect")
+
+def _build_upsert(model_class: Type, key_columns: List[str], update_columns: List[str]):
+    """Build the dialect's native INSERT ... ON DUPLICATE KEY / ON CONFLICT statement."""
+    table = model_class.__table__
+    dialect_name = db.session.get_bind().dialect.name
+    stmt = _get_insert(dialect_name)(table)
+
+    incoming = stmt.inserted if dialect_name in ('mysql', 'mariadb') else stmt.excluded
+    update_values = {name: incoming[name] for name in update_columns}
+
+    # Core upserts don't fire onupdate defaults, so apply them explicitly (e.g. updated_at)
+    for column in table.columns:
+        if column.onupdate is not None and column.key not in update_values and column.key not in key_columns:
+            if column.onupdate.is_clause_element:
+                update_values[column.key] = column.onupdate.arg
+            elif column.onupdate.is_callable:
+                update_values[column.key] = column.onupdate.arg(None)
+            else:
+                update_values[column.key] = column.onupdate.arg
+
+    if not update_values:
+        update_values = {key_columns[0]: incoming[key_columns[0]]}
+
+    if dialect_name in ('mysql', 'mariadb'):
+        return stmt.on_duplicate_key_update(update_values)
+    return stmt.on_conflict_do_update(index_elements=key_columns, set_=update_values)
+
+def _fetch_existing(model_class: Type, key_columns: List[str], compare_columns: List[str],
+                    keys: List[Tuple]) -> Dict[Tuple, Tuple]:
+    """Load the compared columns of every existing row in the chunk in a single query."""
+    table = model_class.__table__
+    key_exprs = [table.c[name] for name in key_columns]
+    columns = key_exprs + [table.c[name] for name in compare_columns]
+
+    if len(key_exprs) == 1:
+        condition = key_exprs[0].in_([key[0] for key in keys])
+    else:
+        condition = tuple_(*key_exprs).in_(keys)
+
+    existing = {}
+    for row in db.session.execute(select(*columns).where(condition)):
+        key = tuple(normalize_value(value) for value in row[:len(key_columns)])
+        existing[key] = tuple(normalize_value(value) for value in row[len(key_columns):])
+    return existing
+
+def bulk_upsert(
+    model_class: Type,
+    records: Sequence[Dict],
+    key_columns: Optional[List[str]] = None,
+    update_exclude: Sequence[str] = (),
+    chunk_size: Optional[int] = None
+) -> UpsertResult:
+    """
+    Insert or update records using set-based statements.
+
+    Records are processed in chunks. For each chunk the existing rows are loaded
+    in one query, compared with the incoming values, and only new or changed
+    records are written with the dialect's native upsert. The caller commits.
+
+    Models with a fingerprint column store a hash of each record's values next
+    to the row, so a chunk is compared by loading just its keys and fingerprints.
+    Rows loaded before the column existed have no fingerprint and are rewritten
+    once to fill it in.
+
+    Args:
+        model_class: SQLAlchemy model class to load into
+        records: Dictionaries keyed by column name; all records must share the same keys
+        key_columns: Natural key columns. Defaults to get_natural_key(model_class).
+        update_exclude: Columns that are only set on insert (e.g. created_at)
+        chunk_size: Records per statement. Defaults to ETL_UPSERT_CHUNK_SIZE.
+
+    Returns:
+        UpsertResult: Inserted, updated and unchanged counts
+    """
+    result = UpsertResult()
+    if not records:
+        return result
+
+    key_columns = key_columns or get_natural_key(model_class)
+    if chunk_size is None:
+        chunk_size = current_app.config.get('ETL_UPSERT_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+
+    # Normalize values and de-duplicate on the natural key (the last record wins)
+    rows_by_key = {}
+    for record in records:
+        row = {name: normalize_value(value) for name, value in record.items()}
+        rows_by_key[tuple(row[name] for name in key_columns)] = row
+    rows = list(rows_by_key.values())
+
+    columns = list(rows[0].keys())
+    if FINGERPRINT_COLUMN in model_class.__table__.c and FINGERPRINT_COLUMN not in columns:
+        fingerprinted = [name for name in columns if name not in update_exclude]
+        for row in rows:
+            row[FINGERPRINT_COLUMN] = compute_fingerprint(row, fingerprinted)
+        columns.append(FINGERPRINT_COLUMN)
+        compare_columns = [FINGERPRINT_COLUMN]
+    else:
+        compare_columns = [name for name in columns if name not in key_columns and name not in update_exclude]
+    update_columns = [name for name in columns if name not in key_columns and name not in update_exclude]
+    upsert_stmt = _build_upsert(model_class, key_columns, update_columns)
+
+    for chunk_start in range(0, len(rows), chunk_size):
+        chunk = rows[chunk_start:chunk_start + chunk_size]
+        keys = [tuple(row[name] for name in key_columns) for row in chunk]
+        existing = _fetch_existing(model_class, key_columns, compare_columns, keys)
+
+        to_write = []
+        for key, row in zip(keys, chunk):
+            if key not in existing:
+                result.inserted += 1
+                to_write.append(row)
+            elif existing[key] != tuple(row[name] for name in compare_columns):
+                result.updated += 1
+                to_write.append(row)
+            else:
+                result.unchanged += 1
+
+        if to_write:
+            db.session.execute(upsert_stmt, to_write)
+
+    return result
@@ -1,12 +1,22 @@
 import os
+from threading import Lock, local
+import httplib2
 from google.oauth2.service_account import Credentials
+from google_auth_httplib2 import AuthorizedHttp
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 from dotenv import load_dotenv
+from utils.logging_config import setup_logging
 
 load_dotenv()
 
+logger = setup_logging()
+
 class GoogleSheetsAPI:
-    SCOPES = ['https://www.googleapis.com/auth/spreadsheets.readonly']
+    SCOPES = [
+        'https://www.googleapis.com/auth/spreadsheets.readonly',
+        'https://www.googleapis.com/auth/drive.metadata.readonly'  # modifiedTime/version for change detection
+    ]
     
     def __init__(self, service_account_file=None):
         """
@@ -25,7 +35,23 @@ class GoogleSheetsAPI:
             service_account_file, 
             scopes=self.SCOPES
         )
-        self.service = build('sheets', 'v4', credentials=self.creds)
+        # The discovery documents bundled with google-api-python-client are used,
+        # so building the services makes no network call
+        self.service = build('sheets', 'v4', credentials=self.creds,
+                             static_discovery=True, cache_discovery=False)
+        self._drive_service = None
+        self._local = local()
+
+    def _http(self):
+        """
+        Authorized HTTP connection for the calling thread.
+        
+        httplib2 connections aren't thread-safe, so every thread gets its own
+        while the credentials and services are shared.
+        """
+        if not hasattr(self._local, 'http'):
+            self._local.http = AuthorizedHttp(self.creds, http=httplib2.Http())
+        return self._local.http
 
     def get_sheet_data(self, spreadsheet_id, range_name):
         """
@@ -33,5 +59,53 @@ class GoogleSheetsAPI:
         """
         sheet = self.service.spreadsheets()
         result = sheet.values().get(spreadsheetId=spreadsheet_id,
-                                    range=range_name).execute()
-        return result.get('values', [])
\ No newline at end of file
+                                    range=range_name).execute(http=self._http())
+        return result.get('values', [])
+
+    def get_sheet_ranges(self, spreadsheet_id, ranges):
+        """
+        Retrieve several ranges of a spreadsheet in one request.
+        
+        Returns:
+            list: The rows of each range, in the order requested
+        """
+        sheet = self.service.spreadsheets()
+        result = sheet.values().batchGet(spreadsheetId=spreadsheet_id,
+                                         ranges=ranges).execute(http=self._http())
+        return [value_range.get('values', []) for value_range in result.get('valueRanges', [])]
+
+    def get_file_version(self, spreadsheet_id):
+        """
+        Get the spreadsheet's Drive modification time and revision number.
+        
+        Returns:
+            dict: 'modifiedTime' and 'version', or None if Drive metadata isn't available
+                  (e.g. the Drive API isn't enabled for the service account)
+        """
+        try:
+            if self._drive_service is None:
+                self._drive_service = build('drive', 'v3', credentials=self.creds,
+                                            static_discovery=True, cache_discovery=False)
+            return self._drive_service.files().get(
+                fileId=spreadsheet_id,
+                fields='modifiedTime,version',
+                supportsAllDrives=True
+            ).execute(http=self._http())
+        except HttpError as e:
+            logger.warning(f"Could not read Drive metadata for spreadsheet {spreadsheet_id}: {str(e)}")
+            return None
+
+_clients = {}
+_clients_lock = Lock()
+
+def get_sheets_api(service_account_file=None):
+    """
+    Get the process-wide GoogleSheetsAPI client for a service account file.
+    
+    Credentials are loaded and the services built once per process; the
+    credentials refresh their own token when it expires.
+    """
+    with _clients_lock:
+        if service_account_file not in _clients:
+            _clients[service_account_file] = GoogleSheetsAPI(service_account_file)
+        return _clients[service_account_file]
\ No newline at end of file
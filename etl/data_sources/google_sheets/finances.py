@@ -1,9 +1,10 @@
 import os
 import sys
 from datetime import datetime, date
+import numpy as np
 import pandas as pd
 import hashlib
-from typing import List, Dict
+from typing import List, Dict, Optional
 from dotenv import load_dotenv
 from sqlalchemy import func
 
@@ -20,21 +21,41 @@ load_dotenv()
 from app.extensions import db
 from app import create_app
 from database.models import Finances
-from etl.data_sources.google_sheets.api import GoogleSheetsAPI
-from utils.date_utils import get_date_range
+from etl.data_sources.google_sheets.api import get_sheets_api
+from etl.data_sources.google_sheets.incremental import SheetSource, SheetFetch, fetch_sheets
+from etl.bulk_upsert import bulk_upsert
+from etl.reconcile import delete_missing
+from etl.payload_store import get_payload_store
+from etl.watermarks import get_sync_range, advance_watermark, get_cursor, save_cursor
 from utils.logging_config import setup_logging
 
 logger = setup_logging()
 
 SPREADSHEET_ID = os.getenv('FINANCES_SHEET_ID')
 SHEET_NAME = "Transactions"
-RANGE_NAME = f"'{SHEET_NAME}'!A:N"  # Adjust range based on your columns
+LAST_COLUMN = "N"  # Adjust based on your columns
+FINANCES_SHEET = SheetSource('finances', SPREADSHEET_ID, SHEET_NAME, LAST_COLUMN)
 
 def generate_transaction_hash(record: Dict) -> str:
     """Generate a unique hash for a transaction based on date, description, and amount."""
     hash_string = f"{record['transaction_date']}{record['description']}{record['amount']}"
     return hashlib.md5(hash_string.encode()).hexdigest()
 
+BOOLEAN_TRUE_VALUES = ('1', 'true', 'yes', 't', 'y')
+
+def parse_boolean(value):
+    """Read a sheet flag cell as a boolean."""
+    if value is None:
+        return False
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return bool(value)
+    if isinstance(value, str):
+        value = value.strip().lower()
+        return value in BOOLEAN_TRUE_VALUES
+    return False
+
 def process_finance_record(record: Dict) -> Dict:
     """Process a single finance record from the raw data."""
     # Convert date string to date object
@@ -48,19 +69,6 @@ def process_finance_record(record: Dict) -> Dict:
     account_name = record['Account Name'].strip() if record['Account Name'] is not None else None
     transaction_type = record['Transaction Type'].strip().lower() if record['Transaction Type'] is not None else None
     
-    # Handle boolean flags
-    def parse_boolean(value):
-        if value is None:
-            return False
-        if isinstance(value, bool):
-            return value
-        if isinstance(value, (int, float)):
-            return bool(value)
-        if isinstance(value, str):
-            value = value.strip().lower()
-            return value in ('1', 'true', 'yes', 't', 'y')
-        return False
-    
     processed = {
         'transaction_date': transaction_date,
         'description': record['Description'].strip(),
@@ -81,11 +89,8 @@ def process_finance_record(record: Dict) -> Dict:
     
     return processed
 
-def process_finance_data(raw_data: List[List], start_date, end_date) -> List[Dict]:
-    """Process raw finance data from Google Sheets into structured records."""
-    if not raw_data:
-        return []
-    
+def filter_finance_frame(raw_data: List[List], start_date, end_date) -> pd.DataFrame:
+    """Build a frame of the sheet rows in the date range that have an amount."""
     # Create DataFrame from raw data
     df = pd.DataFrame(raw_data[1:], columns=raw_data[0])
     
@@ -93,93 +98,240 @@ def process_finance_data(raw_data: List[List], start_date, end_date) -> List[Dic
     df['Date'] = pd.to_datetime(df['Date']).dt.date
     df = df[(df['Date'] >= start_date) & (df['Date'] <= end_date)]
     
-    # Then clean the filtered data
+    # Then clean the filtered data. Every row left has a date, so none is blank
     df = df.dropna(how='all').reset_index(drop=True)
-    df = df[df.astype(str).apply(lambda x: x.str.strip().str.len() > 0).any(axis=1)]
     df = df[df['Amount'].str.strip() != '']
     
-    # Process records
+    return df
+
+def process_finance_row(row: pd.Series) -> Optional[Dict]:
+    """Process one frame row, logging it and returning None if it's bad."""
+    try:
+        return process_finance_record(row.to_dict())
+    except Exception as e:
+        logger.error(f"Error processing record {row}: {str(e)}")
+        return None
+
+def process_finance_rows(df: pd.DataFrame) -> List[Dict]:
+    """Process a frame of sheet rows one row at a time, skipping bad rows."""
     processed_records = []
     for _, row in df.iterrows():
-        try:
-            processed_record = process_finance_record(row.to_dict())
+        processed_record = process_finance_row(row)
+        if processed_record is not None:
             processed_records.append(processed_record)
-        except Exception as e:
-            logger.error(f"Error processing record {row}: {str(e)}")
-            continue
     
     return processed_records
 
-def get_existing_hashes(start_date, end_date) -> set:
-    """Get set of transaction hashes for a date range"""
-    result = Finances.query\
-        .filter(Finances.transaction_date.between(start_date, end_date))\
-        .with_entities(Finances.transaction_hash)\
-        .all()
-    return set(row[0] for row in result)
+def is_text(values: pd.Series, optional: bool = True) -> pd.Series:
+    """Mask of the cells that are strings (or None, when optional)."""
+    types = values.map(type)
+    return types.eq(str) | types.eq(type(None)) if optional else types.eq(str)
+
+def text_column(values: pd.Series, lower: bool = False) -> list:
+    """Stripped (and lower-cased) strings, with None kept as None."""
+    stripped = values.str.strip()
+    if lower:
+        stripped = stripped.str.lower()
+    return stripped.where(values.notna(), None).tolist()
+
+def boolean_column(df: pd.DataFrame, column: str) -> list:
+    """parse_boolean over a whole column; a missing column is all False."""
+    if column not in df.columns:
+        return [False] * len(df)
+    values = df[column]
+    text = is_text(values, optional=False)
+    parsed = np.zeros(len(values), dtype=bool)
+    if text.any():
+        parsed[text.to_numpy()] = values[text].str.strip().str.lower().isin(BOOLEAN_TRUE_VALUES).to_numpy(dtype=bool)
+    other = ~is_text(values)
+    if other.any():
+        parsed[other.to_numpy()] = values[other].map(parse_boolean).to_numpy(dtype=bool)
+    return parsed.tolist()
+
+def parse_amount(value) -> Optional[float]:
+    """float(value), or None if it isn't a number."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+FINANCE_COLUMNS = ('Description', 'Amount', 'Category', 'Transaction Type', 'Gift Type',
+                   'Person', 'Notes', 'Account Name')
+
+def process_finance_frame(df: pd.DataFrame) -> List[Dict]:
+    """
+    Process a frame of sheet rows as columns.
+
+    Does what process_finance_record does, but strips, lower-cases and parses
+    whole columns, so no dict or Series is built per row. Rows it can't take
+    (a cell that isn't text, or an amount that isn't a number) go through
+    process_finance_record, which logs and skips them as before. If a column
+    is missing, the whole frame is processed row by row.
+
+    Args:
+        df: Sheet rows as returned by filter_finance_frame
+
+    Returns:
+        List[Dict]: Records ready for bulk_upsert into Finances, in sheet order
+    """
+    if df.empty:
+        return []
+    
+    missing = [column for column in FINANCE_COLUMNS if column not in df.columns]
+    if missing:
+        logger.warning(f"Processing finance rows one by one: missing columns {missing}")
+        return process_finance_rows(df)
+    
+    amounts = [parse_amount(value) for value in df['Amount'].tolist()]
+    valid = pd.Series([amount is not None for amount in amounts], index=df.index)
+    valid &= is_text(df['Description'], optional=False)
+    for column in FINANCE_COLUMNS[2:]:
+        valid &= is_text(df[column])
+    
+    if not valid.all():
+        # Keep sheet order: process the bad rows on their own and merge them back in
+        records_by_position = dict(zip(np.flatnonzero(valid), process_finance_frame(df[valid])))
+        for position, (_, row) in zip(np.flatnonzero(~valid), df[~valid].iterrows()):
+            processed_record = process_finance_row(row)
+            if processed_record is not None:
+                records_by_position[position] = processed_record
+        return [records_by_position[position] for position in sorted(records_by_position)]
+    
+    transaction_dates = df['Date'].tolist()
+    descriptions = text_column(df['Description'])
+    transaction_hashes = [
+        hashlib.md5(f"{transaction_date}{description}{amount}".encode()).hexdigest()
+        for transaction_date, description, amount in zip(transaction_dates, descriptions, amounts)
+    ]
+    
+    columns = zip(
+        transaction_dates,
+        descriptions,
+        amounts,
+        text_column(df['Category']),
+        text_column(df['Transaction Type'], lower=True),
+        text_column(df['Gift Type'], lower=True),
+        text_column(df['Person']),
+        text_column(df['Notes']),
+        text_column(df['Account Name']),
+        boolean_column(df, 'date'),
+        boolean_column(df, 'vacation'),
+        boolean_column(df, 'birthday'),
+        boolean_column(df, 'christmas'),
+        transaction_hashes
+    )
+    keys = ('transaction_date', 'description', 'amount', 'category', 'transaction_type', 'gift_type',
+            'person', 'notes', 'account_name', 'is_date', 'is_vacation', 'is_birthday', 'is_christmas',
+            'transaction_hash')
+    return [dict(zip(keys, values)) for values in columns]
+
+def process_finance_data(raw_data: List[List], start_date, end_date) -> List[Dict]:
+    """Process raw finance data from Google Sheets into structured records."""
+    if not raw_data:
+        return []
+    
+    return process_finance_frame(filter_finance_frame(raw_data, start_date, end_date))
+
+def get_finance_sync_range(start_date=None, end_date=None):
+    """
+    Get the date range to load, from the watermark when none is given.
+    
+    Returns:
+        Tuple[date, date, bool]: Start date, end date, and whether the watermark
+            is in use (and should be advanced after the load)
+    """
+    use_watermark = not (start_date and end_date)
+    if use_watermark:
+        start_date, end_date = get_sync_range('finances', Finances, 'transaction_date')
+    return start_date, end_date, use_watermark
+
+def save_finance_sheet(fetch: SheetFetch, start_date, end_date, use_watermark):
+    """
+    Store the fetched sheet and load its rows for the range.
+
+    The rows, the cursor and the watermark are committed together. The sheet is
+    filled in by hand, so the watermark only moves up to the latest date that was
+    actually loaded: a row typed in days late is still after it on the next run.
+    """
+    if not fetch.rows:
+        logger.warning("No finance data available from Google Sheets.")
+        return
+    
+    if fetch.downloaded:
+        get_payload_store().save('finances', None, start_date, end_date, fetch.rows)
+    
+    try:
+        latest_date = load_finance_data(fetch.rows, start_date, end_date)
+        
+        save_cursor('finances', fetch.cursor)
+        if use_watermark and latest_date is not None:
+            advance_watermark('finances', latest_date)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
 
 def update_finance_data(start_date=None, end_date=None):
     """Update finance data in the database."""
     try:
-        if not (start_date and end_date):
-            start_date, end_date = get_date_range(Finances, 'transaction_date')
+        start_date, end_date, use_watermark = get_finance_sync_range(start_date, end_date)
             
         logger.debug(f"Fetching finance data for period {start_date} to {end_date}")
         
-        api = GoogleSheetsAPI()
-        raw_data = api.get_sheet_data(SPREADSHEET_ID, RANGE_NAME)
-        
-        if not raw_data:
-            logger.warning("No finance data available from Google Sheets.")
-            return
-        
-        # Process the raw data
-        processed_records = process_finance_data(raw_data, start_date, end_date)
-        
-        logger.debug(f"Upserting {len(processed_records)} finance records")
-        
-        # Get existing hashes for this date range
-        existing_hashes = get_existing_hashes(start_date, end_date)
-        processed_hashes = set()
-        
-        # Upsert records
-        try:
-            for record in processed_records:
-                processed_hashes.add(record['transaction_hash'])
-                existing = Finances.query.filter_by(
-                    transaction_hash=record['transaction_hash']
-                ).first()
-                
-                if existing:
-                    for key, value in record.items():
-                        if key not in ['id', 'created_at']:
-                            setattr(existing, key, value)
-                else:
-                    new_transaction = Finances(**record)
-                    db.session.add(new_transaction)
-            
-            # Delete records that no longer exist in the spreadsheet
-            hashes_to_delete = existing_hashes - processed_hashes
-            if hashes_to_delete:
-                logger.info(f"Deleting {len(hashes_to_delete)} removed records")
-                Finances.query\
-                    .filter(
-                        Finances.transaction_hash.in_(hashes_to_delete),
-                        Finances.transaction_date.between(start_date, end_date)
-                    ).delete(synchronize_session=False)
-            
-            db.session.commit()
-            logger.info(f"Finance data upserted: {len(processed_records)} records")
-            
-        except Exception as e:
-            db.session.rollback()
-            logger.error(f"Error managing finance records: {str(e)}")
-            raise
+        # Skips the download when the sheet hasn't changed, otherwise fetches just its tail
+        fetch = fetch_sheets(
+            get_sheets_api(), get_payload_store(), [FINANCES_SHEET], {'finances': get_cursor('finances')}
+        )['finances']
+        save_finance_sheet(fetch, start_date, end_date, use_watermark)
 
     except Exception as e:
         logger.error(f"An error occurred while processing finance data: {str(e)}")
         raise
 
+def load_finance_data(raw_data: List[List], start_date, end_date) -> Optional[date]:
+    """
+    Process raw sheet rows and reconcile them with the database for a date range.
+    The caller commits.
+    
+    Returns:
+        Optional[date]: Latest transaction date loaded, or None if the range had no rows
+    """
+    # Process the raw data
+    processed_records = process_finance_data(raw_data, start_date, end_date)
+    
+    logger.debug(f"Upserting {len(processed_records)} finance records")
+    
+    # Upsert records
+    result = bulk_upsert(Finances, processed_records, update_exclude=('created_at',))
+    
+    # Delete records that no longer exist in the spreadsheet
+    deleted_count = delete_missing(
+        Finances, 'transaction_hash',
+        (record['transaction_hash'] for record in processed_records),
+        Finances.transaction_date.between(start_date, end_date)
+    )
+    if deleted_count:
+        logger.info(f"Deleted {deleted_count} removed records")
+    
+    logger.info(f"Finance data upserted: {len(processed_records)} records ({result})")
+    return max((record['transaction_date'] for record in processed_records), default=None)
+
+def replay_finance_data(start_date=None, end_date=None):
+    """Rebuild finance data from stored sheet snapshots without calling Google Sheets."""
+    store = get_payload_store()
+    refs = store.iter_windows('finances', start_date=start_date, end_date=end_date)
+    
+    for ref in refs:
+        for raw_data in store.load_window(ref):
+            try:
+                load_finance_data(raw_data, date.fromisoformat(ref['start_date']), date.fromisoformat(ref['end_date']))
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+    
+    logger.info(f"Finance data replayed from {len(refs)} stored snapshots")
+
 if __name__ == "__main__":
     app = create_app()
     
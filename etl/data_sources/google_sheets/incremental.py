@@ -0,0 +1,167 @@
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from etl.payload_store import PayloadStore
+from utils.logging_config import setup_logging
+
+logger = setup_logging()
+
+SHEET_BLOCK_ROWS = 500
+
+def block_checksums(rows: List[List], block_rows: int = SHEET_BLOCK_ROWS) -> List[str]:
+    """MD5 of every complete block of rows; the partial last block isn't checksummed."""
+    return [
+        hashlib.md5(json.dumps(rows[start:start + block_rows], separators=(',', ':')).encode()).hexdigest()
+        for start in range(0, len(rows) - block_rows + 1, block_rows)
+    ]
+
+def block_range(sheet_name: str, last_column: str, block: int, block_rows: int = SHEET_BLOCK_ROWS) -> str:
+    """A1 range of a block (block 0 starts with the header row)."""
+    return f"'{sheet_name}'!A{block * block_rows + 1}:{last_column}{(block + 1) * block_rows}"
+
+@dataclass
+class SheetSource:
+    """A sheet loaded by one ETL source."""
+    source: str  # Watermark and payload store name, e.g. 'finances'
+    spreadsheet_id: str
+    sheet_name: str
+    last_column: str  # Last column of the data, e.g. 'N'
+
+    @property
+    def full_range(self) -> str:
+        return f"'{self.sheet_name}'!A:{self.last_column}"
+
+class SheetFetch:
+    """
+    Plan and result of fetching one sheet with as little download as possible.
+
+    If the spreadsheet's Drive modification time and revision are the same as
+    in the cursor, nothing is downloaded and the stored snapshot is used.
+    Otherwise only the partial last block of rows and everything after it is
+    fetched. The last complete block and one older block, rotating through the
+    sheet from run to run, are fetched with it and checked against their stored
+    checksums. Rows inserted or deleted above the tail shift the last complete
+    block, so they are caught on the first run; edits in place are caught when
+    the rotation reaches their block. A mismatch, or no usable snapshot, means
+    the whole sheet is fetched.
+    """
+
+    def __init__(self, sheet: SheetSource, store: PayloadStore, cursor: Optional[str], version: Optional[Dict]):
+        self.sheet = sheet
+        self.store = store
+        self.version = version
+        self.state = json.loads(cursor) if cursor else {}
+        self.cursor = cursor
+        self.rows: Optional[List[List]] = None
+        self.downloaded = False
+        self.checked_blocks: List[int] = []
+        self.next_verify_block = self.state.get('next_verify_block', 0)
+
+        self.snapshot = None
+        if self.state.get('snapshot'):
+            try:
+                self.snapshot = store.get(self.state['snapshot'])
+            except (OSError, ValueError):
+                logger.warning(f"Stored snapshot of '{sheet.sheet_name}' is missing; fetching the whole sheet")
+
+        if self.snapshot is not None and version is not None and \
+                (self.state.get('modified_time'), self.state.get('version')) == \
+                (version.get('modifiedTime'), version.get('version')):
+            logger.debug(f"'{sheet.sheet_name}' unchanged since {version.get('modifiedTime')}; skipping the download")
+            self.rows = self.snapshot
+            self.ranges = []
+        elif self.snapshot is not None and self.state.get('block_checksums') == block_checksums(self.snapshot):
+            self.ranges = self._tail_ranges()
+        else:
+            self.ranges = [sheet.full_range]
+
+    def _tail_ranges(self) -> List[str]:
+        full_blocks = len(self.state['block_checksums'])
+        ranges = [f"'{self.sheet.sheet_name}'!A{full_blocks * SHEET_BLOCK_ROWS + 1}:{self.sheet.last_column}"]
+        if full_blocks:
+            self.checked_blocks = sorted({full_blocks - 1, self.next_verify_block % full_blocks})
+            ranges += [block_range(self.sheet.sheet_name, self.sheet.last_column, block) for block in self.checked_blocks]
+        return ranges
+
+    @property
+    def is_tail(self) -> bool:
+        return bool(self.ranges) and self.ranges[0] != self.sheet.full_range
+
+    def finish(self, values: List[List[List]]) -> bool:
+        """
+        Take the fetched values of self.ranges.
+
+        Returns:
+            bool: True when the sheet is complete, False when a checked block changed
+                and self.ranges now asks for the whole sheet
+        """
+        if self.is_tail:
+            checksums = self.state['block_checksums']
+            for block, rows in zip(self.checked_blocks, values[1:]):
+                if block_checksums(rows) != [checksums[block]]:
+                    logger.info(f"Rows {block * SHEET_BLOCK_ROWS + 1}-{(block + 1) * SHEET_BLOCK_ROWS} of "
+                                f"'{self.sheet.sheet_name}' changed; fetching the whole sheet")
+                    self.ranges = [self.sheet.full_range]
+                    return False
+            self.rows = self.snapshot[:len(checksums) * SHEET_BLOCK_ROWS] + values[0]
+            self.next_verify_block += 1
+        else:
+            self.rows = values[0]
+            self.next_verify_block = 0
+
+        self.downloaded = True
+        self.ranges = []
+        if not self.rows:
+            self.cursor = None
+            return True
+
+        self.cursor = json.dumps({
+            'modified_time': self.version.get('modifiedTime') if self.version else None,
+            'version': self.version.get('version') if self.version else None,
+            'snapshot': self.store.put(self.rows),
+            'row_count': len(self.rows),
+            'block_checksums': block_checksums(self.rows),
+            'next_verify_block': self.next_verify_block
+        })
+        return True
+
+def fetch_sheets(api, store: PayloadStore, sheets: List[SheetSource],
+                 cursors: Dict[str, Optional[str]]) -> Dict[str, SheetFetch]:
+    """
+    Fetch several sheets with one values.batchGet per spreadsheet.
+
+    Drive metadata is read once per spreadsheet. The ranges every changed sheet
+    needs go out together; only a sheet whose checked block changed costs a
+    second request for its full range.
+
+    Args:
+        api: GoogleSheetsAPI client
+        store: Payload store holding the sheet snapshots
+        sheets: Sheets to fetch
+        cursors: JSON cursor from the previous run per source (see watermarks.get_cursor)
+
+    Returns:
+        Dict[str, SheetFetch]: Finished fetch per source, with rows, cursor and downloaded set
+    """
+    spreadsheet_ids = list(dict.fromkeys(sheet.spreadsheet_id for sheet in sheets))
+    versions = {spreadsheet_id: api.get_file_version(spreadsheet_id) for spreadsheet_id in spreadsheet_ids}
+    fetches = {
+        sheet.source: SheetFetch(sheet, store, cursors.get(sheet.source), versions[sheet.spreadsheet_id])
+        for sheet in sheets
+    }
+
+    pending = [fetch for fetch in fetches.values() if fetch.ranges]
+    while pending:
+        for spreadsheet_id in spreadsheet_ids:
+            batch = [fetch for fetch in pending if fetch.sheet.spreadsheet_id == spreadsheet_id]
+            if not batch:
+                continue
+            values = api.get_sheet_ranges(spreadsheet_id, [r for fetch in batch for r in fetch.ranges])
+            for fetch in batch:
+                fetch_values, values = values[:len(fetch.ranges)], values[len(fetch.ranges):]
+                fetch.finish(fetch_values)
+        pending = [fetch for fetch in pending if fetch.ranges]
+
+    return fetches
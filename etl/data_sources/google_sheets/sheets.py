@@ -0,0 +1,111 @@
+import os
+import sys
+from datetime import date
+from threading import Lock
+from typing import Dict, Optional
+from dotenv import load_dotenv
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, '../../..'))
+sys.path.append(PROJECT_ROOT)
+
+# Load environment variables
+load_dotenv()
+
+from app import create_app
+from etl.data_sources.google_sheets.api import get_sheets_api
+from etl.data_sources.google_sheets.incremental import SheetFetch, fetch_sheets
+from etl.data_sources.google_sheets.finances import (
+    FINANCES_SHEET, get_finance_sync_range, save_finance_sheet
+)
+from etl.data_sources.google_sheets.vitals import (
+    VITALS_SHEET, get_vitals_sync_range, save_vitals_sheet
+)
+from etl.payload_store import get_payload_store
+from etl.watermarks import get_cursor
+from utils.logging_config import setup_logging
+
+logger = setup_logging()
+
+class SheetsBatch:
+    """
+    Finance and vitals updates for one ETL run, sharing a single fetch.
+
+    The first update to run fetches both sheets with fetch_sheets(), so when
+    they share a spreadsheet the run costs a single values.batchGet; the other
+    update reuses the result. Each sheet is still loaded, committed and
+    reported on its own. A failed fetch isn't kept, so the other update tries
+    again. Create a new batch for every run.
+    """
+
+    def __init__(self):
+        self.sheets = [FINANCES_SHEET, VITALS_SHEET]
+        self._lock = Lock()
+        self._fetches: Optional[Dict[str, SheetFetch]] = None
+
+    def fetch(self, source: str) -> SheetFetch:
+        """Get the finished fetch of a sheet, fetching every sheet on first use."""
+        with self._lock:
+            if self._fetches is None:
+                self._fetches = fetch_sheets(
+                    get_sheets_api(), get_payload_store(), self.sheets,
+                    {sheet.source: get_cursor(sheet.source) for sheet in self.sheets}
+                )
+            return self._fetches[source]
+
+    def update_finances(self, start_date=None, end_date=None):
+        """Update finance data in the database from the shared fetch."""
+        try:
+            start_date, end_date, use_watermark = get_finance_sync_range(start_date, end_date)
+            logger.debug(f"Fetching finance data for period {start_date} to {end_date}")
+            save_finance_sheet(self.fetch(FINANCES_SHEET.source), start_date, end_date, use_watermark)
+        except Exception as e:
+            logger.error(f"An error occurred while processing finance data: {str(e)}")
+            raise
+
+    def update_vitals(self, start_date=None, end_date=None):
+        """Update vitals data in the database from the shared fetch."""
+        try:
+            start_date, end_date, use_watermark = get_vitals_sync_range(start_date, end_date)
+            logger.debug(f"Fetching vitals data for period {start_date} to {end_date}")
+            save_vitals_sheet(self.fetch(VITALS_SHEET.source), start_date, end_date, use_watermark)
+        except Exception as e:
+            logger.error(f"An error occurred while processing vitals data: {str(e)}")
+            raise
+
+def update_sheets_data(start_date=None, end_date=None):
+    """
+    Update finance and vitals data from Google Sheets together.
+
+    A failure in one sheet doesn't stop the other; the first error is raised
+    once both have run.
+    """
+    batch = SheetsBatch()
+    errors = []
+    for update in (batch.update_finances, batch.update_vitals):
+        try:
+            update(start_date, end_date)
+        except Exception as e:
+            errors.append(e)
+
+    if errors:
+        raise errors[0]
+
+if __name__ == "__main__":
+    app = create_app()
+
+    with app.app_context():
+        # Option 1: Use most recent data
+        start_date = None
+        end_date = None
+
+        # Option 2: Use specific date range
+        # start_date = date(2025, 1, 1)
+        # end_date = date(2025, 12, 31)
+
+        try:
+            update_sheets_data(start_date, end_date)
+            print("Google Sheets data update completed successfully.")
+        except Exception as e:
+            print(f"Failed to update Google Sheets data: {e}")
+            sys.exit(1)
@@ -2,7 +2,7 @@ import os
 import sys
 from datetime import datetime, date
 import pandas as pd
-from typing import List, Dict
+from typing import List, Dict, Optional
 from dotenv import load_dotenv
 from sqlalchemy import func
 
@@ -16,18 +16,19 @@ load_dotenv()
 from app.extensions import db
 from app import create_app
 from database.models import Vitals
-from etl.data_sources.google_sheets.api import GoogleSheetsAPI
-from utils.date_utils import get_date_range
+from etl.data_sources.google_sheets.api import get_sheets_api
+from etl.data_sources.google_sheets.incremental import SheetSource, SheetFetch, fetch_sheets
+from etl.bulk_upsert import bulk_upsert
+from etl.payload_store import get_payload_store
+from etl.watermarks import get_sync_range, advance_watermark, get_cursor, save_cursor
 from utils.logging_config import setup_logging
 
 logger = setup_logging()
 
 SPREADSHEET_ID = os.getenv('VITALS_SHEET_ID')
 SHEET_NAME = "Vitals"
-RANGE_NAME = f"'{SHEET_NAME}'!A:J"  # Adjust range based on your columns
-
-# Add this import at the top with other imports
-from utils.date_utils import get_date_range
+LAST_COLUMN = "J"  # Adjust based on your columns
+VITALS_SHEET = SheetSource('vitals', SPREADSHEET_ID, SHEET_NAME, LAST_COLUMN)
 
 def process_vitals_record(record: Dict) -> Dict:
     """
@@ -102,49 +103,96 @@ def process_vitals_data(raw_data: List[List], start_date, end_date) -> List[Dict
     
     return processed_records
 
+def get_vitals_sync_range(start_date=None, end_date=None):
+    """
+    Get the date range to load, from the watermark when none is given.
+    
+    Returns:
+        Tuple[date, date, bool]: Start date, end date, and whether the watermark
+            is in use (and should be advanced after the load)
+    """
+    use_watermark = not (start_date and end_date)
+    if use_watermark:
+        start_date, end_date = get_sync_range('vitals', Vitals, 'date')
+    return start_date, end_date, use_watermark
+
+def save_vitals_sheet(fetch: SheetFetch, start_date, end_date, use_watermark):
+    """
+    Store the fetched sheet and load its rows for the range.
+
+    The rows, the cursor and the watermark are committed together. The sheet is
+    filled in by hand, so the watermark only moves up to the latest date that was
+    actually loaded: a row typed in days late is still after it on the next run.
+    """
+    if not fetch.rows:
+        logger.warning("No vitals data available from Google Sheets.")
+        return
+    
+    if fetch.downloaded:
+        get_payload_store().save('vitals', None, start_date, end_date, fetch.rows)
+    
+    try:
+        latest_date = load_vitals_data(fetch.rows, start_date, end_date)
+        
+        save_cursor('vitals', fetch.cursor)
+        if use_watermark and latest_date is not None:
+            advance_watermark('vitals', latest_date)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
 def update_vitals_data(start_date=None, end_date=None):
     """Update vitals data in the database."""
     try:
-        if not (start_date and end_date):
-            start_date, end_date = get_date_range(Vitals, 'date')
+        start_date, end_date, use_watermark = get_vitals_sync_range(start_date, end_date)
             
         logger.debug(f"Fetching vitals data for period {start_date} to {end_date}")
         
-        api = GoogleSheetsAPI()
-        raw_data = api.get_sheet_data(SPREADSHEET_ID, RANGE_NAME)
-        
-        if not raw_data:
-            logger.warning("No vitals data available from Google Sheets.")
-            return
-        
-        # Process the raw data
-        processed_records = process_vitals_data(raw_data, start_date, end_date)
-        
-        logger.debug(f"Upserting {len(processed_records)} vitals records")
-        
-        # Upsert records
-        try:
-            for record in processed_records:
-                existing = Vitals.query.filter_by(date=record['date']).first()
-                if existing:
-                    for key, value in record.items():
-                        setattr(existing, key, value)
-                else:
-                    new_record = Vitals(**record)
-                    db.session.add(new_record)
-            
-            db.session.commit()
-            logger.info(f"Vitals data upserted: {len(processed_records)} records")
-            
-        except Exception as e:
-            db.session.rollback()
-            logger.error(f"Error upserting vitals records: {str(e)}")
-            raise
+        # Skips the download when the sheet hasn't changed, otherwise fetches just its tail
+        fetch = fetch_sheets(
+            get_sheets_api(), get_payload_store(), [VITALS_SHEET], {'vitals': get_cursor('vitals')}
+        )['vitals']
+        save_vitals_sheet(fetch, start_date, end_date, use_watermark)
 
     except Exception as e:
         logger.error(f"An error occurred while processing vitals data: {str(e)}")
         raise
 
+def load_vitals_data(raw_data: List[List], start_date, end_date) -> Optional[date]:
+    """
+    Process raw sheet rows and upsert them for a date range. The caller commits.
+    
+    Returns:
+        Optional[date]: Latest date loaded, or None if the range had no rows
+    """
+    # Process the raw data
+    processed_records = process_vitals_data(raw_data, start_date, end_date)
+    
+    logger.debug(f"Upserting {len(processed_records)} vitals records")
+    
+    # Upsert records
+    result = bulk_upsert(Vitals, processed_records)
+    
+    logger.info(f"Vitals data upserted: {len(processed_records)} records ({result})")
+    return max((record['date'] for record in processed_records), default=None)
+
+def replay_vitals_data(start_date=None, end_date=None):
+    """Rebuild vitals data from stored sheet snapshots without calling Google Sheets."""
+    store = get_payload_store()
+    refs = store.iter_windows('vitals', start_date=start_date, end_date=end_date)
+    
+    for ref in refs:
+        for raw_data in store.load_window(ref):
+            try:
+                load_vitals_data(raw_data, date.fromisoformat(ref['start_date']), date.fromisoformat(ref['end_date']))
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+    
+    logger.info(f"Vitals data replayed from {len(refs)} stored snapshots")
+
 if __name__ == "__main__":
    app = create_app()
    
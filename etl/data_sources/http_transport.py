@@ -0,0 +1,171 @@
+import random
+import time
+from threading import Lock
+from typing import Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.logging_config import setup_logging
+
+logger = setup_logging()
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised instead of calling a provider whose circuit breaker is open."""
+    pass
+
+class CircuitBreaker:
+    """
+    Per-provider circuit breaker.
+
+    After `failure_threshold` consecutive failures the circuit opens and every call
+    fails fast for `reset_timeout` seconds. After that a single trial call is let
+    through; its outcome closes the circuit again or re-opens it.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 60):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+        self._lock = Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def before_request(self):
+        """Raise CircuitOpenError if calls to the provider should fail fast."""
+        with self._lock:
+            if self.opened_at is None:
+                return
+            if time.monotonic() - self.opened_at < self.reset_timeout or self.trial_in_flight:
+                raise CircuitOpenError(f"Circuit open for {self.name}; failing fast")
+            self.trial_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info(f"Circuit closed for {self.name}")
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.trial_in_flight or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logger.warning(f"Circuit opened for {self.name} after {self.failures} consecutive failures")
+                self.opened_at = time.monotonic()
+                self.trial_in_flight = False
+
+class HttpTransport:
+    """
+    Pooled HTTP transport shared by the provider API clients.
+
+    Keeps connections alive through a requests.Session, applies connect/read
+    timeouts to every call, retries 429/5xx responses and connection errors with
+    jittered exponential backoff, and consults the provider's circuit breaker.
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        timeout: Tuple[float, float] = (5, 30),
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        max_backoff: float = 30,
+        pool_maxsize: int = 10,
+        circuit_breaker: Optional[CircuitBreaker] = None
+    ):
+        self.provider = provider
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.circuit_breaker = circuit_breaker or CircuitBreaker(provider)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def _backoff(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        """Seconds to wait before the next attempt (full jitter, honoring Retry-After)."""
+        if response is not None:
+            retry_after = response.headers.get('Retry-After')
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff_factor * (2 ** attempt)))
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a request, retrying transient failures.
+
+        Returns the final response; callers still call raise_for_status() on it.
+
+        Raises:
+            CircuitOpenError: If the provider's circuit breaker is open
+            requests.exceptions.RequestException: If the request keeps failing at the connection level
+        """
+        kwargs.setdefault('timeout', self.timeout)
+
+        for attempt in range(self.max_retries + 1):
+            self.circuit_breaker.before_request()
+            is_last_attempt = attempt == self.max_retries
+
+            response, error = None, None
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                error = e
+            finally:
+                # Every attempt settles the breaker, so a half-open trial is never left in flight.
+                # Rate limiting means the provider is up, so only 5xx and errors count against it
+                if response is not None and response.status_code < 500:
+                    self.circuit_breaker.record_success()
+                else:
+                    self.circuit_breaker.record_failure()
+
+            if error is not None:
+                if is_last_attempt:
+                    raise error
+                delay = self._backoff(attempt)
+                logger.warning(f"{self.provider} request failed ({str(error)}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+
+            if response.status_code not in RETRY_STATUS_CODES or is_last_attempt:
+                return response
+
+            delay = self._backoff(attempt, response)
+            logger.warning(f"{self.provider} returned {response.status_code}; retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+_transports: Dict[str, HttpTransport] = {}
+_transports_lock = Lock()
+
+def get_transport(provider: str, **kwargs) -> HttpTransport:
+    """
+    Get the process-wide transport for a provider, creating it on first use.
+
+    Every client for the same provider shares one connection pool and one
+    circuit breaker. Keyword arguments only apply when the transport is created.
+    """
+    with _transports_lock:
+        if provider not in _transports:
+            _transports[provider] = HttpTransport(provider, **kwargs)
+        return _transports[provider]
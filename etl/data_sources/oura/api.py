@@ -1,18 +1,21 @@
-import requests
 from datetime import date, timedelta
+from etl.data_sources.http_transport import get_transport
 
 class OuraAPI:
     BASE_URL = "https://api.ouraring.com/v2/usercollection"
 
-    def __init__(self, access_token=None):
+    def __init__(self, access_token=None, transport=None):
         """
         Initialize the Oura API client.
         
         Args:
             access_token (str, optional): Oura API access token.
                 If not provided, it can be set later using set_access_token().
+            transport (HttpTransport, optional): HTTP transport to use.
+                Defaults to the process-wide pooled transport for Oura.
         """
         self.access_token = access_token
+        self.transport = transport or get_transport('oura')
         self.headers = {"Authorization": f"Bearer {access_token}"} if access_token else {}
 
     def set_access_token(self, access_token):
@@ -20,7 +23,12 @@ class OuraAPI:
         self.access_token = access_token
         self.headers = {"Authorization": f"Bearer {access_token}"}
 
-    def get_data(self, endpoint, start_date, end_date=None, **kwargs):
+    def iter_pages(self, endpoint, start_date, end_date=None, **kwargs):
+        """
+        Yield response pages one at a time, following Oura's next_token.
+        
+        Only one page is held in memory at a time.
+        """
         if not self.access_token:
             raise ValueError("Access token not set. Please set it using set_access_token()")
             
@@ -31,13 +39,42 @@ class OuraAPI:
         params.update(kwargs)
 
         url = f"{self.BASE_URL}/{endpoint}"
-        response = requests.get(url, headers=self.headers, params=params)
-        response.raise_for_status()  # Raises an HTTPError for bad responses
-        return response.json()
+        while True:
+            response = self.transport.get(url, headers=self.headers, params=params)
+            response.raise_for_status()  # Raises an HTTPError for bad responses
+            page = response.json()
+            yield page
+            
+            next_token = page.get('next_token') if isinstance(page, dict) else None
+            if not next_token:
+                break
+            params['next_token'] = next_token
+
+    def iter_data(self, endpoint, start_date, end_date=None, **kwargs):
+        """Yield the documents of a collection endpoint across all pages."""
+        for page in self.iter_pages(endpoint, start_date, end_date, **kwargs):
+            yield from page.get('data', [])
+
+    def get_data(self, endpoint, start_date, end_date=None, **kwargs):
+        """
+        Fetch every page of an endpoint and return them as a single response.
+        
+        Prefer iter_data() for large ranges; this keeps the whole payload in memory.
+        """
+        pages = list(self.iter_pages(endpoint, start_date, end_date, **kwargs))
+        if len(pages) == 1:
+            return pages[0]
+        
+        merged = dict(pages[-1])
+        merged['data'] = [document for page in pages for document in page.get('data', [])]
+        return merged
 
     def get_sleep_data(self, start_date, end_date=None, **kwargs):
         return self.get_data("sleep", start_date, end_date, **kwargs)
 
+    def iter_sleep_data(self, start_date, end_date=None, **kwargs):
+        return self.iter_data("sleep", start_date, end_date, **kwargs)
+
     def get_daily_activity(self, start_date, end_date=None, **kwargs):
         return self.get_data("daily_activity", start_date, end_date, **kwargs)
 
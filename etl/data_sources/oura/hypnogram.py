@@ -0,0 +1,211 @@
+from datetime import date
+from typing import Dict, List, Optional, Sequence, Tuple, Type
+
+import numpy as np
+
+from app.extensions import db
+
+EPOCH_MINUTES = 5
+AWAKE = ord('4')  # sleep_phase_5_min: 1 = deep, 2 = light, 3 = REM, 4 = awake
+
+def awake_runs(hypnograms: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Measure the awake runs of many sleep_phase_5_min hypnograms at once.
+
+    All hypnograms are joined into one byte buffer, so the work is a handful of
+    array operations regardless of how many nights are passed in.
+
+    Args:
+        hypnograms: sleep_phase_5_min strings, one per session (None is treated as empty)
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: Per session, the number of leading
+            awake epochs, the number of trailing awake epochs, and the minutes spent
+            in mid-sleep awake streaks longer than one epoch
+    """
+    hypnograms = [hypnogram or '' for hypnogram in hypnograms]
+    count = len(hypnograms)
+    leading = np.zeros(count, dtype=np.int64)
+    trailing = np.zeros(count, dtype=np.int64)
+    if not count:
+        return leading, trailing, np.zeros(0, dtype=np.int64)
+
+    # A separator between nights keeps an awake run from spanning two sessions
+    lengths = np.fromiter((len(hypnogram) for hypnogram in hypnograms), dtype=np.int64, count=count)
+    starts = np.concatenate(([0], np.cumsum(lengths[:-1] + 1)))
+    ends = starts + lengths
+    phases = np.frombuffer('|'.join(hypnograms).encode('ascii'), dtype=np.uint8)
+
+    # Boundaries of every awake run in the buffer
+    awake = np.concatenate(([0], (phases == AWAKE).astype(np.int8), [0]))
+    edges = np.flatnonzero(np.diff(awake))
+    run_starts, run_ends = edges[::2], edges[1::2]
+    run_lengths = run_ends - run_starts
+    session = np.searchsorted(starts, run_starts, side='right') - 1
+
+    # Runs touching either end of a session are the time before falling asleep and after waking
+    at_start = run_starts == starts[session]
+    at_end = run_ends == ends[session]
+    leading[session[at_start]] = run_lengths[at_start]
+    trailing[session[at_end]] = run_lengths[at_end]
+
+    interior = ~at_start & ~at_end & (run_lengths > 1)
+    midsleep_awake_time = np.bincount(
+        session[interior],
+        weights=run_lengths[interior] * EPOCH_MINUTES,
+        minlength=count
+    ).astype(np.int64)
+
+    return leading, trailing, midsleep_awake_time
+
+# Packed storage: a little-endian uint16 epoch count followed by 2 bits per epoch,
+# four epochs per byte with the first epoch in the high bits. Phase p is stored as p - 1.
+HEADER = np.dtype('<u2')
+HEADER_BYTES = HEADER.itemsize
+STAGES = ('deep', 'light', 'rem', 'awake')
+_SHIFTS = np.array([6, 4, 2, 0], dtype=np.uint8)
+
+def pack_hypnogram(hypnogram: Optional[str]) -> Optional[bytes]:
+    """
+    Pack a sleep_phase_5_min string into 2 bits per epoch.
+
+    Returns:
+        Optional[bytes]: Packed hypnogram, or None if there is none
+    """
+    if hypnogram is None:
+        return None
+
+    codes = np.frombuffer(hypnogram.encode('ascii'), dtype=np.uint8) - ord('1')
+    if codes.size and codes.max() > 3:
+        raise ValueError(f"Unexpected sleep phase in hypnogram: {hypnogram!r}")
+
+    padded = np.zeros(-(-codes.size // 4) * 4, dtype=np.uint8)
+    padded[:codes.size] = codes
+    packed = (padded.reshape(-1, 4) << _SHIFTS).sum(axis=1, dtype=np.uint8)
+    return np.array([codes.size], dtype=HEADER).tobytes() + packed.tobytes()
+
+def pack_hypnograms(hypnograms: Sequence[Optional[str]]) -> List[Optional[bytes]]:
+    """
+    Pack many sleep_phase_5_min strings at once; same output as pack_hypnogram for each.
+    """
+    present = [hypnogram for hypnogram in hypnograms if hypnogram is not None]
+    codes = np.frombuffer(''.join(present).encode('ascii'), dtype=np.uint8) - ord('1')
+    if codes.size and codes.max() > 3:
+        raise ValueError("Unexpected sleep phase in hypnogram")
+
+    # Pad every night to a whole number of bytes, then pack four epochs per byte
+    lengths = np.fromiter((len(hypnogram) for hypnogram in present), dtype=np.int64, count=len(present))
+    padded_lengths = -(-lengths // 4) * 4
+    starts = np.concatenate(([0], np.cumsum(lengths)))[:-1]
+    padded_starts = np.concatenate(([0], np.cumsum(padded_lengths)))[:-1]
+    padded = np.zeros(int(padded_lengths.sum()), dtype=np.uint8)
+    padded[np.arange(codes.size) + np.repeat(padded_starts - starts, lengths)] = codes
+    packed = (padded.reshape(-1, 4) << _SHIFTS).sum(axis=1, dtype=np.uint8).tobytes()
+
+    blobs = iter([
+        np.array([length], dtype=HEADER).tobytes() + packed[start // 4:(start + padded_length) // 4]
+        for length, start, padded_length in zip(lengths.tolist(), padded_starts.tolist(), padded_lengths.tolist())
+    ])
+    return [next(blobs) if hypnogram is not None else None for hypnogram in hypnograms]
+
+class Hypnograms:
+    """
+    Many decoded hypnograms in one flat array.
+
+    `phases` holds every epoch of every night back to back as codes 0-3
+    (deep, light, REM, awake) and night i is phases[offsets[i]:offsets[i + 1]].
+    Indexing returns a view, so nothing is copied per night.
+    """
+
+    def __init__(self, phases: np.ndarray, offsets: np.ndarray):
+        self.phases = phases
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> np.ndarray:
+        return self.phases[self.offsets[index]:self.offsets[index + 1]]
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    @property
+    def night_index(self) -> np.ndarray:
+        """Night number of every epoch in `phases`, for grouping with np.bincount."""
+        return np.repeat(np.arange(len(self)), self.lengths)
+
+    def to_strings(self) -> List[str]:
+        """Rebuild the original sleep_phase_5_min strings."""
+        text = (self.phases + ord('1')).tobytes().decode('ascii')
+        return [text[start:end] for start, end in zip(self.offsets[:-1].tolist(), self.offsets[1:].tolist())]
+
+def unpack_hypnograms(blobs: Sequence[Optional[bytes]]) -> Hypnograms:
+    """
+    Decode many packed hypnograms at once.
+
+    This is not zero-copy. The blobs are joined into one buffer, and their
+    2-bit codes are unpacked into a new array with array operations. Decoding
+    years of nights takes one pass, and only indexing the result per night
+    returns views. Missing hypnograms decode as empty nights.
+    """
+    blobs = [blob or b'' for blob in blobs]
+    buffer = np.frombuffer(b''.join(blobs), dtype=np.uint8)
+    sizes = np.fromiter((len(blob) for blob in blobs), dtype=np.int64, count=len(blobs))
+    blob_starts = np.concatenate(([0], np.cumsum(sizes)))[:-1].astype(np.int64)
+
+    has_data = sizes >= HEADER_BYTES
+    lengths = np.zeros(len(blobs), dtype=np.int64)
+    if has_data.any():
+        header_positions = blob_starts[has_data][:, None] + np.arange(HEADER_BYTES)
+        lengths[has_data] = buffer[header_positions].copy().view(HEADER).ravel()
+
+    # Unpack every byte of every blob, then keep each night's real epochs
+    is_header = np.zeros(buffer.size, dtype=bool)
+    if has_data.any():
+        is_header[header_positions.ravel()] = True
+    codes = ((buffer[~is_header][:, None] >> _SHIFTS) & 3).ravel()
+
+    packed_sizes = np.where(has_data, sizes - HEADER_BYTES, 0)
+    code_starts = np.concatenate(([0], np.cumsum(packed_sizes * 4)))[:-1].astype(np.int64)
+    keep = np.arange(codes.size) - np.repeat(code_starts, packed_sizes * 4) < np.repeat(lengths, packed_sizes * 4)
+
+    offsets = np.concatenate(([0], np.cumsum(lengths))).astype(np.int64)
+    return Hypnograms(codes[keep], offsets)
+
+def stage_minutes(hypnograms: Hypnograms) -> Dict[str, np.ndarray]:
+    """
+    Minutes spent in each sleep stage per night.
+
+    An example of a metric derived from stored hypnograms without calling the API.
+    """
+    counts = np.bincount(
+        hypnograms.night_index * len(STAGES) + hypnograms.phases,
+        minlength=len(hypnograms) * len(STAGES)
+    ).reshape(-1, len(STAGES))
+    return {stage: counts[:, i] * EPOCH_MINUTES for i, stage in enumerate(STAGES)}
+
+def load_hypnograms(model_class: Type, user_id: int, start_date: Optional[date] = None,
+                    end_date: Optional[date] = None) -> Tuple[List[date], Hypnograms]:
+    """
+    Load and decode a user's stored hypnograms for a date range.
+
+    Args:
+        model_class: SleepData or NapData
+        user_id: User to load
+        start_date: Optional first date (inclusive)
+        end_date: Optional last date (inclusive)
+
+    Returns:
+        Tuple[List[date], Hypnograms]: Session dates and their decoded hypnograms, ordered by date
+    """
+    query = db.session.query(model_class.date, model_class.hypnogram)\
+        .filter(model_class.user_id == user_id)
+    if start_date:
+        query = query.filter(model_class.date >= start_date)
+    if end_date:
+        query = query.filter(model_class.date <= end_date)
+
+    rows = query.order_by(model_class.date, model_class.bedtime_start).all()
+    return [row.date for row in rows], unpack_hypnograms([row.hypnogram for row in rows])
@@ -0,0 +1,143 @@
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from etl.data_sources.oura.hypnogram import awake_runs, pack_hypnograms, EPOCH_MINUTES
+
+MAIN_SLEEP_MIN_SECONDS = 3 * 3600  # Main sleep must be longer than 3 hours...
+MAIN_SLEEP_START_HOURS = (20, 3)   # ...and start between 8 PM and 3 AM
+
+class SleepColumns:
+    """
+    A batch of Oura sleep documents as typed columns.
+
+    Every timestamp is parsed exactly once. Datetimes are naive local time with
+    the UTC offset kept separately, the way SleepData stores them.
+    """
+
+    def __init__(self, documents: List[Dict]):
+        self.documents = documents
+        self.day: List[str] = []
+        self.bedtime_start: List[datetime] = []
+        self.bedtime_end: List[datetime] = []
+        timezone_offset = []
+        start_hour = []
+        total_sleep_duration = []
+
+        for document in documents:
+            bedtime_start = datetime.fromisoformat(document['bedtime_start'])
+            offset = bedtime_start.utcoffset()
+            bedtime_start = bedtime_start.replace(tzinfo=None)
+
+            self.day.append(document['day'])
+            self.bedtime_start.append(bedtime_start)
+            self.bedtime_end.append(datetime.fromisoformat(document['bedtime_end']).replace(tzinfo=None))
+            timezone_offset.append(int(offset.total_seconds() / 60) if offset else 0)
+            start_hour.append(bedtime_start.hour)
+            total_sleep_duration.append(document['total_sleep_duration'])
+
+        self.timezone_offset = np.array(timezone_offset, dtype=np.int64)
+        self.start_hour = np.array(start_hour, dtype=np.int64)
+        self.total_sleep_duration = np.array(total_sleep_duration, dtype=np.int64)
+
+        self.leading_awake, self.trailing_awake, self.midsleep_awake_time = awake_runs(
+            [document['sleep_phase_5_min'] for document in documents]
+        )
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+def categorize_columns(columns: SleepColumns) -> Tuple[List[int], List[int]]:
+    """
+    Pick each day's main sleep and naps, following categorize_sleep_sessions.
+
+    The main-sleep test is evaluated for the whole batch at once; only the
+    per-day choice between candidates walks the (usually one or two) sessions
+    of a day.
+
+    Returns:
+        Tuple[List[int], List[int]]: Row indices of the main sleeps and of the naps,
+            in the order process_oura_data produces them
+    """
+    late_start, early_end = MAIN_SLEEP_START_HOURS
+    is_candidate = ((columns.start_hour >= late_start) | (columns.start_hour < early_end)) & \
+                   (columns.total_sleep_duration > MAIN_SLEEP_MIN_SECONDS)
+    is_candidate = is_candidate.tolist()
+    durations = columns.total_sleep_duration.tolist()
+
+    rows_by_day: Dict[str, List[int]] = {}
+    for i, day in enumerate(columns.day):
+        rows_by_day.setdefault(day, []).append(i)
+
+    main_rows = []
+    nap_rows = []
+    for rows in rows_by_day.values():
+        if len(rows) == 1:
+            main_rows.append(rows[0])
+            continue
+
+        main = None
+        naps = []
+        for i in rows:
+            if is_candidate[i]:
+                if main is None or durations[i] > durations[main]:
+                    if main is not None:
+                        naps.append(main)
+                    main = i
+            else:
+                naps.append(i)
+
+        if main is None:
+            main = rows[0]
+            naps = rows[1:]
+
+        main_rows.append(main)
+        nap_rows.extend(naps)
+
+    return main_rows, nap_rows
+
+def build_records(columns: SleepColumns, rows: List[int], user_id: int) -> List[Dict]:
+    """Build the SleepData/NapData records for the given rows, as process_sleep_session does."""
+    documents = [columns.documents[i] for i in rows]
+    timezone_offsets = columns.timezone_offset[rows].tolist()
+    leading_awake = columns.leading_awake[rows].tolist()
+    trailing_awake = columns.trailing_awake[rows].tolist()
+    midsleep_awake_time = columns.midsleep_awake_time[rows].tolist()
+    hypnograms = pack_hypnograms([session.get('sleep_phase_5_min') for session in documents])
+
+    records = []
+    for j, (i, session) in enumerate(zip(rows, documents)):
+        records.append({
+            'user_id': user_id,
+            'date': columns.day[i],
+            'bedtime_start': columns.bedtime_start[i],
+            'bedtime_end': columns.bedtime_end[i],
+            'sleep_start': columns.bedtime_start[i] + timedelta(minutes=leading_awake[j] * EPOCH_MINUTES),
+            'sleep_end': columns.bedtime_end[i] - timedelta(minutes=trailing_awake[j] * EPOCH_MINUTES),
+            'timezone_offset': timezone_offsets[j],
+            'total_sleep_duration': session['total_sleep_duration'],
+            'time_in_bed': session['time_in_bed'],
+            'sleep_awake_time': session['awake_time'],
+            'midsleep_awake_time': midsleep_awake_time[j],
+            'deep_sleep_duration': session.get('deep_sleep_duration', 0),
+            'light_sleep_duration': session.get('light_sleep_duration', 0),
+            'rem_sleep_duration': session.get('rem_sleep_duration', 0),
+            'restless_periods': session.get('restless_periods', 0),
+            'average_heart_rate': session.get('average_heart_rate'),
+            'average_hrv': session.get('average_hrv'),
+            'latency': session.get('latency'),
+            'hypnogram': hypnograms[j]
+        })
+    return records
+
+def normalize_oura_data(oura_data: List[Dict], user_id: int) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Columnar replacement for process_oura_data with identical output.
+
+    Returns:
+        Tuple[List[Dict], List[Dict]]: Sleep records and nap records
+    """
+    columns = SleepColumns(oura_data)
+    main_rows, nap_rows = categorize_columns(columns)
+    return build_records(columns, main_rows, user_id), build_records(columns, nap_rows, user_id)
@@ -1,6 +1,7 @@
 import os
 import sys
 import requests
+from concurrent.futures import ThreadPoolExecutor
 
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, '../../..'))
@@ -8,7 +9,7 @@ sys.path.append(PROJECT_ROOT)
 
 from datetime import datetime, timedelta, date
 from dateutil import parser
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional, Iterable, Iterator
 from dotenv import load_dotenv
 from sqlalchemy import func
 from flask import current_app
@@ -19,11 +20,24 @@ from app.extensions import db
 from app import create_app
 from database.models import SleepData, NapData, UserIntegrations
 from etl.data_sources.oura.api import OuraAPI
-from utils.date_utils import get_date_range
+from etl.data_sources.oura.hypnogram import awake_runs, pack_hypnogram, EPOCH_MINUTES
+from etl.data_sources.oura.normalize import normalize_oura_data
+from etl.bulk_upsert import bulk_upsert, UpsertResult
+from etl.backfill import create_backfill, get_backfill_end, has_pending_windows, run_backfill
+from etl.payload_store import get_payload_store
+from etl.watermarks import load_watermarks, get_sync_range, advance_watermark
+from utils.encryption import cached_credentials, DEFAULT_CREDENTIALS_TTL
+from utils.timezone_timeline import rebuild_timezone_timeline, invalidate_timezone_timeline
+from etl.data_sources.rize.rollups import rebuild_rollups_for_timezone_change
 from utils.logging_config import setup_logging
 
 logger = setup_logging()
 
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_BACKFILL_WINDOW_DAYS = 30
+BACKFILL_SOURCE = 'oura_sleep'
+PAYLOAD_PROVIDER = 'oura_sleep'
+
 def categorize_sleep_sessions(sleep_sessions: List[Dict]) -> Tuple[Dict, List[Dict]]:
     """
     Categorizes sleep sessions into main sleep and naps.
@@ -101,13 +115,35 @@ def calculate_sleep_metrics(sleep_data: Dict) -> Dict:
         'midsleep_awake_time': midsleep_awake_time
     }
 
-def process_sleep_session(session: Dict, user_id: int) -> Dict:
+def calculate_sleep_metrics_batch(sessions: List[Dict]) -> List[Dict]:
+    """
+    Calculate the same metrics as calculate_sleep_metrics for many sessions at once.
+    
+    The hypnograms of every session are scanned together with NumPy (see
+    hypnogram.awake_runs) instead of character by character.
+    
+    Returns:
+        List[Dict]: sleep_start, sleep_end and midsleep_awake_time per session, in order
+    """
+    leading, trailing, midsleep_awake_time = awake_runs([session['sleep_phase_5_min'] for session in sessions])
+    
+    metrics = []
+    for session, initial_awake, final_awake, midsleep in zip(sessions, leading.tolist(), trailing.tolist(), midsleep_awake_time.tolist()):
+        metrics.append({
+            'sleep_start': datetime.fromisoformat(session['bedtime_start']) + timedelta(minutes=initial_awake * EPOCH_MINUTES),
+            'sleep_end': datetime.fromisoformat(session['bedtime_end']) - timedelta(minutes=final_awake * EPOCH_MINUTES),
+            'midsleep_awake_time': midsleep
+        })
+    return metrics
+
+def process_sleep_session(session: Dict, user_id: int, custom_metrics: Optional[Dict] = None) -> Dict:
     def process_datetime(dt):
         offset = dt.utcoffset()
         offset_minutes = int(offset.total_seconds() / 60) if offset else 0
         return dt.replace(tzinfo=None), offset_minutes
 
-    custom_metrics = calculate_sleep_metrics(session)
+    if custom_metrics is None:
+        custom_metrics = calculate_sleep_metrics(session)
     
     bedtime_start, timezone_offset = process_datetime(parser.isoparse(session['bedtime_start']))
     bedtime_end, _ = process_datetime(parser.isoparse(session['bedtime_end']))
@@ -132,7 +168,8 @@ def process_sleep_session(session: Dict, user_id: int) -> Dict:
         'restless_periods': session.get('restless_periods', 0),
         'average_heart_rate': session.get('average_heart_rate'),
         'average_hrv': session.get('average_hrv'),
-        'latency': session.get('latency')
+        'latency': session.get('latency'),
+        'hypnogram': pack_hypnogram(session.get('sleep_phase_5_min'))
     }
 
     return processed_data
@@ -149,21 +186,216 @@ def process_oura_data(oura_data: List[Dict], user_id: int) -> Tuple[List[Dict],
             sessions_by_day[day] = []
         sessions_by_day[day].append(session)
 
+    # Hypnogram metrics for the whole batch in one pass
+    metrics_by_session = {
+        id(session): metrics
+        for session, metrics in zip(oura_data, calculate_sleep_metrics_batch(oura_data))
+    }
+
     # Process each day
     for day, sessions in sessions_by_day.items():
         main_sleep, naps = categorize_sleep_sessions(sessions)
         
-        sleep_data.append(process_sleep_session(main_sleep, user_id))
+        sleep_data.append(process_sleep_session(main_sleep, user_id, metrics_by_session[id(main_sleep)]))
         
         for nap in naps:
-            nap_data.append(process_sleep_session(nap, user_id))
+            nap_data.append(process_sleep_session(nap, user_id, metrics_by_session[id(nap)]))
 
     return sleep_data, nap_data
 
-def update_oura_sleep_data(start_date=None, end_date=None):
+def iter_day_batches(documents: Iterable[Dict], batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[List[Dict]]:
+    """
+    Group a stream of sleep documents into batches of roughly batch_size.
+    
+    Oura returns documents ordered by day, so a batch is only cut where the day
+    changes. All sessions of a day stay together for categorize_sleep_sessions.
+    """
+    batch = []
+    for document in documents:
+        if len(batch) >= batch_size and document['day'] != batch[-1]['day']:
+            yield batch
+            batch = []
+        batch.append(document)
+    
+    if batch:
+        yield batch
+
+def stream_sleep_documents(oura_api: OuraAPI, user_id: int, start_date: date, end_date: date) -> Iterator[Dict]:
+    """Stream sleep documents for a date window, storing each raw page as it arrives."""
+    pages = get_payload_store().record_pages(
+        PAYLOAD_PROVIDER, user_id, start_date, end_date,
+        oura_api.iter_pages("sleep", start_date, end_date)
+    )
+    for page in pages:
+        yield from page.get('data', [])
+
+def load_oura_documents(documents: Iterable[Dict], user_id: int, batch_size: int = DEFAULT_BATCH_SIZE) -> Tuple[UpsertResult, UpsertResult]:
+    """
+    Process and upsert a stream of sleep documents in bounded batches.
+    
+    The caller commits.
+    
+    Returns:
+        Tuple[UpsertResult, UpsertResult]: Sleep and nap upsert results
+    """
+    sleep_result = UpsertResult()
+    nap_result = UpsertResult()
+    
+    for batch in iter_day_batches(documents, batch_size):
+        # Same output as process_oura_data, parsing each timestamp once
+        processed_sleep_data, processed_nap_data = normalize_oura_data(batch, user_id)
+        
+        for record in processed_sleep_data + processed_nap_data:
+            if isinstance(record['date'], str):
+                record['date'] = date.fromisoformat(record['date'])
+        
+        # Upsert sleep and nap data on their natural keys
+        sleep_result += bulk_upsert(SleepData, processed_sleep_data)
+        nap_result += bulk_upsert(NapData, processed_nap_data)
+    
+    return sleep_result, nap_result
+
+def refresh_timezone_timeline(user_id: int):
+    """
+    Rebuild a user's timezone timeline and commit it with the pending work.
+    
+    Rize rollups of dates whose offset changed are then re-bucketed, so past
+    days don't stay under the old offset.
+    """
+    changed = rebuild_timezone_timeline(user_id)
+    db.session.commit()
+    # Only drop the cached timeline once the new intervals are committed
+    invalidate_timezone_timeline(user_id)
+    if rebuild_rollups_for_timezone_change(user_id, changed):
+        logger.info(f"Re-bucketed Rize rollups for {changed[0]} to {changed[1]} after a timezone change")
+    db.session.commit()
+
+def sync_oura_user(app, integration_id: int, start_date=None, end_date=None,
+                   watermarks: Optional[Dict[int, Dict]] = None) -> bool:
+    """
+    Sync Oura sleep data for a single integration.
+    
+    Runs in its own app context so every user gets an isolated database session,
+    which lets several users be synced from worker threads at the same time.
+    
+    Ranges longer than OURA_BACKFILL_WINDOW_DAYS (e.g. a newly connected user)
+    are backfilled in windows that are fetched concurrently and committed one by
+    one. An interrupted backfill is resumed on the next run.
+    
+    Without an explicit range the user's sync watermark decides what to fetch,
+    and it is advanced in the same transaction as the loaded data.
+    
+    Args:
+        app: Flask app used to create the user's app context
+        integration_id: Oura integration to sync
+        start_date: Optional start date (watermark is left untouched)
+        end_date: Optional end date (watermark is left untouched)
+        watermarks: Optional pre-loaded result of load_watermarks(BACKFILL_SOURCE)
+    
+    Returns:
+        bool: True if the user's sync succeeded, False otherwise
+    """
+    with app.app_context():
+        integration = db.session.get(UserIntegrations, integration_id)
+        user = integration.user
+        
+        try:
+            # Get credentials and initialize API
+            credentials = integration.get_credentials()
+            api_key = credentials.get('api_key')
+            oura_api = OuraAPI(access_token=api_key)
+            user_id = user.user_id
+            batch_size = current_app.config.get('OURA_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+            window_days = current_app.config.get('OURA_BACKFILL_WINDOW_DAYS', DEFAULT_BACKFILL_WINDOW_DAYS)
+            backfill_workers = current_app.config.get('OURA_BACKFILL_WORKERS', 1)
+            
+            def load_window(window_start, window_end):
+                # The end date is exclusive (see get_date_range), so include the window's last day
+                documents = stream_sleep_documents(OuraAPI(access_token=api_key), user_id, window_start, window_end + timedelta(days=1))
+                sleep_result, nap_result = load_oura_documents(documents, user_id, batch_size)
+                return f"sleep: {sleep_result}; naps: {nap_result}"
+            
+            # Resume an interrupted backfill before planning anything new
+            if has_pending_windows(user_id, BACKFILL_SOURCE):
+                backfill_end = get_backfill_end(user_id, BACKFILL_SOURCE)
+                if not run_backfill(app, user_id, BACKFILL_SOURCE, load_window, backfill_workers):
+                    integration.update_sync_status(success=False)
+                    return False
+                # Move the watermark past the finished plan so it isn't planned again
+                advance_watermark(BACKFILL_SOURCE, backfill_end - timedelta(days=1), user_id=user_id)
+                refresh_timezone_timeline(user_id)
+                watermarks = None
+            
+            # Get user-specific date range if not provided
+            user_start_date, user_end_date = start_date, end_date
+            use_watermark = not (user_start_date and user_end_date)
+            if use_watermark:
+                # Continue from the user's watermark
+                user_start_date, user_end_date = get_sync_range(BACKFILL_SOURCE, SleepData, 'date',
+                                                                user_id=user_id, watermarks=watermarks)
+                
+                # Always include the most recent day's data for potential updates
+                if user_start_date:
+                    user_start_date = user_start_date - timedelta(days=1)
+            
+            # The end date is exclusive, so the last covered day is the one before it
+            covered_through = user_end_date - timedelta(days=1)
+            
+            # Long ranges are split into windows that commit independently
+            if (user_end_date - user_start_date).days > window_days:
+                create_backfill(user_id, BACKFILL_SOURCE, user_start_date, user_end_date, window_days)
+                success = run_backfill(app, user_id, BACKFILL_SOURCE, load_window, backfill_workers)
+                if success:
+                    if use_watermark:
+                        advance_watermark(BACKFILL_SOURCE, covered_through, user_id=user_id)
+                    refresh_timezone_timeline(user_id)
+                integration.update_sync_status(success=success)
+                return success
+            
+            try:
+                # Stream sleep documents page by page and load them in batches
+                documents = stream_sleep_documents(oura_api, user_id, user_start_date, user_end_date)
+                sleep_result, nap_result = load_oura_documents(documents, user_id, batch_size)
+            except requests.exceptions.RequestException as e:
+                db.session.rollback()
+                logger.error(f"Failed to process data for {user.username}: API error - {str(e)}")
+                integration.update_sync_status(success=False)
+                return False
+            
+            if use_watermark:
+                advance_watermark(BACKFILL_SOURCE, covered_through, user_id=user_id)
+            
+            if not sleep_result.total and not nap_result.total:
+                db.session.commit()
+                logger.info(f"No new sleep data available for {user.username}")
+                integration.update_sync_status(success=True)
+                return True
+            
+            # Keep the user's timezone timeline in step with the loaded offsets
+            refresh_timezone_timeline(user_id)
+            integration.update_sync_status(success=True)
+            logger.info(f"Successfully processed {sleep_result.total} sleep records and {nap_result.total} nap records for {user.username} "
+                        f"(sleep: {sleep_result}; naps: {nap_result})")
+            return True
+            
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Failed to process data for {user.username}: {str(e)}")
+            integration.update_sync_status(success=False)
+            return False
+
+def update_oura_sleep_data(start_date=None, end_date=None, max_workers: Optional[int] = None):
     """
     Update Oura sleep data in the database for all users with active Oura integrations.
     If no date range is provided, it will determine the range based on each user's most recent record.
+    
+    Users are synced concurrently on a bounded worker pool. A failure only affects
+    that user's sync status; the remaining users are still processed.
+    
+    Args:
+        start_date: Optional start date applied to every user
+        end_date: Optional end date applied to every user
+        max_workers: Number of users synced at once. Defaults to OURA_SYNC_WORKERS.
     """
     try:
         integrations = UserIntegrations.query\
@@ -174,89 +406,63 @@ def update_oura_sleep_data(start_date=None, end_date=None):
             logger.info("No active Oura integrations found")
             return
         
-        for integration in integrations:
-            try:
-                user = integration.user
-                
-                # Get user-specific date range if not provided
-                user_start_date, user_end_date = start_date, end_date
-                if not (user_start_date and user_end_date):
-                    # Get date range from utility function
-                    user_start_date, user_end_date = get_date_range(SleepData, 'date', user_id=user.user_id)
-                    
-                    # Always include the most recent day's data for potential updates
-                    if user_start_date:
-                        user_start_date = user_start_date - timedelta(days=1)
-                
-                # Get credentials and initialize API
-                credentials = integration.get_credentials()
-                oura_api = OuraAPI(access_token=credentials.get('api_key'))
-                
-                try:
-                    # Fetch sleep data
-                    raw_sleep_data = oura_api.get_sleep_data(user_start_date, user_end_date)
-                except requests.exceptions.RequestException as e:
-                    logger.error(f"Failed to process data for {user.username}: API error - {str(e)}")
-                    integration.update_sync_status(success=False)
-                    continue
-                
-                if not raw_sleep_data or 'data' not in raw_sleep_data:
-                    logger.info(f"No new sleep data available for {user.username}")
-                    integration.update_sync_status(success=True)
-                    continue
-                
-                # Process the data
-                processed_sleep_data, processed_nap_data = process_oura_data(raw_sleep_data['data'], user.user_id)
-                
-                # Upsert sleep data
-                for sleep_record in processed_sleep_data:
-                    if isinstance(sleep_record['date'], str):
-                        sleep_record['date'] = date.fromisoformat(sleep_record['date'])
-                    
-                    existing = SleepData.query.filter_by(
-                        user_id=sleep_record['user_id'],
-                        date=sleep_record['date']
-                    ).first()
-                    
-                    if existing:
-                        for key, value in sleep_record.items():
-                            setattr(existing, key, value)
-                    else:
-                        new_sleep = SleepData(**sleep_record)
-                        db.session.add(new_sleep)
-                
-                # Upsert nap data
-                for nap_record in processed_nap_data:
-                    if isinstance(nap_record['date'], str):
-                        nap_record['date'] = date.fromisoformat(nap_record['date'])
-                    
-                    existing = NapData.query.filter_by(
-                        user_id=nap_record['user_id'],
-                        date=nap_record['date'],
-                        bedtime_start=nap_record['bedtime_start']
-                    ).first()
-                    
-                    if existing:
-                        for key, value in nap_record.items():
-                            setattr(existing, key, value)
-                    else:
-                        new_nap = NapData(**nap_record)
-                        db.session.add(new_nap)
-                
-                db.session.commit()
-                integration.update_sync_status(success=True)
-                logger.info(f"Successfully processed {len(processed_sleep_data)} sleep records and {len(processed_nap_data)} nap records for {user.username}")
-                
-            except Exception as e:
-                db.session.rollback()
-                logger.error(f"Failed to process data for {user.username if 'user' in locals() else integration.user_id}: {str(e)}")
-                integration.update_sync_status(success=False)
-                continue
+        if max_workers is None:
+            max_workers = current_app.config.get('OURA_SYNC_WORKERS', 1)
+        
+        app = current_app._get_current_object()
+        integration_ids = [integration.integration_id for integration in integrations]
+        
+        # Every user's watermark in one query instead of a MAX() scan per user
+        watermarks = load_watermarks(BACKFILL_SOURCE)
+        
+        # Decrypt each user's credentials once for the whole run
+        credentials_ttl = current_app.config.get('CREDENTIALS_CACHE_TTL', DEFAULT_CREDENTIALS_TTL)
+        with cached_credentials(credentials_ttl):
+            with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='oura') as executor:
+                results = list(executor.map(
+                    lambda integration_id: sync_oura_user(app, integration_id, start_date, end_date, watermarks),
+                    integration_ids
+                ))
+        
+        logger.info(f"Oura sleep sync finished: {sum(results)} of {len(results)} users succeeded")
                 
     except Exception as e:
         logger.error(f"An error occurred while processing Oura sleep data: {str(e)}")
         raise
 
+def replay_oura_sleep_data(start_date=None, end_date=None):
+    """
+    Rebuild sleep and nap data from stored raw payloads without calling the Oura API.
+    Windows are replayed in the order they were fetched, so later fetches win.
+    """
+    store = get_payload_store()
+    refs = store.iter_windows(PAYLOAD_PROVIDER, start_date=start_date, end_date=end_date)
+    
+    if not refs:
+        logger.info("No stored Oura sleep payloads to replay")
+        return
+    
+    batch_size = current_app.config.get('OURA_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+    sleep_total = UpsertResult()
+    nap_total = UpsertResult()
+    
+    try:
+        for ref in refs:
+            documents = (document for page in store.load_window(ref) for document in page.get('data', []))
+            sleep_result, nap_result = load_oura_documents(documents, ref['user_id'], batch_size)
+            db.session.commit()
+            sleep_total += sleep_result
+            nap_total += nap_result
+        
+        for user_id in sorted(set(ref['user_id'] for ref in refs)):
+            refresh_timezone_timeline(user_id)
+        
+        logger.info(f"Replayed {len(refs)} stored Oura sleep windows (sleep: {sleep_total}; naps: {nap_total})")
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"An error occurred while replaying Oura sleep data: {str(e)}")
+        raise
+
 if __name__ == "__main__":
     # Create Flask app context
     app = create_app()
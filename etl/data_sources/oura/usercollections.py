@@ -0,0 +1,387 @@
+import os
+import sys
+import requests
+from concurrent.futures import ThreadPoolExecutor
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, '../../..'))
+sys.path.append(PROJECT_ROOT)
+
+from datetime import datetime, timedelta, date
+from typing import Callable, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from flask import current_app
+
+load_dotenv()
+
+from app.extensions import db
+from app import create_app
+from database.models import (
+    UserIntegrations, OuraDailyReadiness, OuraDailyActivity, OuraDailySpo2,
+    OuraWorkouts, OuraSessions, OuraTags
+)
+from etl.data_sources.oura.api import OuraAPI
+from etl.bulk_upsert import bulk_upsert, UpsertResult
+from etl.backfill import create_backfill, get_backfill_end, has_pending_windows, run_backfill
+from etl.payload_store import PayloadStore, get_payload_store
+from etl.watermarks import load_watermarks, get_sync_range, advance_watermark
+from utils.encryption import cached_credentials, DEFAULT_CREDENTIALS_TTL
+from utils.logging_config import setup_logging
+
+logger = setup_logging()
+
+DEFAULT_BACKFILL_WINDOW_DAYS = 30
+
+def parse_local_datetime(value: Optional[str]) -> Tuple[Optional[datetime], int]:
+    """
+    Split an Oura ISO timestamp into naive local time and its UTC offset in minutes.
+
+    Matches how SleepData stores bedtime_start and timezone_offset.
+    """
+    if not value:
+        return None, 0
+    dt = datetime.fromisoformat(value)
+    offset = dt.utcoffset()
+    offset_minutes = int(offset.total_seconds() / 60) if offset else 0
+    return dt.replace(tzinfo=None), offset_minutes
+
+def process_readiness(document: Dict, user_id: int) -> Dict:
+    contributors = document.get('contributors') or {}
+    return {
+        'user_id': user_id,
+        'date': date.fromisoformat(document['day']),
+        'score': document.get('score'),
+        'temperature_deviation': document.get('temperature_deviation'),
+        'temperature_trend_deviation': document.get('temperature_trend_deviation'),
+        'activity_balance': contributors.get('activity_balance'),
+        'body_temperature': contributors.get('body_temperature'),
+        'hrv_balance': contributors.get('hrv_balance'),
+        'previous_day_activity': contributors.get('previous_day_activity'),
+        'previous_night': contributors.get('previous_night'),
+        'recovery_index': contributors.get('recovery_index'),
+        'resting_heart_rate': contributors.get('resting_heart_rate'),
+        'sleep_balance': contributors.get('sleep_balance')
+    }
+
+def process_activity(document: Dict, user_id: int) -> Dict:
+    return {
+        'user_id': user_id,
+        'date': date.fromisoformat(document['day']),
+        'score': document.get('score'),
+        'steps': document.get('steps'),
+        'active_calories': document.get('active_calories'),
+        'total_calories': document.get('total_calories'),
+        'equivalent_walking_distance': document.get('equivalent_walking_distance'),
+        'high_activity_time': document.get('high_activity_time'),
+        'medium_activity_time': document.get('medium_activity_time'),
+        'low_activity_time': document.get('low_activity_time'),
+        'sedentary_time': document.get('sedentary_time'),
+        'resting_time': document.get('resting_time'),
+        'non_wear_time': document.get('non_wear_time'),
+        'inactivity_alerts': document.get('inactivity_alerts'),
+        'average_met_minutes': document.get('average_met_minutes')
+    }
+
+def process_spo2(document: Dict, user_id: int) -> Dict:
+    spo2_percentage = document.get('spo2_percentage') or {}
+    return {
+        'user_id': user_id,
+        'date': date.fromisoformat(document['day']),
+        'spo2_average': spo2_percentage.get('average'),
+        'breathing_disturbance_index': document.get('breathing_disturbance_index')
+    }
+
+def process_workout(document: Dict, user_id: int) -> Dict:
+    start_time, timezone_offset = parse_local_datetime(document['start_datetime'])
+    end_time, _ = parse_local_datetime(document['end_datetime'])
+    return {
+        'oura_id': document['id'],
+        'user_id': user_id,
+        'date': date.fromisoformat(document['day']),
+        'activity': document.get('activity'),
+        'intensity': document.get('intensity'),
+        'label': document.get('label'),
+        'source': document.get('source'),
+        'calories': document.get('calories'),
+        'distance': document.get('distance'),
+        'start_time': start_time,
+        'end_time': end_time,
+        'timezone_offset': timezone_offset
+    }
+
+def process_session(document: Dict, user_id: int) -> Dict:
+    start_time, timezone_offset = parse_local_datetime(document['start_datetime'])
+    end_time, _ = parse_local_datetime(document['end_datetime'])
+    return {
+        'oura_id': document['id'],
+        'user_id': user_id,
+        'date': date.fromisoformat(document['day']),
+        'type': document.get('type'),
+        'mood': document.get('mood'),
+        'start_time': start_time,
+        'end_time': end_time,
+        'timezone_offset': timezone_offset
+    }
+
+def process_tag(document: Dict, user_id: int) -> Dict:
+    timestamp, _ = parse_local_datetime(document.get('timestamp'))
+    return {
+        'oura_id': document['id'],
+        'user_id': user_id,
+        'date': date.fromisoformat(document['day']),
+        'text': document.get('text'),
+        'tags': ','.join(document.get('tags') or []) or None,
+        'timestamp': timestamp
+    }
+
+class OuraCollection:
+    def __init__(self, endpoint: str, model_class: type, process_func: Callable[[Dict, int], Dict]):
+        self.endpoint = endpoint
+        self.model_class = model_class
+        self.process_func = process_func
+        self.payload_provider = f"oura_{endpoint}"
+        self.watermark_source = f"oura_{endpoint}"
+
+COLLECTIONS = [
+    OuraCollection('daily_readiness', OuraDailyReadiness, process_readiness),
+    OuraCollection('daily_activity', OuraDailyActivity, process_activity),
+    OuraCollection('daily_spo2', OuraDailySpo2, process_spo2),
+    OuraCollection('workout', OuraWorkouts, process_workout),
+    OuraCollection('session', OuraSessions, process_session),
+    OuraCollection('tags', OuraTags, process_tag),
+]
+
+def fetch_collection(oura_api: OuraAPI, store: PayloadStore, collection: OuraCollection, user_id: int,
+                     start_date: date, end_date: date) -> List[Dict]:
+    """Fetch a collection's documents for a user's window, storing each raw page as it arrives."""
+    pages = store.record_pages(
+        collection.payload_provider, user_id, start_date, end_date,
+        oura_api.iter_pages(collection.endpoint, start_date, end_date)
+    )
+    return [document for page in pages for document in page.get('data', [])]
+
+def load_collection(collection: OuraCollection, documents: List[Dict], user_id: int) -> UpsertResult:
+    """Process a collection's documents and upsert them. The caller commits."""
+    records = []
+    for document in documents:
+        try:
+            records.append(collection.process_func(document, user_id))
+        except Exception as e:
+            logger.error(f"Error processing Oura {collection.endpoint} document {document.get('id', 'unknown')}: {str(e)}")
+            continue
+
+    return bulk_upsert(collection.model_class, records)
+
+def sync_collection(app, user_id: int, api_key: str, collection: OuraCollection, start_date=None, end_date=None,
+                    watermarks: Optional[Dict[int, Dict]] = None) -> str:
+    """
+    Sync one collection for a user in its own app context.
+
+    The collection keeps its own watermark, so a failure leaves the other
+    collections' progress in place. Ranges longer than OURA_BACKFILL_WINDOW_DAYS
+    (e.g. the first sync) are backfilled in windows like the sleep data, and an
+    interrupted backfill is resumed on the next run.
+
+    Returns:
+        str: Summary of what was loaded, for the log
+
+    Raises:
+        Exception: Whatever stopped the collection from syncing
+    """
+    with app.app_context():
+        try:
+            window_days = current_app.config.get('OURA_BACKFILL_WINDOW_DAYS', DEFAULT_BACKFILL_WINDOW_DAYS)
+            backfill_workers = current_app.config.get('OURA_BACKFILL_WORKERS', 1)
+            source = collection.watermark_source
+
+            def load_window(window_start, window_end):
+                # The end date is exclusive (see get_date_range), so include the window's last day
+                documents = fetch_collection(OuraAPI(access_token=api_key), get_payload_store(), collection,
+                                             user_id, window_start, window_end + timedelta(days=1))
+                return load_collection(collection, documents, user_id)
+
+            # Resume an interrupted backfill before planning anything new
+            if has_pending_windows(user_id, source):
+                backfill_end = get_backfill_end(user_id, source)
+                if not run_backfill(app, user_id, source, load_window, backfill_workers):
+                    raise RuntimeError("backfill did not complete")
+                # Move the watermark past the finished plan so it isn't planned again
+                advance_watermark(source, backfill_end - timedelta(days=1), user_id=user_id)
+                db.session.commit()
+                watermarks = None
+
+            user_start_date, user_end_date = start_date, end_date
+            use_watermark = not (user_start_date and user_end_date)
+            if use_watermark:
+                user_start_date, user_end_date = get_sync_range(source, collection.model_class, 'date',
+                                                                user_id=user_id, watermarks=watermarks)
+
+                # Daily scores keep changing until the day is over
+                user_start_date = user_start_date - timedelta(days=1)
+
+            # The end date is exclusive, so the last covered day is the one before it
+            covered_through = user_end_date - timedelta(days=1)
+
+            # Long ranges are split into windows that commit independently
+            if (user_end_date - user_start_date).days > window_days:
+                create_backfill(user_id, source, user_start_date, user_end_date, window_days)
+                if not run_backfill(app, user_id, source, load_window, backfill_workers):
+                    raise RuntimeError("backfill did not complete")
+                if use_watermark:
+                    advance_watermark(source, covered_through, user_id=user_id)
+                db.session.commit()
+                return f"backfilled {user_start_date} to {covered_through}"
+
+            documents = fetch_collection(OuraAPI(access_token=api_key), get_payload_store(), collection,
+                                         user_id, user_start_date, user_end_date)
+            result = load_collection(collection, documents, user_id)
+            if use_watermark:
+                advance_watermark(source, covered_through, user_id=user_id)
+            db.session.commit()
+            return str(result)
+
+        except Exception:
+            db.session.rollback()
+            raise
+
+def sync_oura_collections_user(app, integration_id: int, start_date=None, end_date=None,
+                               watermarks: Optional[Dict[str, Dict[int, Dict]]] = None) -> bool:
+    """
+    Sync readiness, activity, SpO2, workouts, sessions and tags for a single integration.
+
+    The collections are synced concurrently, each in its own app context and
+    transaction. A collection that fails is logged and retried on the next run
+    from its own watermark; the ones that succeeded are kept.
+
+    Args:
+        app: Flask app used to create the app contexts
+        integration_id: Oura integration to sync
+        start_date: Optional start date (watermarks are left untouched)
+        end_date: Optional end date (watermarks are left untouched)
+        watermarks: Optional pre-loaded load_watermarks() results keyed by endpoint
+
+    Returns:
+        bool: True if every collection synced, False otherwise
+    """
+    with app.app_context():
+        integration = db.session.get(UserIntegrations, integration_id)
+        user = integration.user
+
+        try:
+            api_key = integration.get_credentials().get('api_key')
+            user_id = user.user_id
+        except Exception as e:
+            logger.error(f"Failed to process Oura collections for {user.username}: {str(e)}")
+            integration.update_sync_status(success=False)
+            return False
+
+        # The requests share the pooled Oura transport, so the user's sync takes
+        # roughly as long as its slowest collection
+        with ThreadPoolExecutor(max_workers=len(COLLECTIONS), thread_name_prefix='oura-collections') as executor:
+            futures = {
+                collection.endpoint: executor.submit(
+                    sync_collection, app, user_id, api_key, collection, start_date, end_date,
+                    watermarks.get(collection.endpoint) if watermarks is not None else None
+                )
+                for collection in COLLECTIONS
+            }
+
+        summaries, failed = {}, []
+        for endpoint, future in futures.items():
+            try:
+                summaries[endpoint] = future.result()
+            except requests.exceptions.RequestException as e:
+                logger.error(f"Failed to fetch Oura {endpoint} for {user.username}: API error - {str(e)}")
+                failed.append(endpoint)
+            except Exception as e:
+                logger.error(f"Failed to process Oura {endpoint} for {user.username}: {str(e)}")
+                failed.append(endpoint)
+
+        integration.update_sync_status(success=not failed)
+        if summaries:
+            logger.info(f"Oura collections for {user.username}: " +
+                        "; ".join(f"{endpoint}: {summary}" for endpoint, summary in summaries.items()))
+        return not failed
+
+def update_oura_collections(start_date=None, end_date=None, max_workers: Optional[int] = None):
+    """
+    Update the non-sleep Oura collections for all users with active Oura integrations.
+
+    Args:
+        start_date: Optional start date applied to every user
+        end_date: Optional end date applied to every user
+        max_workers: Number of users synced at once. Defaults to OURA_SYNC_WORKERS.
+    """
+    try:
+        integrations = UserIntegrations.query\
+            .filter_by(integration_type='oura', status='active')\
+            .all()
+
+        if not integrations:
+            logger.info("No active Oura integrations found")
+            return
+
+        if max_workers is None:
+            max_workers = current_app.config.get('OURA_SYNC_WORKERS', 1)
+
+        app = current_app._get_current_object()
+        integration_ids = [integration.integration_id for integration in integrations]
+        watermarks = {collection.endpoint: load_watermarks(collection.watermark_source) for collection in COLLECTIONS}
+
+        # Decrypt each user's credentials once for the whole run
+        credentials_ttl = current_app.config.get('CREDENTIALS_CACHE_TTL', DEFAULT_CREDENTIALS_TTL)
+        with cached_credentials(credentials_ttl):
+            with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='oura') as executor:
+                results = list(executor.map(
+                    lambda integration_id: sync_oura_collections_user(app, integration_id, start_date, end_date, watermarks),
+                    integration_ids
+                ))
+
+        logger.info(f"Oura collections sync finished: {sum(results)} of {len(results)} users succeeded")
+
+    except Exception as e:
+        logger.error(f"An error occurred while processing Oura collections: {str(e)}")
+        raise
+
+def replay_oura_collections(start_date=None, end_date=None):
+    """
+    Rebuild the non-sleep Oura collections from stored raw payloads without calling the API.
+    Windows are replayed in the order they were fetched, so later fetches win.
+    """
+    store = get_payload_store()
+
+    try:
+        for collection in COLLECTIONS:
+            refs = store.iter_windows(collection.payload_provider, start_date=start_date, end_date=end_date)
+            total = UpsertResult()
+            for ref in refs:
+                documents = [document for page in store.load_window(ref) for document in page.get('data', [])]
+                total += load_collection(collection, documents, ref['user_id'])
+                db.session.commit()
+
+            if refs:
+                logger.info(f"Replayed {len(refs)} stored Oura {collection.endpoint} windows ({total})")
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"An error occurred while replaying Oura collections: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    # Create Flask app context
+    app = create_app()
+
+    with app.app_context():
+        # Option 1: Use most recent data
+        start_date = None
+        end_date = None
+
+        # Option 2: Use specific date range
+        # start_date = date(2024, 1, 1)
+        # end_date = date(2024, 12, 31)
+
+        try:
+            update_oura_collections(start_date, end_date)
+            print("Oura collections update completed successfully.")
+        except Exception as e:
+            print(f"Failed to update Oura collections: {e}")
+            exit(1)
@@ -1,13 +1,76 @@
 import requests
-from typing import Optional, Dict, Any, List
-from datetime import datetime, date, timezone
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Tuple
+from datetime import datetime, date, timedelta, timezone
+from etl.data_sources.http_transport import get_transport
 from utils.logging_config import setup_logging
 
 logger = setup_logging()
 
+DEFAULT_WINDOW_DAYS = 31
+DEFAULT_MAX_WORKERS = 4
+
+SESSION_FIELDS = """
+                id
+                description
+                createdAt
+                startTime
+                endTime
+                title
+                type
+                source
+"""
+
+SUMMARY_FIELDS = """
+            startTime
+            endTime
+            bucketSize
+            focusTime
+            focusTimeAverage
+            breakTime
+            breakTimeAverage
+            meetingTime
+            meetingTimeAverage
+            trackedTime
+            trackedTimeAverage
+            workHours
+            workHoursAverage
+            buckets {
+            startTime
+            endTime
+            focusTime
+            breakTime
+            meetingTime
+            trackedTime
+            workHours
+            date
+            wday
+            dailyMeetingTimeAverage
+            dailyTrackedTimeAverage
+            dailyFocusTimeAverage
+            dailyWorkHoursAverage
+            }
+"""
+
 class RizeAPI:
-    def __init__(self, api_key: str):
+    def __init__(
+        self,
+        api_key: str,
+        transport=None,
+        window_days: int = DEFAULT_WINDOW_DAYS,
+        max_workers: int = DEFAULT_MAX_WORKERS
+    ):
+        """
+        Args:
+            api_key: Rize API key
+            transport: Optional HTTP transport (defaults to the shared 'rize' transport)
+            window_days: Longest session range fetched in a single query
+            max_workers: Session windows fetched at the same time
+        """
         self.api_key = api_key
+        self.transport = transport or get_transport('rize')
+        self.window_days = window_days
+        self.max_workers = max_workers
         self.base_url = "https://api.rize.io/api/v1/graphql"
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
@@ -21,7 +84,7 @@ class RizeAPI:
             payload["variables"] = variables
 
         try:
-            response = requests.post(self.base_url, json=payload, headers=self.headers)
+            response = self.transport.post(self.base_url, json=payload, headers=self.headers)
             response.raise_for_status()
             
             data = response.json()
@@ -41,6 +104,9 @@ class RizeAPI:
         """
         Get raw sessions data.
         
+        Ranges longer than window_days are split into windows that are fetched
+        concurrently; sessions returned by more than one window are kept once.
+        
         Args:
             start_time (datetime): Start time for the query
             end_time (datetime): End time for the query
@@ -66,28 +132,109 @@ class RizeAPI:
             }
             }
         """
-        query = """
-        query GetSessions($startTime: ISO8601DateTime!, $endTime: ISO8601DateTime!, $sort: TimeEntrySortEnum!) {
-            sessions(startTime: $startTime, endTime: $endTime, sort: $sort) {
-                id
-                description
-                createdAt
-                startTime
-                endTime
-                title
-                type
-                source
-            }
-        }
+        windows = self.split_windows(start_time, end_time)
+        if len(windows) == 1:
+            return self._get_session_window(start_time, end_time, sort)
+
+        with ThreadPoolExecutor(max_workers=self._workers_for(windows), thread_name_prefix='rize') as executor:
+            batches = list(executor.map(lambda window: self._get_session_window(*window, sort), windows))
+        return merge_sessions(batches)
+
+    def get_sessions_and_summaries(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        start_date: date,
+        end_date: date,
+        sort: str = "start_time",
+        bucket_size: str = "day"
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
         """
-        
-        variables = {
+        Get raw sessions and time summaries together.
+
+        The summaries and the first session window go out as one aliased GraphQL
+        request; any further session windows are fetched alongside it.
+
+        Args:
+            start_time (datetime): Start time for the sessions
+            end_time (datetime): End time for the sessions
+            start_date (date): Start date for the summaries
+            end_date (date): End date for the summaries
+            sort (str): Sort field for the sessions (default: "start_time")
+            bucket_size (str): Size of the summary buckets ('day', 'week', or 'month')
+
+        Returns:
+            tuple: List of session records and raw summary data
+        """
+        query = f"""
+        query GetSessionsAndSummaries(
+            $startTime: ISO8601DateTime!, $endTime: ISO8601DateTime!, $sort: TimeEntrySortEnum!,
+            $startDate: ISO8601Date!, $endDate: ISO8601Date!, $bucketSize: String!
+        ) {{
+            sessions: sessions(startTime: $startTime, endTime: $endTime, sort: $sort) {{
+                {SESSION_FIELDS}
+            }}
+            summaries: summaries(
+                startDate: $startDate
+                endDate: $endDate
+                bucketSize: $bucketSize
+                includeCategories: true
+            ) {{
+                {SUMMARY_FIELDS}
+            }}
+        }}
+        """
+
+        windows = self.split_windows(start_time, end_time)
+        variables = self._session_variables(*windows[0], sort)
+        variables.update(self._summary_variables(start_date, end_date, bucket_size))
+
+        with ThreadPoolExecutor(max_workers=self._workers_for(windows), thread_name_prefix='rize') as executor:
+            combined = executor.submit(self.execute_query, query, variables)
+            rest = [executor.submit(self._get_session_window, *window, sort) for window in windows[1:]]
+            result = combined.result()
+            batches = [result["sessions"]] + [future.result() for future in rest]
+
+        return merge_sessions(batches), result["summaries"]
+
+    def split_windows(self, start_time: datetime, end_time: datetime) -> List[Tuple[datetime, datetime]]:
+        """Split a time range into consecutive windows of at most window_days."""
+        step = timedelta(days=max(1, self.window_days))
+        windows = []
+        window_start = start_time
+        while window_start + step < end_time:
+            windows.append((window_start, window_start + step))
+            window_start += step
+        windows.append((window_start, end_time))
+        return windows
+
+    def _workers_for(self, windows: List[Tuple[datetime, datetime]]) -> int:
+        return max(1, min(self.max_workers, len(windows)))
+
+    def _session_variables(self, start_time: datetime, end_time: datetime, sort: str) -> Dict[str, Any]:
+        return {
             "startTime": start_time.astimezone(timezone.utc).isoformat(),
             "endTime": end_time.astimezone(timezone.utc).isoformat(),
             "sort": sort
         }
-        
-        result = self.execute_query(query, variables=variables)
+
+    def _summary_variables(self, start_date: date, end_date: date, bucket_size: str) -> Dict[str, Any]:
+        return {
+            "startDate": start_date.isoformat(),
+            "endDate": end_date.isoformat(),
+            "bucketSize": bucket_size
+        }
+
+    def _get_session_window(self, start_time: datetime, end_time: datetime, sort: str) -> List[Dict[str, Any]]:
+        """Fetch the sessions of a single window."""
+        query = f"""
+        query GetSessions($startTime: ISO8601DateTime!, $endTime: ISO8601DateTime!, $sort: TimeEntrySortEnum!) {{
+            sessions(startTime: $startTime, endTime: $endTime, sort: $sort) {{
+                {SESSION_FIELDS}
+            }}
+        }}
+        """
+        result = self.execute_query(query, variables=self._session_variables(start_time, end_time, sort))
         return result["sessions"]
 
     def get_summaries(
@@ -146,53 +293,28 @@ class RizeAPI:
             }
             }
         """
-        query = """query GetSummaries($startDate: ISO8601Date!, $endDate: ISO8601Date!, $bucketSize: String!) {
+        query = f"""query GetSummaries($startDate: ISO8601Date!, $endDate: ISO8601Date!, $bucketSize: String!) {{
         summaries(
             startDate: $startDate
             endDate: $endDate
             bucketSize: $bucketSize
             includeCategories: true
-        ) {
-            startTime
-            endTime
-            bucketSize
-            focusTime
-            focusTimeAverage
-            breakTime
-            breakTimeAverage
-            meetingTime
-            meetingTimeAverage
-            trackedTime
-            trackedTimeAverage
-            workHours
-            workHoursAverage
-            buckets {
-            startTime
-            endTime
-            focusTime
-            breakTime
-            meetingTime
-            trackedTime
-            workHours
-            date
-            wday
-            dailyMeetingTimeAverage
-            dailyTrackedTimeAverage
-            dailyFocusTimeAverage
-            dailyWorkHoursAverage
-            }
-        }
-        }"""
+        ) {{
+            {SUMMARY_FIELDS}
+        }}
+        }}"""
         
-        variables = {
-            "startDate": start_date.isoformat(),
-            "endDate": end_date.isoformat(),
-            "bucketSize": bucket_size
-        }
-        
-        result = self.execute_query(query, variables=variables)
+        result = self.execute_query(query, variables=self._summary_variables(start_date, end_date, bucket_size))
         return result["summaries"]
 
+def merge_sessions(batches: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Concatenate session batches, keeping the first copy of each session id."""
+    merged = {}
+    for batch in batches:
+        for session in batch:
+            merged.setdefault(session["id"], session)
+    return list(merged.values())
+
 class RizeAPIError(Exception):
     """Custom exception for Rize API errors"""
     pass
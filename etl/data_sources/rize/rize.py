@@ -6,9 +6,11 @@ PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, '../../..'))
 sys.path.append(PROJECT_ROOT)
 
 from datetime import datetime, date, timedelta
+import numpy as np
 import pandas as pd
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from dotenv import load_dotenv
+from flask import current_app
 from sqlalchemy import func
 
 # Load environment variables
@@ -17,8 +19,12 @@ load_dotenv()
 from app.extensions import db
 from app import create_app
 from database.models import RizeSessions, RizeSummaries
-from etl.data_sources.rize.api import RizeAPI
-from utils.date_utils import get_date_range
+from etl.data_sources.rize.api import RizeAPI, DEFAULT_WINDOW_DAYS, DEFAULT_MAX_WORKERS
+from etl.data_sources.rize.rollups import rebuild_hourly_rollups, rebuild_all_hourly_rollups, has_hourly_rollups
+from etl.bulk_upsert import bulk_upsert
+from etl.reconcile import delete_missing
+from etl.payload_store import get_payload_store
+from etl.watermarks import get_sync_range, advance_watermark
 from utils.logging_config import setup_logging
 
 logger = setup_logging()
@@ -42,6 +48,71 @@ def process_session_record(record: Dict) -> Dict:
         'created_at': created_at
     }
 
+def parse_utc_column(values: pd.Series) -> np.ndarray:
+    """Parse ISO 8601 timestamps with offsets into naive UTC datetime64 values"""
+    return pd.to_datetime(values, utc=True, format='ISO8601').dt.tz_convert(None).to_numpy()
+
+SESSION_FIELDS = ('id', 'title', 'description', 'type', 'source', 'startTime', 'endTime', 'createdAt')
+
+def process_session_records(records: List[Dict]) -> List[Dict]:
+    """
+    Process a whole sessions payload at once.
+
+    Builds one frame from the payload and converts the timestamps as columns,
+    so no pandas object is created per session. Timestamps come out as naive
+    UTC datetimes, which is what bulk_upsert stores for process_session_record's
+    tz-aware values. If the batch can't be parsed as a whole (a missing field or
+    a malformed timestamp), falls back to processing record by record so the
+    bad records are logged and skipped as before.
+
+    Args:
+        records: Raw session records from the Rize API
+
+    Returns:
+        List[Dict]: Records ready for bulk_upsert into RizeSessions
+    """
+    if not records:
+        return []
+
+    try:
+        if not all(all(field in record for field in SESSION_FIELDS) for record in records):
+            raise KeyError("Session record is missing a field")
+
+        frame = pd.DataFrame.from_records(records, columns=SESSION_FIELDS)
+        start_time = parse_utc_column(frame['startTime'])
+        end_time = parse_utc_column(frame['endTime'])
+        created_at = parse_utc_column(frame['createdAt'])
+        if pd.isna(start_time).any() or pd.isna(end_time).any() or pd.isna(created_at).any():
+            raise ValueError("Session record has an empty timestamp")
+    except Exception as e:
+        logger.warning(f"Processing sessions record by record: {str(e)}")
+        processed_records = []
+        for record in records:
+            try:
+                processed_records.append(process_session_record(record))
+            except Exception as e:
+                logger.error(f"Error processing session record: {str(e)}")
+        return processed_records
+
+    # Same truncation as int(timedelta.total_seconds() / 60)
+    duration_minutes = ((end_time - start_time).astype(np.int64) / 1e9 / 60).astype(np.int64)
+
+    columns = zip(
+        frame['id'].tolist(),
+        frame['title'].tolist(),
+        frame['description'].tolist(),
+        frame['type'].tolist(),
+        frame['source'].tolist(),
+        start_time.astype('datetime64[us]').tolist(),
+        end_time.astype('datetime64[us]').tolist(),
+        start_time.astype('datetime64[D]').tolist(),
+        duration_minutes.tolist(),
+        created_at.astype('datetime64[us]').tolist()
+    )
+    keys = ('session_id', 'title', 'description', 'type', 'source',
+            'start_time', 'end_time', 'date', 'duration_minutes', 'created_at')
+    return [dict(zip(keys, values)) for values in columns]
+
 def process_summary_record(record: Dict) -> Dict:
     """Process functions remain unchanged as they don't involve database operations"""
     local_date = record['date'].split()[0]
@@ -61,67 +132,80 @@ def process_summary_record(record: Dict) -> Dict:
         'daily_work_hours_average': int(record['dailyWorkHoursAverage'])
     }
 
-def get_existing_session_ids(start_date: date, end_date: date) -> set:
-    """Get set of session IDs for a date range"""
-    result = RizeSessions.query\
-        .filter(RizeSessions.date.between(start_date, end_date))\
-        .with_entities(RizeSessions.session_id)\
-        .all()
-    return set(row[0] for row in result)
+def get_rize_api() -> RizeAPI:
+    """Create a Rize client using the configured window size and concurrency"""
+    return RizeAPI(
+        os.getenv('RIZE_API_KEY'),
+        window_days=current_app.config.get('RIZE_WINDOW_DAYS', DEFAULT_WINDOW_DAYS),
+        max_workers=current_app.config.get('RIZE_FETCH_WORKERS', DEFAULT_MAX_WORKERS)
+    )
 
-def update_rize_sessions(start_date: Optional[date] = None, end_date: Optional[date] = None):
-    """Update just the Rize session data"""
-    if not (start_date and end_date):
-        start_date, end_date = get_date_range(RizeSessions, 'date')
-    
-    logger.debug(f"Fetching Rize sessions for period {start_date} to {end_date}")
-    
-    rize_api = RizeAPI(os.getenv('RIZE_API_KEY'))
-    
+def get_sessions_sync_range(start_date: Optional[date], end_date: Optional[date]) -> Tuple[date, date, bool]:
+    """Resolve the session date range; the flag says whether it came from the watermark"""
+    use_watermark = not (start_date and end_date)
+    if use_watermark:
+        start_date, end_date = get_sync_range('rize_sessions', RizeSessions, 'date')
+    return start_date, end_date, use_watermark
+
+def get_summaries_sync_range(start_date: Optional[date], end_date: Optional[date]) -> Tuple[date, date, bool]:
+    """Resolve the summary date range; the flag says whether it came from the watermark"""
+    use_watermark = not (start_date and end_date)
+    if use_watermark:
+        start_date, end_date = get_sync_range('rize_summaries', RizeSummaries, 'date')
+    start_date = start_date - timedelta(days=1)  # rize data can update as the day goes on
+    return start_date, end_date, use_watermark
+
+def get_sessions_fetch_window(start_date: date, end_date: date) -> Tuple[datetime, datetime]:
+    """Pad the session date range by a day on each side, since sessions are dated in UTC"""
     start_datetime = datetime.combine(start_date, datetime.min.time()) - timedelta(days=1)
     end_datetime = datetime.combine(end_date, datetime.max.time()) + timedelta(days=1)
+    return start_datetime, end_datetime
+
+def save_rize_sessions(sessions_data: List[Dict], start_date: date, end_date: date, use_watermark: bool) -> int:
+    """Store fetched sessions, load them and advance the watermark"""
+    get_payload_store().save('rize_sessions', None, start_date, end_date, sessions_data)
     
-    sessions_data = rize_api.get_sessions(start_datetime, end_datetime)
+    sessions_count = load_rize_sessions(sessions_data, start_date, end_date)
+    if use_watermark:
+        advance_watermark('rize_sessions', end_date - timedelta(days=1))
+        db.session.commit()
+    return sessions_count
+
+def save_rize_summaries(summary_data: Dict, start_date: date, end_date: date, use_watermark: bool) -> int:
+    """Store fetched summaries, load them and advance the watermark"""
+    get_payload_store().save('rize_summaries', None, start_date, end_date, summary_data)
+    
+    summaries_count = load_rize_summaries(summary_data)
+    if use_watermark:
+        advance_watermark('rize_summaries', end_date - timedelta(days=1))
+        db.session.commit()
+    return summaries_count
+
+def update_rize_sessions(start_date: Optional[date] = None, end_date: Optional[date] = None):
+    """Update just the Rize session data"""
+    start_date, end_date, use_watermark = get_sessions_sync_range(start_date, end_date)
     
-    processed_sessions = []
-    session_ids = set()
+    logger.debug(f"Fetching Rize sessions for period {start_date} to {end_date}")
     
-    for record in sessions_data:
-        try:
-            processed_record = process_session_record(record)
-            session_ids.add(processed_record['session_id'])
-            
-            session_date = processed_record['date']
-            if start_date <= session_date <= end_date:
-                processed_sessions.append(processed_record)
-        except Exception as e:
-            logger.error(f"Error processing session record: {str(e)}")
-            continue
+    sessions_data = get_rize_api().get_sessions(*get_sessions_fetch_window(start_date, end_date))
+    return save_rize_sessions(sessions_data, start_date, end_date, use_watermark)
+
+def load_rize_sessions(sessions_data: List[Dict], start_date: date, end_date: date) -> int:
+    """Process raw sessions and reconcile them with the database for a date range"""
+    processed_records = process_session_records(sessions_data)
+    session_ids = set(record['session_id'] for record in processed_records)
+    processed_sessions = [record for record in processed_records if start_date <= record['date'] <= end_date]
     
     if session_ids:
         try:
-            existing_ids = get_existing_session_ids(start_date, end_date)
-            ids_to_delete = existing_ids - session_ids
-            
-            if ids_to_delete:
-                to_delete = RizeSessions.query\
-                    .filter(RizeSessions.session_id.in_(ids_to_delete))\
-                    .filter(RizeSessions.date.between(start_date, end_date))\
-                    .all()
-                
-                if to_delete:
-                    logger.info(f"Found sessions to delete within date range {start_date} to {end_date}:")
-                    for session_to_delete in to_delete:
-                        logger.info(f"Deleting session: {session_to_delete.session_id} "
-                                  f"from {session_to_delete.date} "
-                                  f"(start: {session_to_delete.start_time}, "
-                                  f"end: {session_to_delete.end_time})")
-                    
-                    RizeSessions.query\
-                        .filter(RizeSessions.session_id.in_(ids_to_delete))\
-                        .filter(RizeSessions.date.between(start_date, end_date))\
-                        .delete(synchronize_session=False)
-                    db.session.commit()
+            deleted_count = delete_missing(
+                RizeSessions, 'session_id', session_ids,
+                RizeSessions.date.between(start_date, end_date)
+            )
+            if deleted_count:
+                logger.info(f"Deleted {deleted_count} sessions no longer in Rize "
+                            f"within date range {start_date} to {end_date}")
+            db.session.commit()
         except Exception as e:
             db.session.rollback()
             logger.error(f"Error managing sessions: {str(e)}")
@@ -129,35 +213,41 @@ def update_rize_sessions(start_date: Optional[date] = None, end_date: Optional[d
     
     if processed_sessions:
         try:
-            for session in processed_sessions:
-                existing = RizeSessions.query.filter_by(session_id=session['session_id']).first()
-                if existing:
-                    for key, value in session.items():
-                        if key != 'created_at':
-                            setattr(existing, key, value)
-                else:
-                    new_session = RizeSessions(**session)
-                    db.session.add(new_session)
+            result = bulk_upsert(RizeSessions, processed_sessions, update_exclude=('created_at',))
             db.session.commit()
+            logger.info(f"Rize sessions upserted: {result}")
         except Exception as e:
             db.session.rollback()
             logger.error(f"Error upserting sessions: {str(e)}")
             raise
+    
+    try:
+        if not has_hourly_rollups():
+            # Databases from before the rollups existed have sessions but no rollups; fill in every date once
+            logger.info("No Rize hourly rollups yet; building them for every stored session")
+            rebuild_all_hourly_rollups()
+        else:
+            # Sessions dated by UTC start can land on the neighbouring local dates
+            rebuild_hourly_rollups(start_date - timedelta(days=1), end_date + timedelta(days=1))
+            db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error rebuilding Rize hourly rollups: {str(e)}")
+        raise
         
     return len(processed_sessions)
 
 def update_rize_summaries(start_date: Optional[date] = None, end_date: Optional[date] = None):
     """Update just the Rize summary data"""
-    if not (start_date and end_date):
-        start_date, end_date = get_date_range(RizeSummaries, 'date')
-        
-    start_date = start_date - timedelta(days=1)  # rize data can update as the day goes on
+    start_date, end_date, use_watermark = get_summaries_sync_range(start_date, end_date)
     
     logger.debug(f"Fetching Rize summaries for period {start_date} to {end_date}")
     
-    rize_api = RizeAPI(os.getenv('RIZE_API_KEY'))
-    summary_data = rize_api.get_summaries(start_date, end_date)
-    
+    summary_data = get_rize_api().get_summaries(start_date, end_date)
+    return save_rize_summaries(summary_data, start_date, end_date, use_watermark)
+
+def load_rize_summaries(summary_data: Dict) -> int:
+    """Process raw summary buckets and upsert them"""
     summary_records = []
     if summary_data and 'buckets' in summary_data:
         for bucket in summary_data['buckets']:
@@ -170,15 +260,9 @@ def update_rize_summaries(start_date: Optional[date] = None, end_date: Optional[
     
     if summary_records:
         try:
-            for summary in summary_records:
-                existing = RizeSummaries.query.filter_by(date=summary['date']).first()
-                if existing:
-                    for key, value in summary.items():
-                        setattr(existing, key, value)
-                else:
-                    new_summary = RizeSummaries(**summary)
-                    db.session.add(new_summary)
+            result = bulk_upsert(RizeSummaries, summary_records)
             db.session.commit()
+            logger.info(f"Rize summaries upserted: {result}")
         except Exception as e:
             db.session.rollback()
             logger.error(f"Error upserting summaries: {str(e)}")
@@ -189,8 +273,21 @@ def update_rize_summaries(start_date: Optional[date] = None, end_date: Optional[
 def update_rize_data(start_date: Optional[date] = None, end_date: Optional[date] = None):
     """Main update function that calls both session and summary updates"""
     try:
-        sessions_count = update_rize_sessions(start_date, end_date)
-        summaries_count = update_rize_summaries(start_date, end_date)
+        sessions_start, sessions_end, sessions_watermark = get_sessions_sync_range(start_date, end_date)
+        summaries_start, summaries_end, summaries_watermark = get_summaries_sync_range(start_date, end_date)
+        
+        logger.debug(f"Fetching Rize sessions for period {sessions_start} to {sessions_end} "
+                     f"and summaries for period {summaries_start} to {summaries_end}")
+        
+        # Sessions and summaries come back from a single combined request
+        sessions_data, summary_data = get_rize_api().get_sessions_and_summaries(
+            *get_sessions_fetch_window(sessions_start, sessions_end),
+            summaries_start,
+            summaries_end
+        )
+        
+        sessions_count = save_rize_sessions(sessions_data, sessions_start, sessions_end, sessions_watermark)
+        summaries_count = save_rize_summaries(summary_data, summaries_start, summaries_end, summaries_watermark)
         
         logger.info(f"Rize data update completed successfully: "
                    f"{sessions_count} sessions, {summaries_count} daily summaries")
@@ -198,6 +295,31 @@ def update_rize_data(start_date: Optional[date] = None, end_date: Optional[date]
         logger.error(f"Error updating Rize data: {str(e)}")
         raise
 
+def replay_rize_data(start_date: Optional[date] = None, end_date: Optional[date] = None):
+    """Rebuild Rize sessions and summaries from stored raw payloads without calling the API"""
+    store = get_payload_store()
+    sessions_count = 0
+    summaries_count = 0
+    
+    try:
+        for ref in store.iter_windows('rize_sessions', start_date=start_date, end_date=end_date):
+            for sessions_data in store.load_window(ref):
+                sessions_count += load_rize_sessions(
+                    sessions_data,
+                    date.fromisoformat(ref['start_date']),
+                    date.fromisoformat(ref['end_date'])
+                )
+        
+        for ref in store.iter_windows('rize_summaries', start_date=start_date, end_date=end_date):
+            for summary_data in store.load_window(ref):
+                summaries_count += load_rize_summaries(summary_data)
+        
+        logger.info(f"Rize data replay completed successfully: "
+                   f"{sessions_count} sessions, {summaries_count} daily summaries")
+    except Exception as e:
+        logger.error(f"Error replaying Rize data: {str(e)}")
+        raise
+
 if __name__ == "__main__":
     app = create_app()
     
@@ -0,0 +1,123 @@
+import os
+import sys
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, '../../..'))
+sys.path.append(PROJECT_ROOT)
+
+from datetime import datetime, date, time, timedelta
+from typing import Dict, List, Optional, Tuple
+from flask import current_app
+from sqlalchemy import func, insert
+
+from app.extensions import db
+from app import create_app
+from app.blueprints.rize.aggregation import rollup_rows, DEFAULT_RIZE_USER_ID
+from database.models import RizeSessions, RizeHourlyRollups
+from utils.logging_config import setup_logging
+from utils.timezone_timeline import get_timezone_timeline
+
+logger = setup_logging()
+
+def get_offsets_by_date(date_strings: List[str]) -> Dict[str, int]:
+    """Get the Rize user's UTC offset in minutes for each local date"""
+    timeline = get_timezone_timeline(current_app.config.get('RIZE_USER_ID', DEFAULT_RIZE_USER_ID))
+    return timeline.offsets_by_date(date_strings)
+
+def rebuild_hourly_rollups(local_start: date, local_end: date) -> int:
+    """
+    Recompute RizeHourlyRollups for a range of local dates from RizeSessions.
+
+    Existing rollups for the range are replaced, so sessions deleted since the
+    last rebuild drop out. The caller commits.
+
+    Args:
+        local_start: First local date to rebuild (inclusive)
+        local_end: Last local date to rebuild (inclusive)
+
+    Returns:
+        int: Number of rollup rows written
+    """
+    date_strings = [(local_start + timedelta(days=i)).isoformat()
+                    for i in range((local_end - local_start).days + 1)]
+    if not date_strings:
+        return 0
+
+    offsets_by_date = get_offsets_by_date(date_strings)
+
+    # UTC span covered by the local dates
+    utc_start = datetime.combine(local_start, time.min) - timedelta(minutes=max(offsets_by_date.values()))
+    utc_end = datetime.combine(local_end, time.max) - timedelta(minutes=min(offsets_by_date.values()))
+
+    sessions = db.session.query(RizeSessions.start_time, RizeSessions.end_time, RizeSessions.type).filter(
+        RizeSessions.end_time >= utc_start,
+        RizeSessions.start_time <= utc_end
+    ).all()
+
+    rows = rollup_rows(sessions, date_strings, offsets_by_date)
+
+    RizeHourlyRollups.query\
+        .filter(RizeHourlyRollups.local_date.between(local_start, local_end))\
+        .delete(synchronize_session=False)
+    if rows:
+        db.session.execute(insert(RizeHourlyRollups), rows)
+
+    logger.info(f"Rize hourly rollups rebuilt for {local_start} to {local_end}: "
+                f"{len(sessions)} sessions, {len(rows)} rows")
+    return len(rows)
+
+def rebuild_all_hourly_rollups() -> int:
+    """Recompute the rollups for every date that has Rize sessions"""
+    first_start, last_end = db.session.query(
+        func.min(RizeSessions.start_time), func.max(RizeSessions.end_time)
+    ).one()
+    if first_start is None:
+        return 0
+
+    try:
+        rows_count = rebuild_hourly_rollups(first_start.date() - timedelta(days=1), last_end.date() + timedelta(days=1))
+        db.session.commit()
+        return rows_count
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error rebuilding Rize hourly rollups: {str(e)}")
+        raise
+
+def rebuild_rollups_for_timezone_change(user_id: int, changed: Optional[Tuple[date, date]]) -> int:
+    """
+    Re-bucket the rollups of local dates whose UTC offset changed.
+
+    Only the Rize user's timeline buckets sessions, so other users are a no-op.
+    The range is clipped to the dates that have sessions. The caller commits.
+
+    Args:
+        user_id: User whose timezone timeline was rebuilt
+        changed: Changed local dates as returned by rebuild_timezone_timeline
+
+    Returns:
+        int: Number of rollup rows written
+    """
+    if changed is None or user_id != current_app.config.get('RIZE_USER_ID', DEFAULT_RIZE_USER_ID):
+        return 0
+
+    first_start, last_end = db.session.query(
+        func.min(RizeSessions.start_time), func.max(RizeSessions.end_time)
+    ).one()
+    if first_start is None:
+        return 0
+
+    local_start = max(changed[0], first_start.date() - timedelta(days=1))
+    local_end = min(changed[1], last_end.date() + timedelta(days=1))
+    if local_start > local_end:
+        return 0
+    return rebuild_hourly_rollups(local_start, local_end)
+
+def has_hourly_rollups() -> bool:
+    """Whether any rollup rows exist yet"""
+    return db.session.query(RizeHourlyRollups.local_date).first() is not None
+
+if __name__ == "__main__":
+    app = create_app()
+
+    with app.app_context():
+        rebuild_all_hourly_rollups()
@@ -0,0 +1,146 @@
+import gzip
+import hashlib
+import json
+import os
+import uuid
+from datetime import date, datetime
+from threading import Lock
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from flask import current_app, has_app_context
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, '..'))
+DEFAULT_STORE_DIR = os.path.join(PROJECT_ROOT, 'data', 'payloads')
+
+class PayloadStore:
+    """
+    Compressed, content-addressed store for raw provider responses.
+
+    Payloads are written once to objects/<sha256[:2]>/<sha256>.json.gz, so identical
+    responses are only stored once. A small JSON ref per provider/user/date window
+    lists the objects that made up the latest fetch of that window:
+
+        refs/<provider>/<user_id or 'global'>/<start_date>_<end_date>.json
+
+    Replaying the refs in fetch order rebuilds the tables without any network calls.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or DEFAULT_STORE_DIR
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.root, 'objects', digest[:2], f"{digest}.json.gz")
+
+    def _ref_dir(self, provider: str, user_id: Optional[int] = None) -> str:
+        return os.path.join(self.root, 'refs', provider, str(user_id) if user_id is not None else 'global')
+
+    def _write_atomic(self, path: str, data: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def put(self, payload) -> str:
+        """
+        Store a JSON-serializable payload.
+
+        Returns:
+            str: SHA-256 digest of the canonical JSON encoding
+        """
+        data = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str).encode()
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            self._write_atomic(path, gzip.compress(data))
+        return digest
+
+    def get(self, digest: str):
+        """Load a payload by digest."""
+        with gzip.open(self._object_path(digest), 'rb') as f:
+            return json.loads(f.read())
+
+    def save_window(self, provider: str, user_id: Optional[int], start_date: date, end_date: date, digests: List[str]):
+        """Point the provider/user/window ref at the given objects."""
+        ref = {
+            'provider': provider,
+            'user_id': user_id,
+            'start_date': start_date.isoformat(),
+            'end_date': end_date.isoformat(),
+            'fetched_at': datetime.utcnow().isoformat(),
+            'objects': digests
+        }
+        path = os.path.join(self._ref_dir(provider, user_id), f"{start_date.isoformat()}_{end_date.isoformat()}.json")
+        self._write_atomic(path, json.dumps(ref).encode())
+
+    def save(self, provider: str, user_id: Optional[int], start_date: date, end_date: date, payload):
+        """Store a single-response payload for a window."""
+        self.save_window(provider, user_id, start_date, end_date, [self.put(payload)])
+
+    def record_pages(self, provider: str, user_id: Optional[int], start_date: date, end_date: date,
+                     pages: Iterable) -> Iterator:
+        """
+        Store each page of a paginated response as it streams past.
+
+        The window's ref is only written once every page has been consumed, so a
+        partial fetch never replaces a complete one.
+        """
+        digests = []
+        for page in pages:
+            digests.append(self.put(page))
+            yield page
+        self.save_window(provider, user_id, start_date, end_date, digests)
+
+    def iter_windows(self, provider: str, user_id: Optional[int] = None,
+                     start_date: Optional[date] = None, end_date: Optional[date] = None) -> List[Dict]:
+        """
+        List stored windows for a provider in the order they were fetched.
+
+        Args:
+            provider: Provider name, e.g. 'oura_sleep'
+            user_id: Only return this user's windows. Defaults to every user (and global windows).
+            start_date: Only return windows ending on or after this date
+            end_date: Only return windows starting on or before this date
+        """
+        provider_dir = os.path.join(self.root, 'refs', provider)
+        if not os.path.isdir(provider_dir):
+            return []
+
+        user_dirs = [self._ref_dir(provider, user_id)] if user_id is not None else [
+            os.path.join(provider_dir, name) for name in os.listdir(provider_dir)
+        ]
+
+        refs = []
+        for user_dir in user_dirs:
+            if not os.path.isdir(user_dir):
+                continue
+            for name in os.listdir(user_dir):
+                if not name.endswith('.json'):
+                    continue
+                with open(os.path.join(user_dir, name)) as f:
+                    ref = json.load(f)
+                if start_date and date.fromisoformat(ref['end_date']) < start_date:
+                    continue
+                if end_date and date.fromisoformat(ref['start_date']) > end_date:
+                    continue
+                refs.append(ref)
+
+        return sorted(refs, key=lambda ref: ref['fetched_at'])
+
+    def load_window(self, ref: Dict) -> Iterator:
+        """Yield the stored payloads of a window one at a time."""
+        for digest in ref['objects']:
+            yield self.get(digest)
+
+_stores: Dict[str, PayloadStore] = {}
+_stores_lock = Lock()
+
+def get_payload_store() -> PayloadStore:
+    """Get the process-wide payload store for the configured PAYLOAD_STORE_DIR."""
+    root = current_app.config.get('PAYLOAD_STORE_DIR') if has_app_context() else None
+    root = root or DEFAULT_STORE_DIR
+    with _stores_lock:
+        if root not in _stores:
+            _stores[root] = PayloadStore(root)
+        return _stores[root]
@@ -0,0 +1,71 @@
+from typing import Iterable, Optional, Type
+
+from flask import current_app
+from sqlalchemy import Column, MetaData, Table, delete, exists, select, text
+
+from app.extensions import db
+from etl.bulk_upsert import DEFAULT_CHUNK_SIZE
+
+def _create_staging_table(connection, model_class: Type, key_column: str) -> Table:
+    """Create a temporary single-column table for the model's key on this connection."""
+    key_type = model_class.__table__.c[key_column].type
+    staging = Table(
+        f"staging_{model_class.__tablename__}_keys",
+        MetaData(),
+        Column('key', key_type, primary_key=True),
+        prefixes=['TEMPORARY']
+    )
+    staging.create(bind=connection)
+    return staging
+
+def _drop_staging_table(connection, staging: Table):
+    # A plain DROP TABLE commits the open transaction on MySQL; DROP TEMPORARY TABLE doesn't
+    if connection.dialect.name in ('mysql', 'mariadb'):
+        connection.execute(text(f"DROP TEMPORARY TABLE IF EXISTS {staging.name}"))
+    else:
+        staging.drop(bind=connection, checkfirst=True)
+
+def delete_missing(
+    model_class: Type,
+    key_column: str,
+    keys: Iterable,
+    *filters,
+    chunk_size: Optional[int] = None
+) -> int:
+    """
+    Delete rows whose key is not among the given keys.
+
+    The keys are bulk-loaded into a temporary staging table on the session's
+    connection and the stale rows are removed with one anti-join DELETE, so
+    neither the existing keys nor the stale rows are loaded into Python.
+    The caller commits.
+
+    Args:
+        model_class: SQLAlchemy model class to reconcile
+        key_column: Name of the key column (e.g. session_id)
+        keys: Keys of every row that should be kept
+        *filters: Conditions limiting which rows are reconciled (e.g. a date window)
+        chunk_size: Keys per insert. Defaults to ETL_UPSERT_CHUNK_SIZE.
+
+    Returns:
+        int: Number of rows deleted
+    """
+    if chunk_size is None:
+        chunk_size = current_app.config.get('ETL_UPSERT_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+
+    table = model_class.__table__
+    key_rows = [{'key': key} for key in dict.fromkeys(keys)]
+    connection = db.session.connection()
+    staging = _create_staging_table(connection, model_class, key_column)
+
+    try:
+        for chunk_start in range(0, len(key_rows), chunk_size):
+            connection.execute(staging.insert(), key_rows[chunk_start:chunk_start + chunk_size])
+
+        stale = delete(table).where(
+            *filters,
+            ~exists(select(staging.c.key).where(staging.c.key == table.c[key_column]))
+        )
+        return connection.execute(stale).rowcount
+    finally:
+        _drop_staging_table(connection, staging)
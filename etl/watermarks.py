@@ -0,0 +1,116 @@
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional, Tuple, Type
+
+from app.extensions import db
+from database.models import SyncWatermarks
+from utils.date_utils import get_date_range
+
+GLOBAL_USER_ID = 0  # Watermark key for sources that aren't per-user
+
+def load_watermarks(source: str) -> Dict[int, Dict]:
+    """
+    Load every user's watermark for a source in a single query.
+
+    Returns:
+        Dict[int, Dict]: Watermark values keyed by user_id (GLOBAL_USER_ID for global sources).
+            Plain dicts, so they can be handed to worker threads.
+    """
+    rows = SyncWatermarks.query.filter_by(source=source).all()
+    return {
+        row.user_id: {
+            'last_synced_at': row.last_synced_at,
+            'last_covered_date': row.last_covered_date,
+            'cursor': row.cursor
+        }
+        for row in rows
+    }
+
+def get_sync_range(
+    source: str,
+    model_class: Type,
+    date_column: str = 'date',
+    user_id: Optional[int] = None,
+    watermarks: Optional[Dict[int, Dict]] = None
+) -> Tuple[date, date]:
+    """
+    Get the date range to sync from the source's watermark.
+
+    Returns the same range get_date_range() would: from the day after the last
+    covered date to tomorrow. Falls back to get_date_range()'s MAX() scan only
+    when the source has no watermark yet.
+
+    Args:
+        source: Source name, e.g. 'oura_sleep'
+        model_class: Model used for the one-off fallback scan
+        date_column: Date column used for the fallback scan
+        user_id: Optional user ID for per-user sources
+        watermarks: Optional pre-loaded result of load_watermarks(source)
+    """
+    if watermarks is None:
+        watermarks = load_watermarks(source)
+
+    watermark = watermarks.get(user_id if user_id is not None else GLOBAL_USER_ID)
+    if not watermark or not watermark['last_covered_date']:
+        return get_date_range(model_class, date_column, user_id=user_id)
+
+    end_date = date.today() + timedelta(days=1)  # Include today's data
+    start_date = watermark['last_covered_date'] + timedelta(days=1)
+    if start_date > end_date:
+        return end_date, end_date
+    return start_date, end_date
+
+def advance_watermark(source: str, covered_through: date, user_id: Optional[int] = None, cursor: Optional[str] = None):
+    """
+    Advance a source's watermark inside the caller's transaction.
+
+    The row is locked while it is read and updated. The covered date never moves
+    backwards and is capped at yesterday, so today is synced again on the next run.
+    The caller commits, normally together with the data it just loaded.
+
+    Args:
+        source: Source name, e.g. 'oura_sleep'
+        covered_through: Last date of the range that was synced
+        user_id: Optional user ID for per-user sources
+        cursor: Optional provider cursor to store
+    """
+    user_id = user_id if user_id is not None else GLOBAL_USER_ID
+    watermark = SyncWatermarks.query\
+        .filter_by(source=source, user_id=user_id)\
+        .with_for_update()\
+        .first()
+
+    if watermark is None:
+        watermark = SyncWatermarks(source=source, user_id=user_id)
+        db.session.add(watermark)
+
+    covered_through = min(covered_through, date.today() - timedelta(days=1))
+    if watermark.last_covered_date is None or covered_through > watermark.last_covered_date:
+        watermark.last_covered_date = covered_through
+
+    watermark.last_synced_at = datetime.utcnow()
+    if cursor is not None:
+        watermark.cursor = cursor
+
+def get_cursor(source: str, user_id: Optional[int] = None) -> Optional[str]:
+    """Get the provider cursor stored with a source's watermark, if any."""
+    user_id = user_id if user_id is not None else GLOBAL_USER_ID
+    watermark = SyncWatermarks.query.filter_by(source=source, user_id=user_id).first()
+    return watermark.cursor if watermark else None
+
+def save_cursor(source: str, cursor: str, user_id: Optional[int] = None):
+    """
+    Store a provider cursor without moving the covered date.
+
+    Like advance_watermark(), the row is locked and the caller commits.
+    """
+    user_id = user_id if user_id is not None else GLOBAL_USER_ID
+    watermark = SyncWatermarks.query\
+        .filter_by(source=source, user_id=user_id)\
+        .with_for_update()\
+        .first()
+
+    if watermark is None:
+        watermark = SyncWatermarks(source=source, user_id=user_id)
+        db.session.add(watermark)
+
+    watermark.cursor = cursor
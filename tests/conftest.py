@@ -0,0 +1,29 @@
+import os
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from config import Config
+from app import create_app  # before database.models, which the app package imports first
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+
+@pytest.fixture
+def app(tmp_path):
+    """App on a fresh in-memory SQLite database, with an app context pushed."""
+    from app.extensions import db
+
+    class AppConfig(TestConfig):
+        PAYLOAD_STORE_DIR = str(tmp_path / 'payloads')
+
+    app = create_app(AppConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
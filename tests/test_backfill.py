@@ -0,0 +1,47 @@
+from datetime import date
+
+from app.extensions import db
+from database.models import Users, BackfillWindows
+from etl.backfill import create_backfill, has_pending_windows, plan_windows, run_backfill
+
+def make_user():
+    user = Users('backfill', 'backfill@example.com', 'password')
+    db.session.add(user)
+    db.session.commit()
+    return user.user_id
+
+def test_plan_windows_covers_the_range():
+    assert plan_windows(date(2024, 1, 1), date(2024, 1, 25), 10) == [
+        (date(2024, 1, 1), date(2024, 1, 10)),
+        (date(2024, 1, 11), date(2024, 1, 20)),
+        (date(2024, 1, 21), date(2024, 1, 25)),
+    ]
+
+def test_completed_plan_that_was_never_removed_is_replanned(app):
+    user_id = make_user()
+    create_backfill(user_id, 'oura_sleep', date(2024, 1, 1), date(2024, 1, 25), 10)
+
+    # The run stopped after the last window completed but before the plan was removed
+    BackfillWindows.query.update({'status': 'complete'})
+    db.session.commit()
+    assert not has_pending_windows(user_id, 'oura_sleep')
+
+    assert create_backfill(user_id, 'oura_sleep', date(2024, 1, 1), date(2024, 1, 25), 10) == 3
+    assert BackfillWindows.query.filter_by(status='pending').count() == 3
+
+    loaded = []
+    assert run_backfill(app, user_id, 'oura_sleep', lambda start, end: loaded.append((start, end)))
+    assert len(loaded) == 3
+    assert BackfillWindows.query.count() == 0
+
+def test_failed_window_is_kept_for_the_next_run(app):
+    user_id = make_user()
+    create_backfill(user_id, 'oura_sleep', date(2024, 1, 1), date(2024, 1, 25), 10)
+
+    def load_window(start, end):
+        if start == date(2024, 1, 11):
+            raise RuntimeError("API error")
+
+    assert not run_backfill(app, user_id, 'oura_sleep', load_window, max_workers=2)
+    pending = BackfillWindows.query.filter_by(status='pending').all()
+    assert [window.window_start for window in pending] == [date(2024, 1, 11)]
@@ -0,0 +1,64 @@
+import threading
+
+import pytest
+
+from etl.batch_job import DataSource, run_sources, validate_dependencies
+from database.models import SleepData
+from utils.blinkstick import StatusManager
+
+def make_source(name, calls, depends_on=None, fail=False):
+    def update(start_date, end_date):
+        calls.append(name)
+        if fail:
+            raise RuntimeError(f"{name} failed")
+    return DataSource(name, update, SleepData, depends_on=depends_on)
+
+def test_dependents_run_after_their_dependencies(app):
+    calls = []
+    sources = [
+        make_source('Rize', calls, depends_on=['Oura Sleep']),
+        make_source('Oura Sleep', calls),
+        make_source('Sheets', calls),
+    ]
+    results = run_sources(app, sources, StatusManager(headless=True), max_workers=3)
+    assert results == {'Rize': True, 'Oura Sleep': True, 'Sheets': True}
+    assert calls.index('Oura Sleep') < calls.index('Rize')
+
+def test_single_worker_runs_sources_in_order(app):
+    calls = []
+    sources = [make_source(name, calls) for name in ('A', 'B', 'C')]
+    run_sources(app, sources, StatusManager(headless=True), max_workers=1)
+    assert calls == ['A', 'B', 'C']
+
+def test_failed_dependency_skips_its_dependents(app):
+    calls = []
+    sources = [
+        make_source('Oura Sleep', calls, fail=True),
+        make_source('Rize', calls, depends_on=['Oura Sleep']),
+        make_source('Report', calls, depends_on=['Rize']),
+        make_source('Sheets', calls),
+    ]
+    status_manager = StatusManager(headless=True)
+    results = run_sources(app, sources, status_manager, max_workers=2)
+    assert results == {'Oura Sleep': False, 'Rize': False, 'Report': False, 'Sheets': True}
+    assert sorted(calls) == ['Oura Sleep', 'Sheets']
+    assert status_manager.get_state() == {'Oura Sleep': 'failed', 'Sheets': 'succeeded'}
+
+def test_independent_sources_run_concurrently(app):
+    # Each source waits for the other, so this only finishes if both run at once
+    both_started = threading.Barrier(2)
+
+    def update(start_date, end_date):
+        both_started.wait(timeout=5)
+
+    sources = [DataSource('A', update, SleepData), DataSource('B', update, SleepData)]
+    results = run_sources(app, sources, StatusManager(headless=True), max_workers=2)
+    assert results == {'A': True, 'B': True}
+
+def test_unknown_dependency_is_rejected():
+    with pytest.raises(ValueError, match='unknown source'):
+        validate_dependencies([make_source('Rize', [], depends_on=['Oura'])])
+
+def test_dependency_cycle_is_rejected():
+    with pytest.raises(ValueError, match='Circular dependency'):
+        validate_dependencies([make_source('A', [], depends_on=['B']), make_source('B', [], depends_on=['A'])])
@@ -0,0 +1,49 @@
+from utils.blinkstick import StatusManager, GREEN, RED, OFF
+
+class RecordingBackend:
+    def __init__(self):
+        self.colors = []
+
+    def set_color(self, red=0, green=0, blue=0):
+        self.colors.append((red, green, blue))
+
+    def turn_off(self):
+        self.colors.append(OFF)
+
+def run(outcomes):
+    backend = RecordingBackend()
+    status_manager = StatusManager(backend=backend)
+    for name, success in outcomes:
+        status_manager.start_process(name)
+    for name, success in outcomes:
+        status_manager.end_process(success=success, process_name=name)
+    status_manager.cleanup()
+    return backend.colors, status_manager.get_state()
+
+def test_result_stays_visible_after_cleanup():
+    colors, state = run([('A', True), ('B', True)])
+    assert colors[-1] == GREEN
+    assert state == {'A': 'succeeded', 'B': 'succeeded'}
+
+def test_any_failure_shows_red():
+    colors, state = run([('A', True), ('B', False)])
+    assert colors[-1] == RED
+    assert state['B'] == 'failed'
+
+def test_cleanup_while_running_turns_off():
+    backend = RecordingBackend()
+    status_manager = StatusManager(backend=backend)
+    status_manager.start_process('A')
+    status_manager.cleanup()
+    assert backend.colors[-1] == OFF
+
+def test_earlier_failure_stays_red_after_a_later_success():
+    # Sources that don't overlap, e.g. with max_workers=1 or a dependency between them
+    backend = RecordingBackend()
+    status_manager = StatusManager(backend=backend)
+    status_manager.start_process('Oura Sleep')
+    status_manager.end_process(success=False, process_name='Oura Sleep')
+    status_manager.start_process('Finances')
+    status_manager.end_process(success=True, process_name='Finances')
+    status_manager.cleanup()
+    assert backend.colors[-1] == RED
@@ -0,0 +1,54 @@
+from datetime import date
+from decimal import Decimal
+
+from app.extensions import db
+from database.models import Finances, Vitals
+from etl.bulk_upsert import bulk_upsert, UpsertResult
+
+def vitals(day, weight):
+    return {'date': date(2024, 3, day), 'wake_up_time': None, 'sleep_minutes': 420,
+            'weight': weight, 'nap_minutes': 0, 'drinks': 0}
+
+def finance(transaction_hash, amount):
+    return {'transaction_hash': transaction_hash, 'transaction_date': date(2024, 3, 1),
+            'description': 'Groceries', 'amount': Decimal(amount), 'category': 'Food',
+            'transaction_type': 'Expense'}
+
+def test_counts_inserts_updates_and_unchanged_rows(app):
+    assert bulk_upsert(Vitals, [vitals(1, 80.0), vitals(2, 80.5)]) == UpsertResult(inserted=2)
+    db.session.commit()
+
+    result = bulk_upsert(Vitals, [vitals(1, 80.0), vitals(2, 81.0), vitals(3, 81.5)])
+    db.session.commit()
+    assert result == UpsertResult(inserted=1, updated=1, unchanged=1)
+    assert result.total == 3
+    assert db.session.get(Vitals, date(2024, 3, 2)).weight == 81.0
+    assert Vitals.query.count() == 3
+
+def test_rows_without_a_fingerprint_are_rewritten_once(app):
+    bulk_upsert(Vitals, [vitals(1, 80.0)])
+    Vitals.query.update({'fingerprint': None})
+    db.session.commit()
+
+    assert bulk_upsert(Vitals, [vitals(1, 80.0)]) == UpsertResult(updated=1)
+    db.session.commit()
+    assert bulk_upsert(Vitals, [vitals(1, 80.0)]) == UpsertResult(unchanged=1)
+
+def test_models_without_a_fingerprint_compare_values(app):
+    bulk_upsert(Finances, [finance('a', '10.00'), finance('b', '20.00')], update_exclude=('created_at',))
+    db.session.commit()
+
+    result = bulk_upsert(Finances, [finance('a', '10.00'), finance('b', '25.00')], update_exclude=('created_at',))
+    db.session.commit()
+    assert result == UpsertResult(updated=1, unchanged=1)
+    assert db.session.get(Finances, 'b').amount == Decimal('25.00')
+
+def test_empty_input_writes_nothing(app):
+    assert bulk_upsert(Vitals, []) == UpsertResult()
+
+def test_small_chunks_give_the_same_counts(app):
+    bulk_upsert(Vitals, [vitals(day, 80.0) for day in range(1, 6)], chunk_size=2)
+    db.session.commit()
+
+    result = bulk_upsert(Vitals, [vitals(day, 80.0 + day % 2) for day in range(1, 8)], chunk_size=2)
+    assert result == UpsertResult(inserted=2, updated=3, unchanged=2)
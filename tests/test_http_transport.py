@@ -0,0 +1,99 @@
+import pytest
+import requests
+
+from etl.data_sources.http_transport import CircuitBreaker, CircuitOpenError, HttpTransport
+
+def make_response(status_code):
+    response = requests.Response()
+    response.status_code = status_code
+    return response
+
+class FakeSession:
+    """Stands in for requests.Session, replaying a list of responses or exceptions."""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def request(self, method, url, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return make_response(outcome)
+
+def make_transport(outcomes, failure_threshold=1, reset_timeout=0):
+    transport = HttpTransport(
+        'test', max_retries=0,
+        circuit_breaker=CircuitBreaker('test', failure_threshold=failure_threshold, reset_timeout=reset_timeout)
+    )
+    transport.session = FakeSession(outcomes)
+    return transport
+
+def test_breaker_opens_after_threshold_and_fails_fast():
+    breaker = CircuitBreaker('test', failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    assert not breaker.is_open
+    breaker.record_failure()
+    assert breaker.is_open
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+
+def test_breaker_success_resets_failure_count():
+    breaker = CircuitBreaker('test', failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert not breaker.is_open
+
+def test_half_open_allows_a_single_trial():
+    breaker = CircuitBreaker('test', failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    breaker.before_request()  # the trial
+    assert breaker.trial_in_flight
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+
+def test_failed_trial_reopens_and_successful_trial_closes():
+    breaker = CircuitBreaker('test', failure_threshold=3, reset_timeout=0)
+    for _ in range(3):
+        breaker.record_failure()
+    breaker.before_request()
+    breaker.record_failure()
+    assert breaker.is_open and not breaker.trial_in_flight
+
+    breaker.before_request()
+    breaker.record_success()
+    assert not breaker.is_open and breaker.failures == 0
+
+def test_half_open_trial_rate_limited_then_recovers():
+    transport = make_transport([500, 429, 200])
+
+    assert transport.get('https://example.test').status_code == 500
+    assert transport.circuit_breaker.is_open
+
+    # The trial gets rate limited: the provider is up, so the circuit closes
+    assert transport.get('https://example.test').status_code == 429
+    assert not transport.circuit_breaker.is_open
+    assert not transport.circuit_breaker.trial_in_flight
+
+    assert transport.get('https://example.test').status_code == 200
+
+def test_trial_raising_unexpected_error_does_not_stick():
+    transport = make_transport([500, requests.exceptions.InvalidURL('bad'), 200])
+
+    transport.get('https://example.test')
+    with pytest.raises(requests.exceptions.InvalidURL):
+        transport.get('https://example.test')
+    assert not transport.circuit_breaker.trial_in_flight
+
+    assert transport.get('https://example.test').status_code == 200
+
+def test_connection_errors_are_retried(monkeypatch):
+    monkeypatch.setattr('etl.data_sources.http_transport.time.sleep', lambda seconds: None)
+    transport = make_transport([requests.exceptions.ConnectionError('down'), 503, 200], failure_threshold=5)
+    transport.max_retries = 2
+
+    assert transport.get('https://example.test').status_code == 200
+    assert transport.session.calls == 3
+    assert transport.circuit_breaker.failures == 0
@@ -0,0 +1,111 @@
+import json
+import re
+
+from etl.data_sources.google_sheets.incremental import SheetSource, fetch_sheets, SHEET_BLOCK_ROWS
+from etl.payload_store import PayloadStore
+
+FINANCES = SheetSource('finances', 'spreadsheet', 'Finances', 'B')
+VITALS = SheetSource('vitals', 'spreadsheet', 'Vitals', 'B')
+
+class FakeSheetsAPI:
+    """Serves A1 ranges out of in-memory sheets and records every batchGet."""
+
+    def __init__(self, sheets):
+        self.sheets = sheets
+        self.version = {'modifiedTime': '2024-03-01T00:00:00Z', 'version': '1'}
+        self.requests = []
+
+    def edit(self):
+        self.version = dict(self.version, version=str(int(self.version['version']) + 1))
+
+    def get_file_version(self, spreadsheet_id):
+        return dict(self.version)
+
+    def get_sheet_ranges(self, spreadsheet_id, ranges):
+        self.requests.append(list(ranges))
+        values = []
+        for a1_range in ranges:
+            sheet_name, first, last = re.match(r"'(.+)'!A(\d*):[A-Z](\d*)$", a1_range).groups()
+            rows = self.sheets[sheet_name]
+            values.append(rows[int(first or 1) - 1:int(last) if last else len(rows)])
+        return values
+
+def rows(count, prefix='row'):
+    return [[f"{prefix} {i}", str(i)] for i in range(count)]
+
+def sync(api, store, cursors):
+    fetches = fetch_sheets(api, store, [FINANCES, VITALS], cursors)
+    return fetches, {source: fetch.cursor for source, fetch in fetches.items()}
+
+def test_unchanged_spreadsheet_is_not_downloaded(tmp_path):
+    api = FakeSheetsAPI({'Finances': rows(1203), 'Vitals': rows(40)})
+    store = PayloadStore(str(tmp_path))
+    fetches, cursors = sync(api, store, {})
+    assert api.requests == [["'Finances'!A:B", "'Vitals'!A:B"]]
+
+    api.requests = []
+    fetches, _ = sync(api, store, cursors)
+    assert api.requests == []
+    assert not fetches['finances'].downloaded
+    assert fetches['finances'].rows == api.sheets['Finances']
+
+def test_appended_rows_fetch_only_the_tail(tmp_path):
+    api = FakeSheetsAPI({'Finances': rows(1203), 'Vitals': rows(40)})
+    store = PayloadStore(str(tmp_path))
+    _, cursors = sync(api, store, {})
+
+    api.sheets['Finances'] += rows(2, prefix='new')
+    api.edit()
+    api.requests = []
+    fetches, _ = sync(api, store, cursors)
+
+    # Both sheets share one request: Finances' tail plus its last and rotating blocks
+    assert api.requests == [[
+        f"'Finances'!A{2 * SHEET_BLOCK_ROWS + 1}:B", "'Finances'!A1:B500", "'Finances'!A501:B1000",
+        "'Vitals'!A1:B"
+    ]]
+    assert fetches['finances'].rows == api.sheets['Finances']
+    assert fetches['vitals'].rows == api.sheets['Vitals']
+
+def test_inserted_row_above_the_tail_fetches_the_whole_sheet(tmp_path):
+    api = FakeSheetsAPI({'Finances': rows(1203), 'Vitals': rows(40)})
+    store = PayloadStore(str(tmp_path))
+    _, cursors = sync(api, store, {})
+
+    api.sheets['Finances'].insert(700, ['inserted', '-1'])
+    api.edit()
+    api.requests = []
+    fetches, cursors = sync(api, store, cursors)
+
+    assert len(api.requests) == 2
+    assert api.requests[1] == ["'Finances'!A:B"]
+    assert fetches['finances'].rows == api.sheets['Finances']
+    assert json.loads(cursors['finances'])['next_verify_block'] == 0
+
+def test_rotation_catches_an_edit_in_an_older_block(tmp_path):
+    api = FakeSheetsAPI({'Finances': rows(2103), 'Vitals': rows(40)})
+    store = PayloadStore(str(tmp_path))
+    _, cursors = sync(api, store, {})
+
+    # An edit in place in block 1 isn't seen while the rotation checks block 0
+    api.sheets['Finances'][SHEET_BLOCK_ROWS + 10] = ['edited', '0']
+    api.edit()
+    fetches, cursors = sync(api, store, cursors)
+    assert fetches['finances'].checked_blocks == [0, 3]
+    assert fetches['finances'].rows != api.sheets['Finances']
+
+    # The next run checks block 1, notices the edit and fetches everything
+    api.edit()
+    api.requests = []
+    fetches, cursors = sync(api, store, cursors)
+    assert fetches['finances'].rows == api.sheets['Finances']
+    assert api.requests[-1] == ["'Finances'!A:B"]
+
+def test_missing_snapshot_fetches_the_whole_sheet(tmp_path):
+    api = FakeSheetsAPI({'Finances': rows(1203), 'Vitals': rows(40)})
+    _, cursors = sync(api, PayloadStore(str(tmp_path / 'old')), {})
+
+    api.requests = []
+    fetches, _ = sync(api, PayloadStore(str(tmp_path / 'new')), cursors)
+    assert api.requests == [["'Finances'!A:B", "'Vitals'!A:B"]]
+    assert fetches['finances'].rows == api.sheets['Finances']
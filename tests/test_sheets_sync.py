@@ -0,0 +1,116 @@
+from dataclasses import replace
+from datetime import date, timedelta
+
+import pytest
+
+from database.models import Finances, Vitals, SyncWatermarks
+from etl.data_sources.google_sheets import finances, sheets, vitals
+from etl.data_sources.google_sheets.incremental import SheetFetch
+from etl.payload_store import get_payload_store
+
+VITALS_HEADER = ['Date', 'Wake Up', 'Sleep Mins', 'Weight', 'Nap (today)', 'Drinks']
+FINANCES_HEADER = ['Date', 'Description', 'Amount', 'Category', 'Transaction Type', 'Gift Type',
+                   'Person', 'Notes', 'Account Name', 'Date?', 'Vacation?', 'Birthday?', 'Christmas?']
+
+def fetched(sheet, rows):
+    """A finished fetch of the whole sheet, as fetch_sheets() hands it over."""
+    fetch = SheetFetch(sheet, get_payload_store(), None, None)
+    fetch.finish([rows])
+    return fetch
+
+def vitals_row(day):
+    return [day.isoformat(), '7:00:00 AM', '420', '80.5', '0', '0']
+
+def finance_row(day, amount='12.50'):
+    return [day.isoformat(), 'Groceries', amount, 'Food', 'Expense', '', '', '', 'Checking', '', '', '', '']
+
+def sync_vitals(rows):
+    start_date, end_date, use_watermark = vitals.get_vitals_sync_range()
+    vitals.save_vitals_sheet(fetched(vitals.VITALS_SHEET, [VITALS_HEADER] + rows), start_date, end_date, use_watermark)
+
+def sync_finances(rows):
+    start_date, end_date, use_watermark = finances.get_finance_sync_range()
+    finances.save_finance_sheet(fetched(finances.FINANCES_SHEET, [FINANCES_HEADER] + rows), start_date, end_date, use_watermark)
+
+def watermark(source):
+    return SyncWatermarks.query.filter_by(source=source).one().last_covered_date
+
+def test_vitals_row_typed_in_late_is_loaded(app):
+    today = date.today()
+    rows = [vitals_row(today - timedelta(days=days_ago)) for days_ago in (6, 5, 4)]
+    sync_vitals(rows)
+    assert watermark('vitals') == today - timedelta(days=4)
+
+    # The next days are filled in a few days late
+    rows += [vitals_row(today - timedelta(days=days_ago)) for days_ago in (3, 2)]
+    sync_vitals(rows)
+    assert Vitals.query.count() == 5
+    assert watermark('vitals') == today - timedelta(days=2)
+
+def test_finance_row_typed_in_late_is_loaded(app):
+    today = date.today()
+    rows = [finance_row(today - timedelta(days=5))]
+    sync_finances(rows)
+    assert watermark('finances') == today - timedelta(days=5)
+
+    rows.append(finance_row(today - timedelta(days=3), amount='40.00'))
+    sync_finances(rows)
+    assert Finances.query.count() == 2
+
+def test_rows_cursor_and_watermark_commit_together(app, monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError("interrupted")
+    monkeypatch.setattr(vitals, 'advance_watermark', fail)
+
+    with pytest.raises(RuntimeError):
+        sync_vitals([vitals_row(date.today() - timedelta(days=3))])
+    assert Vitals.query.count() == 0
+    assert SyncWatermarks.query.filter_by(source='vitals').count() == 0
+
+class FakeSheetsAPI:
+    """Serves whole sheets by name and records every batchGet."""
+
+    def __init__(self, sheet_rows):
+        self.sheet_rows = sheet_rows
+        self.requests = []
+
+    def get_file_version(self, spreadsheet_id):
+        return None
+
+    def get_sheet_ranges(self, spreadsheet_id, ranges):
+        self.requests.append(list(ranges))
+        return [self.sheet_rows[a1_range.split("'")[1]] for a1_range in ranges]
+
+def sheets_batch(monkeypatch, sheet_rows):
+    api = FakeSheetsAPI(sheet_rows)
+    monkeypatch.setattr(sheets, 'get_sheets_api', lambda: api)
+    batch = sheets.SheetsBatch()
+    batch.sheets = [replace(sheet, spreadsheet_id='shared') for sheet in batch.sheets]
+    return batch, api
+
+def test_finances_and_vitals_share_one_fetch(app, monkeypatch):
+    day = date.today() - timedelta(days=2)
+    batch, api = sheets_batch(monkeypatch, {
+        finances.SHEET_NAME: [FINANCES_HEADER, finance_row(day)],
+        vitals.SHEET_NAME: [VITALS_HEADER, vitals_row(day)],
+    })
+    batch.update_finances()
+    batch.update_vitals()
+
+    assert len(api.requests) == 1
+    assert Finances.query.count() == 1
+    assert Vitals.query.count() == 1
+
+def test_vitals_failure_leaves_finances_loaded(app, monkeypatch):
+    day = date.today() - timedelta(days=2)
+    batch, api = sheets_batch(monkeypatch, {
+        finances.SHEET_NAME: [FINANCES_HEADER, finance_row(day)],
+        vitals.SHEET_NAME: [['Not', 'the', 'vitals', 'header'], ['x', 'y', 'z', 'w']],
+    })
+    batch.update_finances()
+    with pytest.raises(Exception):
+        batch.update_vitals()
+
+    assert Finances.query.count() == 1
+    assert watermark('finances') == day
+    assert SyncWatermarks.query.filter_by(source='vitals').count() == 0
@@ -0,0 +1,24 @@
+from datetime import date
+
+from utils.timezone_timeline import TimezoneTimeline, build_intervals, changed_dates
+
+def timeline(*nights):
+    return TimezoneTimeline(build_intervals(nights))
+
+def test_identical_timelines_have_no_changes():
+    nights = [(date(2024, 3, 1), -420), (date(2024, 3, 5), -240)]
+    assert changed_dates(timeline(*nights), timeline(*nights)) is None
+
+def test_change_inside_the_timeline_is_bounded():
+    old = timeline((date(2024, 3, 1), -420), (date(2024, 3, 10), -420), (date(2024, 3, 20), -420))
+    new = timeline((date(2024, 3, 1), -420), (date(2024, 3, 10), 60), (date(2024, 3, 11), -420), (date(2024, 3, 20), -420))
+    assert changed_dates(old, new) == (date(2024, 3, 10), date(2024, 3, 10))
+
+def test_change_of_the_last_offset_is_open_ended():
+    old = timeline((date(2024, 3, 1), -420))
+    new = timeline((date(2024, 3, 1), -420), (date(2024, 3, 15), -240))
+    assert changed_dates(old, new) == (date(2024, 3, 15), date.max)
+
+def test_first_timeline_changes_everything_off_the_default():
+    assert changed_dates(TimezoneTimeline([]), timeline((date(2024, 3, 1), -420))) is None
+    assert changed_dates(TimezoneTimeline([]), timeline((date(2024, 3, 1), -240))) == (date.min, date.max)
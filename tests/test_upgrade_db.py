@@ -0,0 +1,21 @@
+from sqlalchemy import inspect, text
+
+from app.extensions import db
+from database.upgrade_db import ADDED_COLUMNS, upgrade_database
+
+def test_upgrade_adds_missing_columns_and_is_idempotent(app):
+    # Recreate one of the tables the way older databases have it
+    db.session.execute(text("DROP TABLE vitals"))
+    db.session.execute(text(
+        "CREATE TABLE vitals (date DATE PRIMARY KEY, wake_up_time DATETIME, "
+        "sleep_minutes INTEGER, weight FLOAT, nap_minutes INTEGER, drinks INTEGER, "
+        "created_at DATETIME, updated_at DATETIME)"
+    ))
+    db.session.commit()
+
+    upgrade_database(app)
+    upgrade_database(app)
+
+    inspector = inspect(db.engine)
+    for model, column_name in ADDED_COLUMNS:
+        assert column_name in {column['name'] for column in inspector.get_columns(model.__tablename__)}
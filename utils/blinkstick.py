@@ -1,60 +1,163 @@
 # utils/status_manager.py
 import time
-from threading import Thread, Event
-from blinkstick import blinkstick
-from typing import Optional
+from queue import Queue, Empty
+from threading import Thread, Lock
+from typing import Optional, Dict
+
+class NullBackend:
+    """Headless backend that ignores every color change."""
+
+    def set_color(self, red: int = 0, green: int = 0, blue: int = 0):
+        pass
+
+    def turn_off(self):
+        pass
+
+class BlinkStickBackend:
+    """Backend that drives a physical BlinkStick device."""
+
+    def __init__(self, device):
+        self.device = device
+
+    def set_color(self, red: int = 0, green: int = 0, blue: int = 0):
+        self.device.set_color(red=red, green=green, blue=blue)
+
+    def turn_off(self):
+        self.device.turn_off()
+
+def find_backend():
+    """Return a BlinkStick backend if a device is connected, otherwise a headless one."""
+    try:
+        from blinkstick import blinkstick
+        device = blinkstick.find_first()
+    except Exception:
+        device = None
+
+    if device is None:
+        print("No BlinkStick found - status indicators will be disabled")
+        return NullBackend()
+    return BlinkStickBackend(device)
+
+OFF = (0, 0, 0)
+BLUE = (0, 0, 255)
+GREEN = (0, 255, 0)
+RED = (255, 0, 0)
 
 class StatusManager:
-    def __init__(self):
-        self.current_process = None
-        self.stop_event = Event()
-        self.blink_thread: Optional[Thread] = None
-        # Initialize BlinkStick once
-        self.bstick = blinkstick.find_first()
-        if self.bstick is None:
-            print("No BlinkStick found - status indicators will be disabled")
-
-    def _blink_processing(self):
-        if not self.bstick:
-            return
-            
-        while not self.stop_event.is_set():
-            self.bstick.set_color(red=0, green=0, blue=255)  # Blue
-            time.sleep(0.5)
-            self.bstick.turn_off()
-            time.sleep(0.5)
-    
+    """
+    Event-driven status indicator.
+
+    ETL code only puts events on a queue, so start_process() and end_process()
+    return immediately. A single long-lived worker thread owns the device: it
+    blinks blue while any process is running and shows green (or red if any
+    process since the manager was created failed) for a couple of seconds once
+    everything has finished, or until the next run if cleanup() comes first.
+    """
+    BLINK_INTERVAL = 0.5
+    RESULT_DISPLAY_SECONDS = 2
+
+    def __init__(self, backend=None, headless: bool = False):
+        self.backend = NullBackend() if headless else (backend or find_backend())
+        self.current_process: Optional[str] = None
+        self._states: Dict[str, str] = {}
+        self._lock = Lock()
+        self._events: Queue = Queue()
+        self._color = None
+        self._worker = Thread(target=self._run, name='status-indicator', daemon=True)
+        self._worker.start()
+
     def start_process(self, process_name: str):
         """Start indicating a process is running"""
-        self.current_process = process_name
-        self.stop_event.clear()
-        
-        if self.blink_thread and self.blink_thread.is_alive():
-            self.stop_event.set()
-            self.blink_thread.join()
-        
-        self.blink_thread = Thread(target=self._blink_processing)
-        self.blink_thread.start()
-        
-    def end_process(self, success: bool):
-        """End current process with success/failure indication"""
-        self.stop_event.set()
-        if self.blink_thread:
-            self.blink_thread.join()
-        
-        if self.bstick:
-            if success:
-                self.bstick.set_color(red=0, green=255, blue=0)  # Green
-            else:
-                self.bstick.set_color(red=255, green=0, blue=0)  # Red
-            time.sleep(2)
-            self.bstick.turn_off()
-    
+        with self._lock:
+            self.current_process = process_name
+            self._states[process_name] = 'running'
+        self._events.put(('start', process_name, None))
+
+    def end_process(self, success: bool, process_name: Optional[str] = None):
+        """
+        End a process with success/failure indication.
+
+        Args:
+            success (bool): Whether the process succeeded
+            process_name (str, optional): Process to end. Defaults to the most recently started one.
+        """
+        with self._lock:
+            process_name = process_name or self.current_process
+            self._states[process_name] = 'succeeded' if success else 'failed'
+        self._events.put(('end', process_name, success))
+
+    def get_state(self) -> Dict[str, str]:
+        """Return the state ('running', 'succeeded' or 'failed') of every process seen so far."""
+        with self._lock:
+            return dict(self._states)
+
     def cleanup(self):
-        """Clean up any running processes"""
-        self.stop_event.set()
-        if self.blink_thread:
-            self.blink_thread.join()
-        
-        if self.bstick:
-            self.bstick.turn_off()
\ No newline at end of file
+        """
+        Stop the worker without waiting for the result display.
+
+        A green or red result still being shown is left on; otherwise the
+        indicator is turned off.
+        """
+        self._events.put(('stop', None, None))
+        self._worker.join()
+
+    def _show(self, color):
+        if color == self._color:
+            return
+        try:
+            if color == OFF:
+                self.backend.turn_off()
+            else:
+                red, green, blue = color
+                self.backend.set_color(red=red, green=green, blue=blue)
+        except Exception as e:
+            print(f"Status indicator failed, disabling it: {e}")
+            self.backend = NullBackend()
+        self._color = color
+
+    def _run(self):
+        running = set()
+        any_failed = False
+        next_toggle = None
+        result_until = None
+
+        while True:
+            now = time.monotonic()
+            if running:
+                timeout = max(0, next_toggle - now)
+            elif result_until is not None:
+                timeout = max(0, result_until - now)
+            else:
+                timeout = None
+
+            try:
+                kind, process_name, success = self._events.get(timeout=timeout)
+            except Empty:
+                kind = None
+
+            now = time.monotonic()
+            if kind == 'stop':
+                # Leave the final result on so it is still visible after the run
+                if not running and result_until is not None:
+                    return
+                break
+            elif kind == 'start':
+                if not running:
+                    next_toggle = now
+                    result_until = None
+                running.add(process_name)
+            elif kind == 'end':
+                running.discard(process_name)
+                any_failed = any_failed or not success
+                if not running:
+                    self._show(RED if any_failed else GREEN)
+                    result_until = now + self.RESULT_DISPLAY_SECONDS
+
+            if running and now >= next_toggle:
+                self._show(OFF if self._color == BLUE else BLUE)
+                next_toggle = now + self.BLINK_INTERVAL
+            elif not running and result_until is not None and now >= result_until:
+                self._show(OFF)
+                result_until = None
+
+        self._show(OFF)
@@ -15,7 +15,8 @@ DEFAULT_START_DATES: Dict[str, date] = {
     'Finances': date(2021, 1, 19),
     'RizeSummaries': date(2024, 2, 18),
     'RizeSessions': date(2024, 2, 18),
-    'SleepData': date(2024, 6, 9)
+    'SleepData': date(2024, 6, 9),
+    'OuraDailyActivity': date(2024, 6, 9)
 }
 
 def get_date_range(model_class: Type, date_column: str = 'date', user_id: Optional[int] = None) -> Tuple[date, date]:
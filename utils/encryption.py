@@ -1,10 +1,97 @@
 import os
+import time
+import hashlib
 from base64 import b64encode, b64decode
+from contextlib import contextmanager
+from functools import lru_cache
+from threading import Lock
+from typing import Dict, Optional, Tuple
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 import json
 
+DEFAULT_CREDENTIALS_TTL = 300  # seconds
+
+@lru_cache(maxsize=8)
+def derive_fernet_key(key: str) -> bytes:
+    """
+    Derive the Fernet key for an encryption key using PBKDF2.
+    
+    PBKDF2 is deliberately slow, so each key (including a rotated one) is only
+    derived once per process.
+    """
+    kdf = PBKDF2HMAC(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=b'personal_health_dashboard',  # Fixed salt for consistent key derivation
+        iterations=100000,
+    )
+    return b64encode(kdf.derive(key.encode()))
+
+class CredentialsCache:
+    """
+    Short-lived in-memory cache of decrypted credentials.
+    
+    Entries are keyed by a hash of the ciphertext, so changed credentials are
+    never served stale. Only active inside cached_credentials().
+    """
+    
+    def __init__(self, ttl_seconds: float = DEFAULT_CREDENTIALS_TTL):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[str, Tuple[float, str]] = {}
+        self._lock = Lock()
+    
+    def get(self, encrypted_data: bytes) -> Optional[dict]:
+        key = hashlib.sha256(encrypted_data).hexdigest()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, json_data = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+        return json.loads(json_data)  # A fresh dict per caller
+    
+    def put(self, encrypted_data: bytes, json_data: str):
+        key = hashlib.sha256(encrypted_data).hexdigest()
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, json_data)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+_active_cache: Optional[CredentialsCache] = None
+_active_cache_depth = 0
+_active_cache_lock = Lock()
+
+@contextmanager
+def cached_credentials(ttl_seconds: float = DEFAULT_CREDENTIALS_TTL):
+    """
+    Cache decrypted credentials for the duration of a sync run.
+    
+    Every thread shares the cache while the block runs. It is emptied when the
+    outermost block exits, so decrypted secrets don't outlive the run.
+    
+    Args:
+        ttl_seconds: How long a decrypted entry may be reused
+    """
+    global _active_cache, _active_cache_depth
+    with _active_cache_lock:
+        if _active_cache is None:
+            _active_cache = CredentialsCache(ttl_seconds)
+        _active_cache_depth += 1
+    try:
+        yield _active_cache
+    finally:
+        with _active_cache_lock:
+            _active_cache_depth -= 1
+            if _active_cache_depth == 0:
+                _active_cache.clear()
+                _active_cache = None
+
 class EncryptionManager:
     def __init__(self, key=None):
         """
@@ -16,17 +103,8 @@ class EncryptionManager:
             if not key:
                 raise ValueError("ENCRYPTION_KEY environment variable not set")
         
-        # Generate a key using PBKDF2
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=b'personal_health_dashboard',  # Fixed salt for consistent key derivation
-            iterations=100000,
-        )
-        key_bytes = key.encode()
-        key = b64encode(kdf.derive(key_bytes))
-        
-        self.fernet = Fernet(key)
+        # Derived once per process and key, see derive_fernet_key
+        self.fernet = Fernet(derive_fernet_key(key))
 
     def encrypt_credentials(self, credentials_dict):
         """
@@ -61,11 +139,19 @@ class EncryptionManager:
         """
         if not encrypted_data:
             return {}
+        
+        cache = _active_cache
+        if cache is not None:
+            cached = cache.get(encrypted_data)
+            if cached is not None:
+                return cached
             
         # Decrypt the data
-        decrypted_data = self.fernet.decrypt(encrypted_data)
+        decrypted_data = self.fernet.decrypt(encrypted_data).decode()
+        if cache is not None:
+            cache.put(encrypted_data, decrypted_data)
         
         # Parse JSON string back to dictionary
-        credentials_dict = json.loads(decrypted_data.decode())
+        credentials_dict = json.loads(decrypted_data)
         
         return credentials_dict
\ No newline at end of file
@@ -0,0 +1,163 @@
+import time
+from bisect import bisect_right
+from datetime import date, datetime, timedelta
+from threading import Lock
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from flask import current_app
+
+from app.extensions import db
+from database.models import SleepData, TimezoneIntervals
+
+DEFAULT_OFFSET_MINUTES = -420  # Used when a user has no sleep data yet
+DEFAULT_TIMELINE_TTL = 300  # seconds
+
+def build_intervals(nights: Sequence[Tuple[date, int]]) -> List[Tuple[date, date, int]]:
+    """
+    Compress nights into runs of the same UTC offset.
+
+    Args:
+        nights: (date, offset in minutes) pairs ordered by date
+
+    Returns:
+        List[Tuple[date, date, int]]: (first night, last night, offset) per run
+    """
+    intervals = []
+    for night, offset in nights:
+        if intervals and intervals[-1][2] == offset:
+            intervals[-1] = (intervals[-1][0], night, offset)
+        else:
+            intervals.append((night, night, offset))
+    return intervals
+
+class TimezoneTimeline:
+    """
+    A user's UTC offset over time as a step function of the local date.
+
+    Each interval's offset holds from its start date until the next interval
+    starts; dates before the first interval use the first offset. Lookups are a
+    binary search over the interval starts.
+    """
+
+    def __init__(self, intervals: Sequence[Tuple[date, date, int]], default_offset: int = DEFAULT_OFFSET_MINUTES):
+        self.intervals = list(intervals)
+        self.default_offset = default_offset
+        self._starts = [start.toordinal() for start, _, _ in self.intervals]
+        self._offsets = [offset for _, _, offset in self.intervals]
+
+    def __len__(self) -> int:
+        return len(self.intervals)
+
+    def offset_for(self, day: date) -> int:
+        """UTC offset in minutes on a local date."""
+        if not self._starts:
+            return self.default_offset
+        return self._offsets[max(bisect_right(self._starts, day.toordinal()) - 1, 0)]
+
+    def offsets_for(self, days: Sequence[date]) -> np.ndarray:
+        """UTC offsets in minutes for many local dates at once."""
+        if not self._starts:
+            return np.full(len(days), self.default_offset, dtype=np.int64)
+        ordinals = np.fromiter((day.toordinal() for day in days), dtype=np.int64, count=len(days))
+        index = np.maximum(np.searchsorted(self._starts, ordinals, side='right') - 1, 0)
+        return np.asarray(self._offsets, dtype=np.int64)[index]
+
+    def offsets_by_date(self, date_strings: Sequence[str]) -> Dict[str, int]:
+        """UTC offsets keyed by YYYY-MM-DD, as the Rize aggregation expects."""
+        offsets = self.offsets_for([date.fromisoformat(d_str) for d_str in date_strings]).tolist()
+        return dict(zip(date_strings, offsets))
+
+    def local_date(self, utc_time: datetime) -> date:
+        """Local date of a naive UTC timestamp."""
+        guess = (utc_time + timedelta(minutes=self.offset_for(utc_time.date()))).date()
+        return (utc_time + timedelta(minutes=self.offset_for(guess))).date()
+
+    def utc_bounds(self, day: date) -> Tuple[datetime, datetime]:
+        """First and last instant (naive UTC) of a local date."""
+        start = datetime.combine(day, datetime.min.time()) - timedelta(minutes=self.offset_for(day))
+        return start, start + timedelta(days=1) - timedelta(microseconds=1)
+
+_timelines: Dict[int, Tuple[float, TimezoneTimeline]] = {}
+_timelines_lock = Lock()
+
+def changed_dates(old: TimezoneTimeline, new: TimezoneTimeline) -> Optional[Tuple[date, date]]:
+    """
+    First and last local date on which two timelines give different offsets.
+
+    Returns:
+        Optional[Tuple[date, date]]: The range, open ends as date.min/date.max,
+            or None if the timelines agree everywhere
+    """
+    breakpoints = sorted({start for start, _, _ in old.intervals} | {start for start, _, _ in new.intervals})
+    # Offsets are constant from one breakpoint to the next, and before the first
+    segment_starts = [date.min] + breakpoints
+    changed = [i for i, start in enumerate(segment_starts) if old.offset_for(start) != new.offset_for(start)]
+    if not changed:
+        return None
+
+    first = segment_starts[changed[0]]
+    last = segment_starts[changed[-1] + 1] - timedelta(days=1) if changed[-1] + 1 < len(segment_starts) else date.max
+    return first, last
+
+def rebuild_timezone_timeline(user_id: int) -> Optional[Tuple[date, date]]:
+    """
+    Recompute a user's TimezoneIntervals from their SleepData offsets.
+
+    Called after sleep data is loaded. The caller commits and then calls
+    invalidate_timezone_timeline, so no other thread can cache the old
+    intervals again before the new ones are visible.
+
+    Returns:
+        Optional[Tuple[date, date]]: Local dates whose offset changed (see changed_dates)
+    """
+    old_rows = db.session.query(
+        TimezoneIntervals.start_date, TimezoneIntervals.end_date, TimezoneIntervals.offset_minutes
+    ).filter(TimezoneIntervals.user_id == user_id).order_by(TimezoneIntervals.start_date).all()
+
+    nights = db.session.query(SleepData.date, SleepData.timezone_offset)\
+        .filter(SleepData.user_id == user_id)\
+        .order_by(SleepData.date)\
+        .all()
+    intervals = build_intervals([(night.date, night.timezone_offset) for night in nights])
+
+    TimezoneIntervals.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+    if intervals:
+        db.session.add_all([
+            TimezoneIntervals(user_id=user_id, start_date=start, end_date=end, offset_minutes=offset)
+            for start, end, offset in intervals
+        ])
+
+    return changed_dates(
+        TimezoneTimeline([(row.start_date, row.end_date, row.offset_minutes) for row in old_rows]),
+        TimezoneTimeline(intervals)
+    )
+
+def invalidate_timezone_timeline(user_id: Optional[int] = None):
+    """Drop a user's cached timeline, or every cached timeline."""
+    with _timelines_lock:
+        if user_id is None:
+            _timelines.clear()
+        else:
+            _timelines.pop(user_id, None)
+
+def get_timezone_timeline(user_id: int) -> TimezoneTimeline:
+    """
+    Get a user's timezone timeline, loading it with one query at most every TIMEZONE_TIMELINE_TTL seconds.
+    """
+    ttl_seconds = current_app.config.get('TIMEZONE_TIMELINE_TTL', DEFAULT_TIMELINE_TTL)
+    now = time.monotonic()
+
+    with _timelines_lock:
+        cached = _timelines.get(user_id)
+    if cached and now - cached[0] < ttl_seconds:
+        return cached[1]
+
+    rows = db.session.query(
+        TimezoneIntervals.start_date, TimezoneIntervals.end_date, TimezoneIntervals.offset_minutes
+    ).filter(TimezoneIntervals.user_id == user_id).order_by(TimezoneIntervals.start_date).all()
+    timeline = TimezoneTimeline([(row.start_date, row.end_date, row.offset_minutes) for row in rows])
+
+    with _timelines_lock:
+        _timelines[user_id] = (now, timeline)
+    return timeline